@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calibrage automatique des coordonnées Kilo Code
+Retrouve le champ de saisie, le bouton d'envoi et la zone de réponse par
+reconnaissance d'image dans la fenêtre VSCode ; les positions sont mises en
+cache sur disque par résolution et taille de fenêtre
+"""
+
+import heapq
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Point = Tuple[int, int]
+Region = Tuple[int, int, int, int]
+
+# Éléments localisés (un modèle <élément>.png par élément)
+ELEMENTS = ('input', 'send_button', 'response')
+
+
+def _grab_with_pillow(region: Region) -> Any:
+    """Capture d'écran d'une région avec Pillow"""
+    from PIL import ImageGrab
+
+    left, top, width, height = region
+    return ImageGrab.grab(bbox=(left, top, left + width, top + height))
+
+
+def _match_with_opencv(image: Any, template: Any) -> Tuple[int, int, float]:
+    """Corrélation normalisée OpenCV (rapide, si opencv-python est installé)"""
+    import cv2
+    import numpy
+
+    result = cv2.matchTemplate(numpy.asarray(image), numpy.asarray(template), cv2.TM_CCOEFF_NORMED)
+    _, score, _, (left, top) = cv2.minMaxLoc(result)
+    return left, top, float(score)
+
+
+def _similarity(image: Any, template: Any, left: int, top: int) -> float:
+    """1 - écart moyen des pixels (0 : opposés, 1 : identiques)"""
+    from PIL import ImageChops, ImageStat
+
+    crop = image.crop((left, top, left + template.width, top + template.height))
+    return 1.0 - ImageStat.Stat(ImageChops.difference(crop, template)).mean[0] / 255.0
+
+
+def _sum(total: Any, image: Any) -> Any:
+    """Somme pixel à pixel en entiers 32 bits (ImageMath)"""
+    from PIL import ImageMath
+
+    if hasattr(ImageMath, 'lambda_eval'):  # Pillow >= 10.3
+        return ImageMath.lambda_eval(lambda args: args['total'] + args['image'], total=total, image=image)
+    return ImageMath.eval('total + image', total=total, image=image)
+
+
+def _difference_map(image: Any, template: Any) -> Any:
+    """
+    Somme des écarts absolus du modèle à chaque position de l'image (image 'I')
+
+    Calculée pixel du modèle par pixel du modèle, chaque étape traitant toutes
+    les positions d'un coup : à réserver aux images réduites.
+    """
+    from PIL import Image, ImageChops
+
+    size = (image.width - template.width + 1, image.height - template.height + 1)
+    pixels = template.load()
+    total = Image.new('I', size, 0)
+
+    for top in range(template.height):
+        for left in range(template.width):
+            shifted = image.crop((left, top, left + size[0], top + size[1]))
+            total = _sum(total, ImageChops.difference(shifted, Image.new('L', size, pixels[left, top])))
+    return total
+
+
+def _positions_around(image: Any, template: Any, left: int, top: int, radius: int) -> Iterator[Point]:
+    """Positions du modèle à au plus radius pixels de (left, top), dans l'image"""
+    for y in range(max(0, top - radius), min(image.height - template.height, top + radius) + 1):
+        for x in range(max(0, left - radius), min(image.width - template.width, left + radius) + 1):
+            yield x, y
+
+
+def _match_with_pillow(image: Any, template: Any, downscale: int = 4,
+                       candidates: int = 8) -> Tuple[int, int, float]:
+    """
+    Recherche grossière sur images réduites (toutes les positions), puis
+    affinage des meilleurs candidats en pleine résolution
+
+    Args:
+        downscale: Facteur de réduction de la recherche grossière
+        candidates: Positions grossières affinées
+    """
+    downscale = max(1, min(downscale, template.width, template.height))
+    small_image = image.reduce(downscale)
+    small_template = template.reduce(downscale)
+
+    differences = _difference_map(small_image, small_template)
+    width = differences.width
+    values = array('i', differences.tobytes())  # entiers 32 bits natifs (mode 'I')
+    coarse = heapq.nsmallest(candidates, range(len(values)), key=values.__getitem__)
+
+    score, left, top = max(
+        (_similarity(image, template, left, top), left, top)
+        for index in coarse
+        for left, top in _positions_around(image, template, index % width * downscale,
+                                           index // width * downscale, downscale)
+    )
+    return left, top, score
+
+
+def match_template(image: Any, template: Any) -> Optional[Tuple[int, int, float]]:
+    """
+    Meilleure position d'un modèle dans une image (niveaux de gris)
+
+    Returns:
+        (left, top, score) avec un score dans [0, 1], ou None si le modèle
+        dépasse l'image
+    """
+    if template.width > image.width or template.height > image.height:
+        return None
+
+    try:
+        return _match_with_opencv(image, template)
+    except ImportError:
+        return _match_with_pillow(image, template)
+
+
+class AutoLocator:
+    """
+    Positions des éléments Kilo Code, relatives à la fenêtre VSCode
+
+    Une position en cache est vérifiée avant usage en comparant une petite
+    capture autour d'elle au modèle : la recherche complète dans la fenêtre
+    n'a lieu qu'en l'absence de cache ou si cette vérification échoue, et au
+    plus une fois par search_interval et par élément.
+    """
+
+    def __init__(self, templates_dir: str, cache_path: str,
+                 screen_size: Callable[[], Tuple[int, int]],
+                 grab: Optional[Callable[[Region], Any]] = None,
+                 threshold: float = 0.9, margin: int = 6, search_interval: float = 30.0):
+        """
+        Args:
+            templates_dir: Répertoire des modèles (input.png, send_button.png, response.png)
+            cache_path: Fichier JSON du cache de positions
+            screen_size: Résolution courante de l'écran
+            grab: Fonction de capture (Pillow par défaut)
+            threshold: Score minimal d'une correspondance
+            margin: Tolérance (pixels) de la vérification d'une position en cache
+            search_interval: Délai minimal entre deux recherches complètes d'un élément
+        """
+        self.templates_dir = templates_dir
+        self.cache_path = cache_path
+        self.screen_size = screen_size
+        self.grab = grab or _grab_with_pillow
+        self.threshold = threshold
+        self.margin = margin
+        self.search_interval = search_interval
+        self.templates: Dict[str, Any] = {}
+        self.relocations = 0
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._last_search: Dict[str, float] = {}
+
+        self.load_templates()
+        self._load_cache()
+
+    @property
+    def enabled(self) -> bool:
+        """Au moins un modèle est disponible"""
+        return bool(self.templates)
+
+    def load_templates(self) -> None:
+        """Charge les modèles présents dans templates_dir"""
+        self.templates = {}
+        for element in ELEMENTS:
+            path = os.path.join(self.templates_dir, f"{element}.png")
+            if not os.path.exists(path):
+                continue
+            try:
+                from PIL import Image
+
+                with Image.open(path) as template:
+                    self.templates[element] = template.convert('L')
+            except Exception as e:
+                logger.error(f"Modèle {path} illisible: {str(e)}")
+
+        if self.templates:
+            logger.info(f"Calibrage automatique: modèles {', '.join(self.templates)}")
+
+    def cache_key(self, window_rect: Region) -> str:
+        """Clé de cache : résolution de l'écran et taille de la fenêtre"""
+        screen_width, screen_height = self.screen_size()
+        return f"{screen_width}x{screen_height}/{window_rect[2]}x{window_rect[3]}"
+
+    def locate(self, element: str, window_rect: Optional[Region] = None,
+               verify: bool = True) -> Optional[Point]:
+        """
+        Position (centre) d'un élément
+
+        Args:
+            element: 'input', 'send_button' ou 'response'
+            window_rect: Fenêtre VSCode (x, y, width, height) ; tout l'écran si None
+            verify: Vérifier la position en cache (sinon elle est utilisée telle quelle)
+
+        Returns:
+            La position absolue, ou None si l'élément n'a pas de modèle ou
+            n'est pas trouvé (l'appelant garde ses coordonnées)
+        """
+        template = self.templates.get(element)
+        if template is None:
+            return None
+
+        rect = window_rect or (0, 0, *self.screen_size())
+        key = self.cache_key(rect)
+
+        with self._lock:
+            offset = self._cache.get(key, {}).get(element)
+
+        if offset is not None:
+            point = (rect[0] + offset[0], rect[1] + offset[1])
+            if not verify or self.validate(element, point):
+                return point
+            logger.info(f"Position en cache de '{element}' invalide")
+
+        now = time.monotonic()
+        if now - self._last_search.get(element, float('-inf')) < self.search_interval:
+            return None
+        self._last_search[element] = now
+
+        point = self._search(element, template, rect)
+        if point is None:
+            logger.warning(f"Élément '{element}' introuvable dans la fenêtre {rect}")
+            return None
+
+        self.relocations += 1
+        logger.info(f"Élément '{element}' localisé en {point} (fenêtre {rect})")
+        with self._lock:
+            self._cache.setdefault(key, {})[element] = (point[0] - rect[0], point[1] - rect[1])
+        self._save_cache()
+        return point
+
+    def validate(self, element: str, point: Point) -> bool:
+        """Vérifie que le modèle est toujours visible autour d'une position"""
+        template = self.templates[element]
+        left = point[0] - template.width // 2 - self.margin
+        top = point[1] - template.height // 2 - self.margin
+        region = (max(0, left), max(0, top), template.width + 2 * self.margin, template.height + 2 * self.margin)
+
+        try:
+            match = match_template(self.grab(region).convert('L'), template)
+        except Exception as e:
+            logger.warning(f"Vérification de '{element}' impossible: {str(e)}")
+            return False
+
+        return match is not None and match[2] >= self.threshold
+
+    def capture_templates(self, points: Dict[str, Point], size: Tuple[int, int] = (96, 32),
+                          window_rect: Optional[Region] = None) -> None:
+        """
+        Enregistre les modèles à partir de positions connues (calibrage manuel)
+
+        Args:
+            points: Élément -> position absolue actuellement correcte
+            size: Taille (largeur, hauteur) des modèles capturés
+            window_rect: Fenêtre VSCode, pour amorcer le cache de positions
+        """
+        os.makedirs(self.templates_dir, exist_ok=True)
+        width, height = size
+
+        for element, (x, y) in points.items():
+            image = self.grab((max(0, x - width // 2), max(0, y - height // 2), width, height))
+            image.save(os.path.join(self.templates_dir, f"{element}.png"))
+            logger.info(f"Modèle '{element}' capturé autour de ({x}, {y})")
+
+        self.load_templates()
+
+        rect = window_rect or (0, 0, *self.screen_size())
+        with self._lock:
+            entry = self._cache.setdefault(self.cache_key(rect), {})
+            for element, (x, y) in points.items():
+                entry[element] = (x - rect[0], y - rect[1])
+        self._save_cache()
+
+    def _search(self, element: str, template: Any, rect: Region) -> Optional[Point]:
+        """Recherche complète du modèle dans la fenêtre"""
+        try:
+            match = match_template(self.grab(rect).convert('L'), template)
+        except Exception as e:
+            logger.error(f"Recherche de '{element}' impossible: {str(e)}")
+            return None
+
+        if match is None or match[2] < self.threshold:
+            return None
+
+        left, top, _ = match
+        return (rect[0] + left + template.width // 2, rect[1] + top + template.height // 2)
+
+    def _load_cache(self) -> None:
+        """Lit le cache de positions (au démarrage)"""
+        try:
+            if os.path.exists(self.cache_path):
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._cache = {
+                    key: {element: tuple(offset) for element, offset in entry.items()}
+                    for key, entry in data.items()
+                }
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement du cache de calibrage: {str(e)}")
+
+    def _save_cache(self) -> None:
+        """Écrit le cache de positions (fichier temporaire puis os.replace)"""
+        with self._lock:
+            data = {key: {element: list(offset) for element, offset in entry.items()}
+                    for key, entry in self._cache.items()}
+
+        try:
+            directory = os.path.dirname(os.path.abspath(self.cache_path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.calibration-', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.error(f"Erreur lors de la sauvegarde du cache de calibrage: {str(e)}")
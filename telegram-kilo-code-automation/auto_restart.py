@@ -2,16 +2,23 @@
 # -*- coding: utf-8 -*-
 """
 Script de redémarrage automatique pour éviter les boucles infinies
-Surveille le processus principal et le redémarre en cas de problème
+Surveille le processus principal et le redémarre en cas d'arrêt anormal ou de
+blocage (battement de cœur absent), avec un délai exponentiel et un budget de
+redémarrages sur une fenêtre glissante
 """
 
 import os
 import sys
 import time
+import random
+import select
 import subprocess
 import signal
 import logging
-from pathlib import Path
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from heartbeat import HEARTBEAT_FD_ENV
 
 # Configuration du logging
 logging.basicConfig(
@@ -20,32 +27,109 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Battement de cœur par pipe et réveil sur SIGCHLD : POSIX uniquement
+POSIX = os.name == 'posix'
+
+
 class AutoRestart:
+    """
+    Superviseur du bot
+
+    Sous POSIX, la boucle attend dans select() le pipe des battements et le
+    descripteur de réveil des signaux (SIGCHLD, SIGTERM) : la fin du bot est
+    traitée immédiatement, et un bot vivant mais muet au-delà de
+    heartbeat_timeout est tué puis redémarré.
+    """
+
     def __init__(self):
-        self.process = None
-        self.restart_count = 0
-        self.max_restarts = 5
-        self.restart_delay = 10  # secondes
+        # Budget : max_restarts redémarrages sur restart_window secondes
+        self.max_restarts = int(os.getenv('RESTART_MAX', 5))
+        self.restart_window = float(os.getenv('RESTART_WINDOW', 600))
+        # Délai exponentiel (base * 2^n, plafonné) avec gigue
+        self.backoff_base = float(os.getenv('RESTART_BACKOFF_BASE', 1))
+        self.backoff_max = float(os.getenv('RESTART_BACKOFF_MAX', 300))
+        # Durée de fonctionnement au-delà de laquelle le délai repart de la base
+        self.stable_after = float(os.getenv('RESTART_STABLE_AFTER', 120))
+        # Battement de cœur : délai de démarrage, puis silence maximal
+        self.heartbeat_enabled = POSIX and os.getenv('HEARTBEAT_ENABLED', 'true').lower() == 'true'
+        self.startup_grace = float(os.getenv('HEARTBEAT_STARTUP_GRACE', 60))
+        self.heartbeat_timeout = float(os.getenv('HEARTBEAT_TIMEOUT', 30))
+
+        self.process: Optional[subprocess.Popen] = None
+        self.restart_times: Deque[float] = deque()
+        self.failures = 0
+        self.stopping = False
+        self._heartbeat_fd: Optional[int] = None
+        self._wakeup_r: Optional[int] = None
+
+    def backoff_delay(self, failures: int) -> float:
+        """Délai avant le redémarrage n°failures : moitié fixe, moitié aléatoire"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(0, failures - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def consume_restart_budget(self) -> bool:
+        """Enregistre un redémarrage ; False si le budget de la fenêtre est épuisé"""
+        now = time.monotonic()
+        while self.restart_times and now - self.restart_times[0] > self.restart_window:
+            self.restart_times.popleft()
+
+        if len(self.restart_times) >= self.max_restarts:
+            return False
+
+        self.restart_times.append(now)
+        return True
+
+    def install_signal_handlers(self):
+        """Réveil de select() sur SIGCHLD ; arrêt propre sur SIGTERM"""
+        if not POSIX:
+            return
+
+        self._wakeup_r, wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(wakeup_w, False)
+        signal.set_wakeup_fd(wakeup_w)
+
+        # Un gestionnaire Python est requis pour que le signal soit écrit sur le descripteur
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+
+    def _handle_stop(self, signum, frame):
+        logger.info(f"Signal {signum} reçu, arrêt demandé")
+        self.stopping = True
 
     def start_main_process(self):
         """Démarre le processus principal"""
         try:
             logger.info("Démarrage du bot principal...")
-            self.process = subprocess.Popen([
-                sys.executable,
-                "telegram_kilo_automation.py"
-            ], cwd=os.getcwd())
+            env = dict(os.environ)
+            pass_fds: Tuple[int, ...] = ()
+
+            if self.heartbeat_enabled:
+                self._heartbeat_fd, heartbeat_w = os.pipe()
+                env[HEARTBEAT_FD_ENV] = str(heartbeat_w)
+                pass_fds = (heartbeat_w,)
+
+            try:
+                self.process = subprocess.Popen([
+                    sys.executable,
+                    "telegram_kilo_automation.py"
+                ], cwd=os.getcwd(), env=env, pass_fds=pass_fds)
+            finally:
+                # L'extrémité d'écriture n'appartient qu'au bot
+                for fd in pass_fds:
+                    os.close(fd)
 
             logger.info(f"Processus démarré avec PID: {self.process.pid}")
             return True
 
         except Exception as e:
             logger.error(f"Erreur lors du démarrage: {str(e)}")
+            self._close_heartbeat()
             return False
 
     def stop_main_process(self):
         """Arrête le processus principal"""
-        if self.process:
+        if self.process and self.process.poll() is None:
             try:
                 logger.info("Arrêt du processus principal...")
                 self.process.terminate()
@@ -59,41 +143,130 @@ class AutoRestart:
                     self.process.wait()
 
                 logger.info("Processus arrêté")
-                return True
 
             except Exception as e:
                 logger.error(f"Erreur lors de l'arrêt: {str(e)}")
                 return False
 
+        self._close_heartbeat()
+        return True
+
+    def _close_heartbeat(self):
+        if self._heartbeat_fd is not None:
+            os.close(self._heartbeat_fd)
+            self._heartbeat_fd = None
+
+    def _drain(self, fd: int) -> bool:
+        """Vide un descripteur ; False en fin de fichier"""
+        try:
+            return bool(os.read(fd, 4096))
+        except BlockingIOError:
+            return True
+
+    def watch_process(self) -> str:
+        """
+        Attend la fin du bot, un blocage ou une demande d'arrêt
+
+        Returns:
+            'exit', 'stall' ou 'stop'
+        """
+        if not POSIX:
+            # Windows : attente bloquante sur le processus (réveil immédiat à sa fin)
+            self.process.wait()
+            return 'exit'
+
+        started_at = time.monotonic()
+        last_beat: Optional[float] = None
+        watched = [self._wakeup_r]
+        if self._heartbeat_fd is not None:
+            watched.append(self._heartbeat_fd)
+
+        while True:
+            if self.stopping:
+                return 'stop'
+            if self.process.poll() is not None:
+                return 'exit'
+
+            timeout = None
+            if self._heartbeat_fd is not None:
+                if last_beat is None:
+                    deadline = started_at + self.startup_grace
+                else:
+                    deadline = last_beat + self.heartbeat_timeout
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    return 'stall'
+
+            try:
+                readable, _, _ = select.select(watched, [], [], timeout)
+            except InterruptedError:
+                continue
+
+            if self._wakeup_r in readable:
+                self._drain(self._wakeup_r)
+            if self._heartbeat_fd in readable:
+                if self._drain(self._heartbeat_fd):
+                    if last_beat is None:
+                        logger.info("Premier battement de cœur reçu")
+                    last_beat = time.monotonic()
+                else:
+                    # Pipe fermé par le bot : sa fin sera signalée par SIGCHLD
+                    watched.remove(self._heartbeat_fd)
+
+    def wait_before_restart(self, delay: float) -> bool:
+        """Attend delay secondes ; False si un arrêt est demandé entre-temps"""
+        deadline = time.monotonic() + delay
+        while not self.stopping:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, 1.0))
+        return False
+
     def monitor_and_restart(self):
         """Surveille le processus et redémarre si nécessaire"""
         logger.info("Démarrage du système de surveillance...")
 
-        while self.restart_count < self.max_restarts:
-            if not self.process or self.process.poll() is not None:
-                if self.restart_count > 0:
-                    logger.warning(f"Redémarrage nécessaire (tentative {self.restart_count + 1}/{self.max_restarts})")
-
-                self.restart_count += 1
+        while not self.stopping:
+            started_at = time.monotonic()
+            reason = self.watch_process() if self.process else 'exit'
 
-                # Attendre avant le redémarrage
-                if self.restart_count > 1:
-                    logger.info(f"Attente de {self.restart_delay} secondes avant redémarrage...")
-                    time.sleep(self.restart_delay)
+            if reason == 'stop':
+                break
 
-                # Arrêter l'ancien processus s'il existe encore
+            if reason == 'stall':
+                logger.error("Battement de cœur absent : bot bloqué, arrêt forcé")
                 self.stop_main_process()
+            else:
+                returncode = self.process.returncode if self.process else None
+                self._close_heartbeat()
+                if returncode == 0:
+                    logger.info("Le bot s'est arrêté normalement, fin de la surveillance")
+                    return True
+                logger.warning(f"Le bot s'est arrêté (code {returncode})")
 
-                # Démarrer le nouveau processus
-                if self.start_main_process():
-                    logger.info("Redémarrage réussi")
-                else:
-                    logger.error("Échec du redémarrage")
+            # Un bot resté stable assez longtemps repart du délai de base
+            if time.monotonic() - started_at >= self.stable_after:
+                self.failures = 0
+            self.failures += 1
+
+            if not self.consume_restart_budget():
+                logger.error(f"Budget de redémarrages épuisé ({self.max_restarts} en {self.restart_window:.0f}s)")
+                return False
 
-            time.sleep(2)  # Vérifier toutes les 2 secondes
+            delay = self.backoff_delay(self.failures)
+            logger.info(f"Redémarrage dans {delay:.1f} secondes (échec consécutif n°{self.failures})...")
+            if not self.wait_before_restart(delay):
+                break
+
+            if self.start_main_process():
+                logger.info("Redémarrage réussi")
+            else:
+                logger.error("Échec du redémarrage")
+                self.process = None
 
-        logger.error(f"Nombre maximum de redémarrages atteint ({self.max_restarts})")
         logger.info("Arrêt du système de surveillance")
+        return True
 
     def run(self):
         """Point d'entrée principal"""
@@ -104,11 +277,14 @@ class AutoRestart:
 +================================================+
         """)
 
+        success = True
         try:
+            self.install_signal_handlers()
+
             # Démarrer le processus initial
             if self.start_main_process():
                 # Commencer la surveillance
-                self.monitor_and_restart()
+                success = self.monitor_and_restart()
             else:
                 logger.error("Impossible de démarrer le processus initial")
                 sys.exit(1)
@@ -119,10 +295,13 @@ class AutoRestart:
             logger.info("Arrêt du système de surveillance...")
             self.stop_main_process()
 
+        if not success:
+            sys.exit(1)
+
 def main():
     """Fonction principale"""
     auto_restart = AutoRestart()
     auto_restart.run()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worker d'automatisation GUI
+Exécute les actions pyautogui dans un thread dédié, alimenté par une file bornée,
+pour que la boucle asyncio du bot Telegram ne soit jamais bloquée
+"""
+
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Levée lorsque la file d'automatisation est pleine"""
+
+
+class AutomationJob:
+    """Job d'automatisation en attente d'exécution"""
+
+    def __init__(self, func: Callable[..., Any], args: tuple, kwargs: dict, name: str):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name
+        # Contexte de l'appelant (identifiant de trace, etc.), restauré dans le worker
+        self.context = contextvars.copy_context()
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class AutomationWorker:
+    """
+    Consommateur unique des actions GUI
+
+    Toutes les interactions avec l'écran (clic, saisie, copie) passent par ce
+    worker : elles sont donc sérialisées et exécutées hors de la boucle asyncio.
+    """
+
+    def __init__(self, max_queue_size: int = 20, name: str = "automation-worker",
+                 observer: Optional[Callable[[str, float, float, bool], None]] = None):
+        """
+        Args:
+            max_queue_size: Nombre maximum de jobs en attente
+            name: Nom du thread
+            observer: Appelé après chaque job avec (nom, attente, durée, échec)
+        """
+        self.max_queue_size = max_queue_size
+        self.name = name
+        self.observer = observer
+        self._queue: "queue.Queue[Optional[AutomationJob]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._processed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._last_wait = 0.0
+        self._max_wait = 0.0
+        # Début du job en cours (None si le worker est inactif)
+        self._job_started_at: Optional[float] = None
+
+    def start(self) -> None:
+        """Démarre le thread consommateur"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Worker d'automatisation démarré (file max: {self.max_queue_size})")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Arrête le thread consommateur après les jobs déjà en file"""
+        if not self._thread:
+            return
+
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("File d'automatisation pleine, arrêt forcé du worker")
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def submit(self, func: Callable[..., Any], *args, name: Optional[str] = None, **kwargs) -> Future:
+        """
+        Ajoute un job dans la file
+
+        Returns:
+            Un Future résolu avec le résultat de func
+
+        Raises:
+            QueueFullError: si la file est pleine
+        """
+        job = AutomationJob(func, args, kwargs, name or getattr(func, '__name__', 'job'))
+
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise QueueFullError(f"File d'automatisation pleine ({self.max_queue_size} jobs)")
+
+        logger.info(f"Job '{job.name}' ajouté à la file (profondeur: {self.queue_depth()})")
+        return job.future
+
+    def submit_async(self, func: Callable[..., Any], *args, name: Optional[str] = None, **kwargs) -> "asyncio.Future":
+        """Comme submit, mais retourne un awaitable lié à la boucle asyncio courante"""
+        return asyncio.wrap_future(self.submit(func, *args, name=name, **kwargs))
+
+    def queue_depth(self) -> int:
+        """Nombre de jobs en attente"""
+        return self._queue.qsize()
+
+    def busy_for(self) -> float:
+        """Durée d'exécution du job en cours (0 si le worker est inactif)"""
+        started_at = self._job_started_at
+        return time.monotonic() - started_at if started_at is not None else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de la file (profondeur et temps d'attente)"""
+        with self._stats_lock:
+            processed = self._processed
+            return {
+                'queue_depth': self.queue_depth(),
+                'queue_max_size': self.max_queue_size,
+                'jobs_processed': processed,
+                'jobs_failed': self._failed,
+                'last_wait': self._last_wait,
+                'avg_wait': self._total_wait / processed if processed else 0.0,
+                'max_wait': self._max_wait,
+            }
+
+    def _run_loop(self) -> None:
+        """Boucle du thread consommateur"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            wait_time = time.monotonic() - job.enqueued_at
+            if not job.future.set_running_or_notify_cancel():
+                continue
+
+            logger.info(f"Exécution du job '{job.name}' (attente: {wait_time:.2f}s)")
+            started_at = time.monotonic()
+            self._job_started_at = started_at
+
+            try:
+                result = job.context.run(job.func, *job.args, **job.kwargs)
+            except Exception as e:
+                self._job_started_at = None
+                logger.error(f"Erreur dans le job '{job.name}': {str(e)}")
+                self._record(job.name, wait_time, time.monotonic() - started_at, failed=True)
+                job.future.set_exception(e)
+            else:
+                self._job_started_at = None
+                self._record(job.name, wait_time, time.monotonic() - started_at, failed=False)
+                job.future.set_result(result)
+
+        logger.info("Worker d'automatisation arrêté")
+
+    def _record(self, job_name: str, wait_time: float, duration: float, failed: bool) -> None:
+        with self._stats_lock:
+            self._processed += 1
+            if failed:
+                self._failed += 1
+            self._total_wait += wait_time
+            self._last_wait = wait_time
+            self._max_wait = max(self._max_wait, wait_time)
+
+        if self.observer is not None:
+            try:
+                self.observer(job_name, wait_time, duration, failed)
+            except Exception as e:
+                logger.warning(f"Erreur de l'observateur du worker: {str(e)}")
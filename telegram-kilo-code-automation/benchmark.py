@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de bout en bout du bot Telegram -> Kilo Code
+Lance le bot contre une API Telegram simulée (telegram_api_stub) avec le pilote
+GUI simulé, rejoue une charge (rafale, longs prompts, nombreux destinataires,
+longues réponses) et mesure latences et débit ; résultats en JSON pour comparer
+les commits entre eux
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import signal
+import argparse
+import tempfile
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram_api_stub import TelegramApiStub
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_SCRIPT = os.path.join(SCRIPT_DIR, 'telegram_kilo_automation.py')
+BENCH_TOKEN = '123456:BENCHMARK'
+FIRST_USER_ID = 1000
+MARKER_PATTERN = re.compile(r'bench-\d{5}')
+
+# Charges prédéfinies (surchargées par les options de la ligne de commande)
+WORKLOADS: Dict[str, Dict[str, Any]] = {
+    'burst': {'count': 20, 'interval': 0.0, 'prompt_chars': 40, 'recipients': 1, 'response_chars': 0},
+    'long_prompt': {'count': 5, 'interval': 1.0, 'prompt_chars': 3000, 'recipients': 1, 'response_chars': 0},
+    'many_recipients': {'count': 5, 'interval': 1.0, 'prompt_chars': 40, 'recipients': 25, 'response_chars': 0},
+    'long_response': {'count': 3, 'interval': 2.0, 'prompt_chars': 40, 'recipients': 1, 'response_chars': 20000},
+}
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Percentile par interpolation linéaire (None si aucune valeur)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    """Résumé p50/p95/p99 d'une série de durées (ms)"""
+    return {
+        'count': len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values) if values else None,
+    }
+
+
+def build_prompt(index: int, length: int) -> Tuple[str, str]:
+    """Prompt identifiable par son marqueur (repris dans la réponse simulée)"""
+    marker = f"bench-{index:05d}"
+    prompt = f"{marker} Explique ce code"
+    filler = " et détaille chaque étape"
+    while len(prompt) < length:
+        prompt += filler
+    return marker, prompt[:max(length, len(marker))]
+
+
+def bot_environment(stub: TelegramApiStub, workdir: str, params: Dict[str, Any]) -> Dict[str, str]:
+    """Variables d'environnement du bot sous benchmark"""
+    env = dict(os.environ)
+    env.update({
+        'TELEGRAM_BOT_TOKEN': BENCH_TOKEN,
+        'TELEGRAM_API_BASE_URL': stub.base_url,
+        'TELEGRAM_ALLOWED_USER_IDS': ','.join(str(FIRST_USER_ID + i) for i in range(params['recipients'])),
+        'BOT_MODE': 'polling',
+        'GUI_DRIVER': 'fake',
+        'FAKE_GUI_RESPONSE_DELAY': str(params['response_delay']),
+        'FAKE_GUI_RESPONSE_CHARS': str(params['response_chars']),
+        'ACTION_DELAY': str(params['action_delay']),
+        'MONITORING_ENABLED': 'true',
+        'MONITORING_MIN_INTERVAL': '0.1',
+        'MONITORING_MAX_INTERVAL': '0.5',
+        'COALESCE_WINDOW': '0',
+        'STREAMING_ENABLED': 'false',
+        'METRICS_ENABLED': 'false',
+        'TRACING_ENABLED': 'true',
+        'TRACE_FILE': os.path.join(workdir, 'traces.jsonl'),
+    })
+    return env
+
+
+def stop_bot(process: subprocess.Popen) -> None:
+    """Arrêt propre (Ctrl+C) pour vider les traces, puis arrêt forcé"""
+    if process.poll() is not None:
+        return
+    if os.name == 'posix':
+        process.send_signal(signal.SIGINT)
+    else:
+        process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def read_stage_durations(trace_file: str) -> Dict[str, List[float]]:
+    """Durées (ms) des spans par étape, depuis le fichier de traces"""
+    stages: Dict[str, List[float]] = {}
+    if not os.path.exists(trace_file):
+        return stages
+
+    with open(trace_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                span = json.loads(line)
+            except ValueError:
+                continue
+            stages.setdefault(span['span'], []).append(span['duration_ms'])
+    return stages
+
+
+def run_workload(name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Exécute une charge et retourne ses résultats"""
+    stub = TelegramApiStub()
+    stub.start()
+    workdir = tempfile.mkdtemp(prefix=f'kilo-bench-{name}-')
+    log_path = os.path.join(workdir, 'bot.log')
+    recipients = [FIRST_USER_ID + i for i in range(params['recipients'])]
+    sender = recipients[0]
+    sent_at: Dict[str, float] = {}
+
+    print(f"\n▶ {name}: {params['count']} prompt(s), {params['prompt_chars']} car., "
+          f"{params['recipients']} destinataire(s), réponses >= {params['response_chars']} car.")
+
+    with open(log_path, 'w', encoding='utf-8') as log_file:
+        process = subprocess.Popen(
+            [sys.executable, BOT_SCRIPT],
+            cwd=workdir,
+            env=bot_environment(stub, workdir, params),
+            stdout=log_file,
+            stderr=subprocess.STDOUT
+        )
+
+        try:
+            if not stub.wait_for_polling(timeout=params['timeout']):
+                raise RuntimeError(f"Le bot n'a pas démarré (voir {log_path})")
+
+            for index in range(params['count']):
+                marker, prompt = build_prompt(index, params['prompt_chars'])
+                sent_at[marker] = time.time()
+                stub.push_message(sender, prompt)
+                if params['interval']:
+                    time.sleep(params['interval'])
+
+            # Attendre que chaque réponse ait atteint tous les destinataires
+            expected = len(sent_at) * len(recipients)
+            deadline = time.monotonic() + params['timeout']
+            while time.monotonic() < deadline:
+                if len(collect_deliveries(stub)) >= expected:
+                    break
+                time.sleep(0.1)
+        finally:
+            stop_bot(process)
+            stub.stop()
+
+    deliveries = collect_deliveries(stub)
+    end_to_end = [(deliveries[(marker, sender)] - sent) * 1000
+                  for marker, sent in sent_at.items() if (marker, sender) in deliveries]
+
+    fanout = []
+    for marker in sent_at:
+        times = [deliveries[(marker, chat)] for chat in recipients if (marker, chat) in deliveries]
+        if len(times) == len(recipients) and len(times) > 1:
+            fanout.append((max(times) - min(times)) * 1000)
+
+    completed = [marker for marker in sent_at if (marker, sender) in deliveries]
+    elapsed = (max(deliveries[(marker, sender)] for marker in completed) - min(sent_at.values())) if completed else 0.0
+
+    return {
+        'workload': name,
+        'params': params,
+        'prompts_sent': len(sent_at),
+        'prompts_answered': len(completed),
+        'deliveries': len(deliveries),
+        'end_to_end_ms': summarize(end_to_end),
+        'fanout_ms': summarize(fanout),
+        'throughput_msgs_per_s': len(completed) / elapsed if elapsed > 0 else None,
+        'stages_ms': {stage: summarize(values)
+                      for stage, values in sorted(read_stage_durations(os.path.join(workdir, 'traces.jsonl')).items())},
+        'api_calls': stub.count_calls(),
+        'bot_log': log_path,
+    }
+
+
+def collect_deliveries(stub: TelegramApiStub) -> Dict[Tuple[str, int], float]:
+    """Première livraison de chaque marqueur, par chat : {(marqueur, chat_id): horodatage}"""
+    deliveries: Dict[Tuple[str, int], float] = {}
+    for call in stub.calls_for('sendMessage', 'editMessageText', 'sendDocument'):
+        for marker in MARKER_PATTERN.findall(call.content):
+            deliveries.setdefault((marker, call.chat_id), call.received_at)
+    return deliveries
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def format_ms(value: Optional[float]) -> str:
+    return f"{value:.0f}" if value is not None else '-'
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    e2e = result['end_to_end_ms']
+    throughput = result['throughput_msgs_per_s']
+    rate = f" (débit: {throughput:.2f} msg/s)" if throughput else ''
+    print(f"  Réponses: {result['prompts_answered']}/{result['prompts_sent']}{rate}")
+    print(f"  Bout en bout (ms): p50={format_ms(e2e['p50'])} p95={format_ms(e2e['p95'])} p99={format_ms(e2e['p99'])}")
+    if result['fanout_ms']['count']:
+        fanout = result['fanout_ms']
+        print(f"  Diffusion (ms):    p50={format_ms(fanout['p50'])} p95={format_ms(fanout['p95'])} p99={format_ms(fanout['p99'])}")
+    for stage, summary in result['stages_ms'].items():
+        print(f"  - {stage:<22} n={summary['count']:<5} p50={format_ms(summary['p50'])} "
+              f"p95={format_ms(summary['p95'])} p99={format_ms(summary['p99'])}")
+
+
+def main(argv: Optional[List[str]] = None):
+    """Fonction principale (argv : arguments, ceux de la ligne de commande par défaut)"""
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout du bot (API et GUI simulées)")
+    parser.add_argument('workloads', nargs='*', default=list(WORKLOADS),
+                        help=f"Charges à exécuter (défaut: toutes): {', '.join(WORKLOADS)}")
+    parser.add_argument('--count', type=int, help="Nombre de prompts")
+    parser.add_argument('--interval', type=float, help="Secondes entre deux prompts")
+    parser.add_argument('--prompt-chars', type=int, help="Taille des prompts")
+    parser.add_argument('--recipients', type=int, help="Nombre d'utilisateurs autorisés (destinataires)")
+    parser.add_argument('--response-chars', type=int, help="Taille minimale des réponses simulées")
+    parser.add_argument('--response-delay', type=float, default=0.2, help="Délai de la réponse simulée")
+    parser.add_argument('--action-delay', type=float, default=0.0, help="ACTION_DELAY du bot")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Attente max par charge (secondes)")
+    parser.add_argument('--output-dir', default='bench_results')
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.workloads if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"Charge inconnue: {', '.join(unknown)}")
+
+    revision = git_revision()
+    timestamp = time.strftime('%Y%m%d-%H%M%S')
+    os.makedirs(args.output_dir, exist_ok=True)
+    results = []
+
+    for name in args.workloads:
+        params = dict(WORKLOADS[name])
+        for key in ('count', 'interval', 'prompt_chars', 'recipients', 'response_chars'):
+            if getattr(args, key) is not None:
+                params[key] = getattr(args, key)
+        params.update(response_delay=args.response_delay, action_delay=args.action_delay, timeout=args.timeout)
+
+        try:
+            result = run_workload(name, params)
+        except Exception as e:
+            print(f"  ✗ Échec: {str(e)}")
+            result = {'workload': name, 'params': params, 'error': str(e)}
+        else:
+            print_result(result)
+
+        result.update(revision=revision, timestamp=timestamp)
+        results.append(result)
+
+    output_path = os.path.join(args.output_dir, f"bench-{timestamp}-{revision or 'local'}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nRésultats: {output_path}")
+
+    return 1 if any('error' in result or result['prompts_answered'] < result['prompts_sent'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
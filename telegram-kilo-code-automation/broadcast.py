@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diffusion Telegram vers les utilisateurs autorisés
+Envoie en parallèle à tous les destinataires en respectant les limites de
+débit de Telegram (seau à jetons global et par chat, RetryAfter)
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Seau à jetons asynchrone : rate jetons/seconde, rafale de capacity jetons"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Attend qu'un jeton soit disponible puis le consomme"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class BroadcastResult:
+    """Résultat agrégé d'une diffusion, par destinataire"""
+
+    def __init__(self):
+        self.results: Dict[int, Any] = {}
+        self.errors: Dict[int, Exception] = {}
+
+    @property
+    def success_count(self) -> int:
+        return len(self.results)
+
+    @property
+    def failure_count(self) -> int:
+        return len(self.errors)
+
+
+def _retry_after_seconds(error: "RetryAfter") -> float:
+    """Délai demandé par Telegram (int ou timedelta selon la version)"""
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class TelegramBroadcaster:
+    """
+    Envoi limité en débit vers un ou plusieurs chats
+
+    Chaque appel consomme un jeton du seau global et un jeton du seau du chat.
+    Un RetryAfter bloque uniquement le chat concerné pendant le délai demandé,
+    puis l'appel est retenté.
+    """
+
+    def __init__(self, bot: Any, global_rate: float = 30.0, chat_rate: float = 1.0,
+                 chat_burst: float = 3.0, max_retries: int = 3):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._blocked_until: Dict[int, float] = {}
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def call(self, chat_id: int, method: Callable[..., Awaitable[Any]], **kwargs) -> Any:
+        """
+        Appelle une méthode du bot pour un chat en respectant les limites
+
+        Args:
+            chat_id: Chat destinataire (passé à la méthode)
+            method: Méthode du bot (send_message, edit_message_text...)
+
+        Raises:
+            L'erreur Telegram si l'appel échoue définitivement
+        """
+        from telegram.error import RetryAfter  # import différé : démarrage plus rapide
+
+        for attempt in range(self.max_retries + 1):
+            delay = self._blocked_until.get(chat_id, 0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            await self._chat_bucket(chat_id).acquire()
+            await self._global_bucket.acquire()
+
+            try:
+                return await method(chat_id=chat_id, **kwargs)
+            except RetryAfter as e:
+                retry_after = _retry_after_seconds(e)
+                self._blocked_until[chat_id] = time.monotonic() + retry_after
+                logger.warning(f"Limite Telegram atteinte pour {chat_id}, nouvel essai dans {retry_after:.1f}s")
+                if attempt == self.max_retries:
+                    raise
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> Any:
+        """Envoie un message à un chat"""
+        return await self.call(chat_id, self.bot.send_message, text=text, **kwargs)
+
+    async def broadcast(self, chat_ids: Iterable[int],
+                        method: Optional[Callable[..., Awaitable[Any]]] = None, **kwargs) -> BroadcastResult:
+        """
+        Envoie le même contenu à tous les chats en parallèle
+
+        Args:
+            chat_ids: Chats destinataires
+            method: Méthode du bot (send_message par défaut)
+            **kwargs: Arguments de la méthode (text, parse_mode...)
+
+        Returns:
+            Le résultat agrégé (message envoyé ou erreur, par chat)
+        """
+        method = method or self.bot.send_message
+        chat_ids = list(chat_ids)
+        result = BroadcastResult()
+
+        outcomes = await asyncio.gather(
+            *(self.call(chat_id, method, **kwargs) for chat_id in chat_ids),
+            return_exceptions=True
+        )
+
+        for chat_id, outcome in zip(chat_ids, outcomes):
+            if isinstance(outcome, Exception):
+                result.errors[chat_id] = outcome
+            else:
+                result.results[chat_id] = outcome
+
+        return result
+
+    async def broadcast_batch(self, chat_ids: Iterable[int], batch: List[Dict[str, Any]],
+                              method: Optional[Callable[..., Awaitable[Any]]] = None) -> BroadcastResult:
+        """
+        Envoie une suite ordonnée de messages à chaque chat
+
+        Les messages d'un même chat partent dans l'ordre, les chats en parallèle.
+
+        Args:
+            chat_ids: Chats destinataires
+            batch: Arguments de chaque appel, dans l'ordre d'envoi
+            method: Méthode du bot (send_message par défaut)
+
+        Returns:
+            Le résultat agrégé (liste des messages envoyés ou erreur, par chat)
+        """
+        method = method or self.bot.send_message
+        chat_ids = list(chat_ids)
+        result = BroadcastResult()
+
+        async def send_all(chat_id: int) -> List[Any]:
+            return [await self.call(chat_id, method, **kwargs) for kwargs in batch]
+
+        outcomes = await asyncio.gather(*(send_all(chat_id) for chat_id in chat_ids), return_exceptions=True)
+
+        for chat_id, outcome in zip(chat_ids, outcomes):
+            if isinstance(outcome, Exception):
+                result.errors[chat_id] = outcome
+            else:
+                result.results[chat_id] = outcome
+
+        return result
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Point d'entrée unique en ligne de commande
+Chaque sous-commande n'importe que ce dont elle a besoin :
+
+    python cli.py run                  # bot Telegram
+    python cli.py diagnose             # diagnostic du monitoring IA
+    python cli.py calibrate [--save]   # calibrage automatique des coordonnées
+    python cli.py bench [charges...]   # benchmark (API et GUI simulées)
+    python cli.py supervise            # bot sous auto_restart.py
+
+--timings affiche le temps de démarrage à froid (imports, puis total)
+"""
+
+import time
+
+# Référence de la mesure, avant tout autre import
+CLI_STARTED_AT = time.perf_counter()
+
+import argparse
+import importlib
+import sys
+from typing import Any, List, Optional, Tuple
+
+
+class StartupTimings:
+    """Durées des étapes de démarrage"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.steps: List[Tuple[str, float]] = []
+
+    def import_module(self, name: str) -> Any:
+        """Importe un module en mesurant la durée de l'import"""
+        started_at = time.perf_counter()
+        module = importlib.import_module(name)
+        self.steps.append((f"import {name}", time.perf_counter() - started_at))
+        return module
+
+    def report(self) -> None:
+        """Affiche les durées sur stderr (avant le lancement de la sous-commande)"""
+        if not self.enabled:
+            return
+
+        print("⏱️ Démarrage à froid:", file=sys.stderr)
+        for step, duration in self.steps:
+            print(f"  - {step:<36} {duration * 1000:8.1f} ms", file=sys.stderr)
+        total = time.perf_counter() - CLI_STARTED_AT
+        print(f"  - {'total depuis cli.py':<36} {total * 1000:8.1f} ms", file=sys.stderr)
+        # Temps CPU du processus, interpréteur Python compris
+        print(f"  - {'CPU du processus':<36} {time.process_time() * 1000:8.1f} ms", file=sys.stderr)
+
+
+def command_run(args: argparse.Namespace, timings: StartupTimings) -> int:
+    bot = timings.import_module('telegram_kilo_automation')
+    timings.report()
+    bot.main()
+    return 0
+
+
+def command_diagnose(args: argparse.Namespace, timings: StartupTimings) -> int:
+    diagnostic = timings.import_module('diagnostic_monitoring')
+    timings.report()
+    diagnostic.main()
+    return 0
+
+
+def command_calibrate(args: argparse.Namespace, timings: StartupTimings) -> int:
+    bot = timings.import_module('telegram_kilo_automation')
+    timings.report()
+
+    if bot.TARGETS_ERROR:
+        print(f"Cibles VSCode invalides: {bot.TARGETS_ERROR}", file=sys.stderr)
+        return 2
+
+    target = bot.targets.get(args.target) if args.target else bot.targets.default
+    if target is None:
+        print(f"Cible inconnue: {args.target} ({', '.join(bot.targets.names())})", file=sys.stderr)
+        return 2
+
+    calibrated, report = bot.run_auto_calibration(target, save_templates=args.save)
+    print(report, file=sys.stdout if calibrated else sys.stderr)
+    return 0 if calibrated else 1
+
+
+def command_bench(args: argparse.Namespace, timings: StartupTimings) -> int:
+    benchmark = timings.import_module('benchmark')
+    timings.report()
+    return benchmark.main(args.bench_args)
+
+
+def command_supervise(args: argparse.Namespace, timings: StartupTimings) -> int:
+    auto_restart = timings.import_module('auto_restart')
+    timings.report()
+    auto_restart.main()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Bot Telegram <-> Kilo Code VSCode")
+    parser.add_argument('--timings', action='store_true', help="Afficher le temps de démarrage à froid")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('run', help="Lancer le bot").set_defaults(handler=command_run)
+    subparsers.add_parser('diagnose', help="Diagnostic du monitoring IA").set_defaults(handler=command_diagnose)
+
+    calibrate = subparsers.add_parser('calibrate', help="Calibrage automatique des coordonnées")
+    calibrate.add_argument('--save', action='store_true',
+                           help="Capturer d'abord les modèles autour des coordonnées actuelles")
+    calibrate.add_argument('--target', help="Cible VSCode (défaut: première cible)")
+    calibrate.set_defaults(handler=command_calibrate)
+
+    # Arguments (--help compris) transmis tels quels à benchmark.py, voir main()
+    subparsers.add_parser(
+        'bench', help="Benchmark de bout en bout (arguments de benchmark.py)", add_help=False
+    ).set_defaults(handler=command_bench)
+
+    subparsers.add_parser('supervise', help="Lancer le bot sous auto_restart.py").set_defaults(handler=command_supervise)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Fonction principale"""
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == 'bench':
+        args.bench_args = extra
+    elif extra:
+        parser.error(f"arguments non reconnus: {' '.join(extra)}")
+    return args.handler(args, StartupTimings(enabled=args.timings))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
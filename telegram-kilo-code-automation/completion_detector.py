@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Détection de la fin d'une réponse IA
+Tant que Kilo Code génère, les captures successives diffèrent : la réponse
+partielle est gardée en mémoire et n'est transmise qu'une fois stable (N
+captures identiques ou délai sans changement), ou quand l'indice visuel de
+génération (bouton « stop ») disparaît
+"""
+
+import logging
+import os
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from auto_locator import match_template
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]
+
+
+class GenerationCue:
+    """
+    Indice visuel « génération en cours » : un modèle (bouton stop) recherché
+    dans une petite région de l'écran
+    """
+
+    def __init__(self, template: Any, region: Region, grab: Callable[[Region], Any],
+                 threshold: float = 0.9):
+        """
+        Args:
+            template: Modèle en niveaux de gris (image Pillow)
+            region: Région (left, top, width, height) où le bouton apparaît
+            grab: Fonction de capture d'une région
+            threshold: Score minimal pour considérer le bouton visible
+        """
+        self.template = template
+        self.region = region
+        self.grab = grab
+        self.threshold = threshold
+
+    @classmethod
+    def load(cls, template_path: str, region: Region, grab: Callable[[Region], Any],
+             threshold: float = 0.9) -> Optional["GenerationCue"]:
+        """Indice chargé depuis un fichier modèle, ou None s'il est absent ou illisible"""
+        if not os.path.exists(template_path):
+            return None
+
+        try:
+            from PIL import Image
+
+            with Image.open(template_path) as template:
+                return cls(template.convert('L'), region, grab, threshold)
+        except Exception as e:
+            logger.error(f"Modèle {template_path} illisible: {str(e)}")
+            return None
+
+    def is_generating(self) -> Optional[bool]:
+        """
+        Returns:
+            True si le bouton est visible, False sinon, None si la capture a échoué
+        """
+        try:
+            match = match_template(self.grab(self.region).convert('L'), self.template)
+        except Exception as e:
+            logger.warning(f"Capture de l'indice de génération impossible: {str(e)}")
+            return None
+
+        return match is not None and match[2] >= self.threshold
+
+
+class ResponseCompletionDetector:
+    """
+    Retient une réponse tant qu'elle n'est pas terminée
+
+    Une réponse est terminée quand elle est restée identique sur
+    stable_samples captures consécutives ou pendant quiet_period secondes.
+    Une capture identique n'est comptée que sample_interval secondes au moins
+    après la précédente : des captures rapprochées (réveils successifs) ne
+    suffisent pas à déclarer la réponse stable.
+    Avec un indice visuel, elle est retenue tant que le bouton stop est
+    visible (au plus max_wait secondes) et transmise dès qu'il disparaît ;
+    un bouton jamais vu (modèle ou région incorrects) laisse la décision aux
+    critères de stabilité.
+    """
+
+    def __init__(self, stable_samples: int = 3, quiet_period: float = 4.0,
+                 max_wait: float = 120.0, cue: Optional[GenerationCue] = None,
+                 sample_interval: float = 0.0):
+        """
+        Args:
+            stable_samples: Captures identiques consécutives requises (0 : critère désactivé)
+            quiet_period: Délai sans changement requis, en secondes (0 : critère désactivé)
+            max_wait: Rétention maximale tant que l'indice visuel indique une génération
+            cue: Indice visuel de génération (optionnel)
+            sample_interval: Délai minimal entre deux captures identiques comptées
+        """
+        self.stable_samples = stable_samples
+        self.quiet_period = quiet_period
+        self.max_wait = max_wait
+        self.cue = cue
+        self.sample_interval = sample_interval
+        self.reset()
+
+    @property
+    def pending(self) -> Optional[str]:
+        """Réponse partielle retenue (None si aucune)"""
+        return self._pending
+
+    @property
+    def stable_count(self) -> int:
+        """Nombre de captures identiques consécutives de la réponse retenue"""
+        return self._stable_count
+
+    def reset(self) -> None:
+        """Abandonne la réponse retenue"""
+        self._pending: Optional[str] = None
+        self._stable_count = 0
+        self._first_seen_at = 0.0
+        self._changed_at = 0.0
+        self._counted_at = 0.0
+        self._cue_seen = False
+
+    def observe(self, text: str) -> bool:
+        """
+        Enregistre une capture contenant du texte nouveau
+
+        Returns:
+            True si la réponse est terminée (elle n'est alors plus retenue),
+            False si elle doit encore attendre
+        """
+        now = time.monotonic()
+        if text != self._pending:
+            if self._pending is None:
+                self._first_seen_at = now
+            self._pending = text
+            self._stable_count = 1
+            self._changed_at = now
+            self._counted_at = now
+        elif now - self._counted_at >= self.sample_interval:
+            self._stable_count += 1
+            self._counted_at = now
+
+        if self._is_complete(now):
+            self.reset()
+            return True
+        return False
+
+    def _is_complete(self, now: float) -> bool:
+        if self.cue is not None:
+            generating = self.cue.is_generating()
+            if generating:
+                self._cue_seen = True
+                if now - self._first_seen_at < self.max_wait:
+                    return False
+                logger.warning(f"Indice de génération visible depuis plus de {self.max_wait:.0f}s, réponse transmise")
+                return True
+            if generating is False and self._cue_seen:
+                return True
+
+        if self.stable_samples <= 0 and self.quiet_period <= 0:
+            return True
+        if self.stable_samples > 0 and self._stable_count >= self.stable_samples:
+            return True
+        return self.quiet_period > 0 and now - self._changed_at >= self.quiet_period
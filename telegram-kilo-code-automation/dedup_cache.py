@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de déduplication des messages entrants
+Clés à durée de vie limitée (TTL) et en nombre borné (éviction FIFO, les plus
+anciennes d'abord) : la mémoire reste constante quelle que soit la durée de
+fonctionnement du bot
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+def content_fingerprint(chat_id: int, text: str) -> str:
+    """
+    Empreinte du contenu d'un message, par chat
+
+    Le texte est normalisé (casse, espaces) pour que « Bonjour  Kilo » et
+    « bonjour kilo » soient considérés comme identiques.
+    """
+    normalized = ' '.join(text.casefold().split())
+    digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+    return f"{chat_id}:{digest}"
+
+
+class DedupCache:
+    """
+    Ensemble de clés récentes, borné en taille et en durée
+
+    Toutes les clés ont la même durée de vie : l'ordre d'insertion est aussi
+    l'ordre d'expiration, et l'éviction se fait en O(1) amorti par la tête.
+    Un doublon ne rafraîchit pas sa clé (pas de LRU) : au-delà de max_size,
+    la clé la plus anciennement insérée est évincée, même si elle vient
+    d'être revue.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_size: Nombre maximum de clés conservées
+            ttl: Durée de vie d'une clé (secondes)
+            clock: Horloge monotone (injectable)
+        """
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.duplicates = 0
+
+    def add(self, key: Hashable) -> bool:
+        """
+        Enregistre une clé
+
+        Returns:
+            True si la clé est nouvelle, False si elle a déjà été vue dans le TTL
+            (le doublon ne prolonge pas la fenêtre)
+        """
+        now = self.clock()
+        self._evict(now)
+
+        if key in self._entries:
+            self.duplicates += 1
+            return False
+
+        self._entries[key] = now + self.ttl
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires_at = self._entries.get(key)
+        return expires_at is not None and expires_at > self.clock()
+
+    def __len__(self) -> int:
+        self._evict(self.clock())
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _evict(self, now: float) -> None:
+        """Supprime les clés expirées (en tête de file)"""
+        entries = self._entries
+        while entries:
+            key, expires_at = next(iter(entries.items()))
+            if expires_at > now:
+                break
+            del entries[key]
@@ -9,9 +9,8 @@ import os
 import sys
 import time
 import json
-import pyautogui
-import pyperclip
 from dotenv import load_dotenv
+from gui_driver import create_gui_driver
 
 # Charger la configuration
 load_dotenv()
@@ -20,6 +19,16 @@ load_dotenv()
 KILO_CODE_RESPONSE_X = int(os.getenv('KILO_CODE_RESPONSE_X', 600))
 KILO_CODE_RESPONSE_Y = int(os.getenv('KILO_CODE_RESPONSE_Y', 700))
 KILO_CODE_COPY_SHORTCUT = os.getenv('KILO_CODE_COPY_SHORTCUT', 'ctrl+a,ctrl+c')
+GUI_DRIVER = os.getenv('GUI_DRIVER', 'pyautogui').lower()
+
+# Pilote GUI partagé avec le bot (fake : bureau simulé, sans écran)
+gui = create_gui_driver(
+    GUI_DRIVER,
+    input_pos=(int(os.getenv('KILO_CODE_INPUT_X', 500)), int(os.getenv('KILO_CODE_INPUT_Y', 800))),
+    send_button_pos=(int(os.getenv('KILO_CODE_SEND_BUTTON_X', 850)), int(os.getenv('KILO_CODE_SEND_BUTTON_Y', 800))),
+    response_pos=(KILO_CODE_RESPONSE_X, KILO_CODE_RESPONSE_Y),
+    send_shortcut=os.getenv('KILO_CODE_SEND_SHORTCUT', 'ctrl+enter')
+)
 
 def diagnostic_coordonnees():
     """Diagnostique les coordonnées de la zone de réponse IA"""
@@ -42,7 +51,7 @@ def diagnostic_coordonnees():
         time.sleep(1)
 
     try:
-        x, y = pyautogui.position()
+        x, y = gui.position()
         print(f"Coordonnées capturées : X={x}, Y={y}")
 
         print("\nMettez à jour votre .env avec :")
@@ -69,7 +78,7 @@ def test_extraction_texte(x=None, y=None):
     print("Assurez-vous que VSCode est actif et visible...")
     try:
         # Cliquer sur la zone
-        pyautogui.click(x, y)
+        gui.click(x, y)
         time.sleep(1)
 
         # Essayer de copier le texte
@@ -77,13 +86,13 @@ def test_extraction_texte(x=None, y=None):
         for key_combo in keys:
             key_combo = key_combo.strip()
             if '+' in key_combo:
-                pyautogui.hotkey(*key_combo.split('+'))
+                gui.hotkey(*key_combo.split('+'))
             else:
-                pyautogui.press(key_combo)
+                gui.press(key_combo)
             time.sleep(0.5)
 
         # Récupérer le texte du presse-papiers
-        texte_extrait = pyperclip.paste().strip()
+        texte_extrait = gui.get_clipboard().strip()
 
         if texte_extrait:
             print(f"Texte extrait avec succès ({len(texte_extrait)} caractères) :")
@@ -0,0 +1,624 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pilotes d'interface graphique
+Regroupe derrière une même interface les actions souris/clavier, le
+presse-papiers et la détection de fenêtre : pyautogui (défaut), pynput, xdotool
+(un display X11 par pilote), ou un faux bureau en mémoire pour exécuter le
+pipeline sans écran (CI, benchmarks)
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Point = Tuple[int, int]
+Region = Tuple[int, int, int, int]
+
+
+class GuiDriver:
+    """
+    Interface commune des pilotes GUI
+
+    window_backend expose getWindowsWithTitle/getActiveWindow (type pygetwindow),
+    ou None si la détection de fenêtre n'est pas disponible. grab capture une
+    région d'écran (None : capture Pillow par défaut).
+    """
+
+    name = 'base'
+    window_backend: Any = None
+    grab: Optional[Callable[[Region], Any]] = None
+
+    def configure(self) -> None:
+        """Réglages globaux appliqués au démarrage du bot"""
+
+    def click(self, x: int, y: int) -> None:
+        raise NotImplementedError
+
+    def hotkey(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def press(self, key: str) -> None:
+        raise NotImplementedError
+
+    def write(self, text: str, interval: float = 0.0) -> None:
+        raise NotImplementedError
+
+    def position(self) -> Point:
+        raise NotImplementedError
+
+    def get_clipboard(self) -> str:
+        raise NotImplementedError
+
+    def set_clipboard(self, text: str) -> None:
+        raise NotImplementedError
+
+    def screen_size(self) -> Tuple[int, int]:
+        """Résolution de l'écran (capture Pillow complète par défaut)"""
+        from PIL import ImageGrab
+
+        return ImageGrab.grab().size
+
+
+def _load_window_backend() -> Any:
+    """pygetwindow si disponible, sinon None"""
+    try:
+        import pygetwindow
+        return pygetwindow
+    except Exception:
+        logger.warning("pygetwindow non disponible. La détection de fenêtre sera limitée.")
+        return None
+
+
+class PyAutoGuiDriver(GuiDriver):
+    """
+    Pilote historique : pyautogui + pyperclip + pygetwindow
+
+    Les modules sont importés au premier usage : créer le pilote ne coûte
+    rien et n'exige pas d'écran.
+    """
+
+    name = 'pyautogui'
+
+    @cached_property
+    def _pyautogui(self) -> Any:
+        import pyautogui
+        return pyautogui
+
+    @cached_property
+    def _pyperclip(self) -> Any:
+        import pyperclip
+        return pyperclip
+
+    @cached_property
+    def window_backend(self) -> Any:
+        return _load_window_backend()
+
+    def configure(self) -> None:
+        self._pyautogui.FAILSAFE = True  # Déplacer la souris dans le coin pour arrêter
+        self._pyautogui.PAUSE = 0.1
+
+    def click(self, x: int, y: int) -> None:
+        self._pyautogui.click(x, y)
+
+    def hotkey(self, *keys: str) -> None:
+        self._pyautogui.hotkey(*keys)
+
+    def press(self, key: str) -> None:
+        self._pyautogui.press(key)
+
+    def write(self, text: str, interval: float = 0.0) -> None:
+        self._pyautogui.write(text, interval=interval)
+
+    def position(self) -> Point:
+        x, y = self._pyautogui.position()
+        return (x, y)
+
+    def get_clipboard(self) -> str:
+        return self._pyperclip.paste()
+
+    def set_clipboard(self, text: str) -> None:
+        self._pyperclip.copy(text)
+
+    def screen_size(self) -> Tuple[int, int]:
+        width, height = self._pyautogui.size()
+        return (width, height)
+
+
+class PynputDriver(GuiDriver):
+    """Pilote pynput : événements clavier/souris natifs, texte Unicode sans collage"""
+
+    name = 'pynput'
+
+    # Noms pyautogui -> noms pynput.keyboard.Key
+    KEY_ALIASES = {
+        'command': 'cmd', 'win': 'cmd', 'super': 'cmd', 'return': 'enter',
+        'escape': 'esc', 'pageup': 'page_up', 'pagedown': 'page_down', 'del': 'delete',
+    }
+
+    # Modules importés au premier usage, comme pour PyAutoGuiDriver
+    @cached_property
+    def _pyperclip(self) -> Any:
+        import pyperclip
+        return pyperclip
+
+    @cached_property
+    def _key(self) -> Any:
+        from pynput import keyboard
+        return keyboard.Key
+
+    @cached_property
+    def _keyboard(self) -> Any:
+        from pynput import keyboard
+        return keyboard.Controller()
+
+    @cached_property
+    def _button(self) -> Any:
+        from pynput import mouse
+        return mouse.Button
+
+    @cached_property
+    def _mouse(self) -> Any:
+        from pynput import mouse
+        return mouse.Controller()
+
+    @cached_property
+    def window_backend(self) -> Any:
+        return _load_window_backend()
+
+    def _resolve(self, key: str) -> Any:
+        name = key.strip().lower()
+        name = self.KEY_ALIASES.get(name, name)
+        if len(name) == 1:
+            return name
+        return getattr(self._key, name)
+
+    def click(self, x: int, y: int) -> None:
+        self._mouse.position = (x, y)
+        self._mouse.click(self._button.left)
+
+    def hotkey(self, *keys: str) -> None:
+        resolved = [self._resolve(key) for key in keys]
+        for key in resolved:
+            self._keyboard.press(key)
+        for key in reversed(resolved):
+            self._keyboard.release(key)
+
+    def press(self, key: str) -> None:
+        resolved = self._resolve(key)
+        self._keyboard.press(resolved)
+        self._keyboard.release(resolved)
+
+    def write(self, text: str, interval: float = 0.0) -> None:
+        if interval <= 0:
+            self._keyboard.type(text)
+            return
+        for char in text:
+            self._keyboard.type(char)
+            time.sleep(interval)
+
+    def position(self) -> Point:
+        x, y = self._mouse.position
+        return (int(x), int(y))
+
+    def get_clipboard(self) -> str:
+        return self._pyperclip.paste()
+
+    def set_clipboard(self, text: str) -> None:
+        self._pyperclip.copy(text)
+
+    @cached_property
+    def _screen_size(self) -> Tuple[int, int]:
+        # pynput n'expose pas la résolution : une seule capture complète, au premier appel
+        return super().screen_size()
+
+    def screen_size(self) -> Tuple[int, int]:
+        return self._screen_size
+
+
+class XdotoolWindow:
+    """Fenêtre X11 vue par xdotool (attributs pygetwindow)"""
+
+    def __init__(self, driver: "XdotoolDriver", window_id: str):
+        self.driver = driver
+        self.window_id = window_id
+        self.isMinimized = False
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, XdotoolWindow) and other.window_id == self.window_id
+
+    def __hash__(self) -> int:
+        return hash(self.window_id)
+
+    @property
+    def box(self) -> Region:
+        """Géométrie (left, top, width, height), en un seul appel à xdotool"""
+        output = self.driver.run('getwindowgeometry', '--shell', self.window_id)
+        values = {key: int(value) for key, value in (line.split('=', 1) for line in output.splitlines() if '=' in line)}
+        return (values['X'], values['Y'], values['WIDTH'], values['HEIGHT'])
+
+    @property
+    def left(self) -> int:
+        return self.box[0]
+
+    @property
+    def top(self) -> int:
+        return self.box[1]
+
+    @property
+    def width(self) -> int:
+        return self.box[2]
+
+    @property
+    def height(self) -> int:
+        return self.box[3]
+
+    @property
+    def isActive(self) -> bool:
+        return self.driver.run('getactivewindow').strip() == self.window_id
+
+    def activate(self) -> None:
+        self.driver.run('windowactivate', '--sync', self.window_id)
+
+    def restore(self) -> None:
+        self.driver.run('windowmap', '--sync', self.window_id)
+
+
+class XdotoolWindowBackend:
+    """Équivalent de pygetwindow pour un display X11, via xdotool"""
+
+    def __init__(self, driver: "XdotoolDriver"):
+        self.driver = driver
+
+    def getWindowsWithTitle(self, title: str) -> List[XdotoolWindow]:
+        try:
+            output = self.driver.run('search', '--onlyvisible', '--name', title)
+        except subprocess.CalledProcessError:
+            return []  # aucune fenêtre
+        return [XdotoolWindow(self.driver, window_id) for window_id in output.split()]
+
+    def getActiveWindow(self) -> Optional[XdotoolWindow]:
+        window_id = self.driver.run('getactivewindow').strip()
+        return XdotoolWindow(self.driver, window_id) if window_id else None
+
+
+class XdotoolDriver(GuiDriver):
+    """
+    Pilote xdotool/xclip (Linux, X11)
+
+    Chaque commande est lancée avec son propre DISPLAY : plusieurs pilotes
+    peuvent viser des displays différents depuis le même processus.
+    """
+
+    name = 'xdotool'
+
+    # Noms pyautogui -> keysyms X11
+    KEY_ALIASES = {
+        'enter': 'Return', 'return': 'Return', 'delete': 'Delete', 'del': 'Delete',
+        'backspace': 'BackSpace', 'esc': 'Escape', 'escape': 'Escape', 'tab': 'Tab',
+        'command': 'super', 'win': 'super', 'pageup': 'Prior', 'pagedown': 'Next',
+    }
+
+    def __init__(self, display: Optional[str] = None):
+        for tool in ('xdotool', 'xclip'):
+            if shutil.which(tool) is None:
+                raise RuntimeError(f"{tool} introuvable (requis par le pilote xdotool)")
+
+        self.display = display or os.environ.get('DISPLAY', ':0')
+        self._env = dict(os.environ, DISPLAY=self.display)
+        self.window_backend = XdotoolWindowBackend(self)
+        self.grab = self._grab
+
+    def run(self, *args: Any, input_text: Optional[str] = None, tool: str = 'xdotool') -> str:
+        result = subprocess.run(
+            [tool, *[str(arg) for arg in args]],
+            input=input_text, env=self._env, capture_output=True, text=True, check=True
+        )
+        return result.stdout
+
+    def _keysym(self, key: str) -> str:
+        name = key.strip().lower()
+        return self.KEY_ALIASES.get(name, name)
+
+    def click(self, x: int, y: int) -> None:
+        self.run('mousemove', '--sync', x, y, 'click', 1)
+
+    def hotkey(self, *keys: str) -> None:
+        self.run('key', '--clearmodifiers', '+'.join(self._keysym(key) for key in keys))
+
+    def press(self, key: str) -> None:
+        self.run('key', '--clearmodifiers', self._keysym(key))
+
+    def write(self, text: str, interval: float = 0.0) -> None:
+        self.run('type', '--delay', int(interval * 1000), '--', text)
+
+    def position(self) -> Point:
+        output = self.run('getmouselocation', '--shell')
+        values = dict(line.split('=', 1) for line in output.splitlines() if '=' in line)
+        return (int(values['X']), int(values['Y']))
+
+    def get_clipboard(self) -> str:
+        try:
+            return self.run('-selection', 'clipboard', '-o', tool='xclip')
+        except subprocess.CalledProcessError:
+            return ''  # presse-papiers vide
+
+    def set_clipboard(self, text: str) -> None:
+        # xclip reste en arrière-plan pour servir la sélection : ses sorties ne
+        # doivent pas être des pipes, que communicate() attendrait jusqu'à la
+        # prise du presse-papiers par une autre application
+        process = subprocess.Popen(
+            ['xclip', '-selection', 'clipboard', '-i'],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            env=self._env, text=True
+        )
+        process.communicate(input=text)
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
+
+    def screen_size(self) -> Tuple[int, int]:
+        width, height = self.run('getdisplaygeometry').split()
+        return (int(width), int(height))
+
+    def _grab(self, region: Region) -> Any:
+        from PIL import ImageGrab
+
+        left, top, width, height = region
+        return ImageGrab.grab(bbox=(left, top, left + width, top + height), xdisplay=self.display)
+
+
+class FakeWindow:
+    """Fenêtre VSCode simulée (attributs pygetwindow)"""
+
+    def __init__(self, title: str, geometry: Region = (0, 0, 1920, 1080)):
+        self.title = title
+        self.left, self.top, self.width, self.height = geometry
+        self.isActive = True
+        self.isMinimized = False
+
+    @property
+    def box(self) -> Region:
+        return (self.left, self.top, self.width, self.height)
+
+    def activate(self) -> None:
+        self.isActive = True
+
+    def restore(self) -> None:
+        self.isMinimized = False
+
+
+class FakeWindowBackend:
+    """Équivalent en mémoire du module pygetwindow"""
+
+    def __init__(self, windows: List[FakeWindow]):
+        self.windows = windows
+
+    def getWindowsWithTitle(self, title: str) -> List[FakeWindow]:
+        return [window for window in self.windows if title in window.title]
+
+    def getActiveWindow(self) -> Optional[FakeWindow]:
+        for window in self.windows:
+            if window.isActive:
+                return window
+        return None
+
+
+class _FakeImage:
+    """Image minimale pour RegionChangeDetector (convert/reduce/tobytes)"""
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def convert(self, mode: str) -> "_FakeImage":
+        return self
+
+    def reduce(self, factor: int) -> "_FakeImage":
+        return self
+
+    def tobytes(self) -> bytes:
+        return self._data
+
+
+def default_responder(prompt: str, min_chars: int = 0) -> str:
+    """Réponse simulée : accusé de réception du prompt, complété jusqu'à min_chars"""
+    response = f"Réponse simulée à : {prompt}"
+    line = "\nLorem ipsum dolor sit amet, consectetur adipiscing elit."
+    while len(response) < min_chars:
+        response += line
+    return response
+
+
+class FakeGuiDriver(GuiDriver):
+    """
+    Bureau simulé : champ de saisie, panneau de réponse et presse-papiers
+
+    Les coordonnées reprennent celles de la configuration. L'envoi d'un prompt
+    (raccourci ou bouton) ajoute, après response_delay, la réponse du responder
+    au panneau, que la capture (clic, ctrl+a, ctrl+c) recopie ensuite.
+    """
+
+    name = 'fake'
+
+    def __init__(self, input_pos: Point, send_button_pos: Point, response_pos: Point,
+                 send_shortcut: str = 'ctrl+enter', action_latency: float = 0.0,
+                 type_latency: float = 0.0, response_delay: float = 0.0,
+                 response_chars: int = 0, responder: Optional[Callable[[str], str]] = None,
+                 window_title: str = 'Visual Studio Code'):
+        """
+        Args:
+            input_pos / send_button_pos / response_pos: Zones cliquables
+            send_shortcut: Raccourci d'envoi reconnu ('none' : bouton seul)
+            action_latency: Durée simulée de chaque clic ou raccourci (secondes)
+            type_latency: Durée simulée par caractère tapé
+            response_delay: Délai avant l'apparition de la réponse
+            response_chars: Taille minimale de la réponse par défaut
+            responder: Génère la réponse à partir du prompt envoyé
+        """
+        self.input_pos = input_pos
+        self.send_button_pos = send_button_pos
+        self.response_pos = response_pos
+        self.send_keys = tuple(key.strip().lower() for key in send_shortcut.split('+')) \
+            if send_shortcut and send_shortcut.lower() != 'none' else None
+        self.action_latency = action_latency
+        self.type_latency = type_latency
+        self.response_delay = response_delay
+        self.responder = responder or (lambda prompt: default_responder(prompt, response_chars))
+
+        self.window_backend = FakeWindowBackend([FakeWindow(window_title)])
+        self.grab = self._grab
+
+        self.input_text = ''
+        self.response_panel = ''
+        self.clipboard = ''
+        self.submitted: List[str] = []
+        self._focus: Optional[str] = None
+        self._selected = False
+        self._mouse: Point = (0, 0)
+        self._lock = threading.Lock()
+
+    def _sleep(self, duration: float) -> None:
+        if duration > 0:
+            time.sleep(duration)
+
+    def click(self, x: int, y: int) -> None:
+        self._sleep(self.action_latency)
+        with self._lock:
+            self._mouse = (x, y)
+            self._selected = False
+            if (x, y) == self.input_pos:
+                self._focus = 'input'
+            elif (x, y) == self.response_pos:
+                self._focus = 'response'
+            elif (x, y) == self.send_button_pos:
+                self._submit()
+            else:
+                self._focus = None
+
+    def hotkey(self, *keys: str) -> None:
+        self._sleep(self.action_latency)
+        combo = tuple(key.strip().lower() for key in keys)
+        modifier, key = (combo[0], combo[-1]) if len(combo) > 1 else (None, combo[0])
+
+        with self._lock:
+            if combo == self.send_keys:
+                self._submit()
+            elif modifier in ('ctrl', 'command') and key == 'a':
+                self._selected = True
+            elif modifier in ('ctrl', 'command') and key == 'c':
+                if self._selected:
+                    self.clipboard = self.response_panel if self._focus == 'response' else self.input_text
+            elif modifier in ('ctrl', 'command') and key == 'v':
+                self._insert(self.clipboard)
+
+    def press(self, key: str) -> None:
+        if '+' not in key and (key.strip().lower(),) == self.send_keys:
+            self.hotkey(key)
+            return
+
+        self._sleep(self.action_latency)
+        with self._lock:
+            if key.strip().lower() in ('delete', 'backspace') and self._focus == 'input':
+                self.input_text = '' if self._selected else self.input_text[:-1]
+                self._selected = False
+
+    def write(self, text: str, interval: float = 0.0) -> None:
+        self._sleep(len(text) * max(interval, self.type_latency))
+        with self._lock:
+            self._insert(text)
+
+    def position(self) -> Point:
+        return self._mouse
+
+    def get_clipboard(self) -> str:
+        with self._lock:
+            return self.clipboard
+
+    def set_clipboard(self, text: str) -> None:
+        with self._lock:
+            self.clipboard = text
+
+    def screen_size(self) -> Tuple[int, int]:
+        return (1920, 1080)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'submitted': len(self.submitted), 'panel_chars': len(self.response_panel)}
+
+    def _insert(self, text: str) -> None:
+        if self._focus != 'input':
+            return
+        self.input_text = text if self._selected else self.input_text + text
+        self._selected = False
+
+    def _submit(self) -> None:
+        prompt = self.input_text
+        self.input_text = ''
+        self._selected = False
+        if not prompt:
+            return
+
+        self.submitted.append(prompt)
+        response = self.responder(prompt)
+        if self.response_delay > 0:
+            timer = threading.Timer(self.response_delay, self._deliver, args=(response,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._append_response(response)
+
+    def _deliver(self, response: str) -> None:
+        with self._lock:
+            self._append_response(response)
+
+    def _append_response(self, response: str) -> None:
+        self.response_panel += ('\n\n' if self.response_panel else '') + response
+
+    def _grab(self, region: Region) -> _FakeImage:
+        with self._lock:
+            panel = self.response_panel
+        return _FakeImage(hashlib.blake2b(panel.encode('utf-8'), digest_size=16).digest())
+
+
+GUI_DRIVERS = {
+    'pyautogui': PyAutoGuiDriver,
+    'pynput': PynputDriver,
+    'xdotool': XdotoolDriver,
+    'fake': FakeGuiDriver,
+}
+
+
+def create_gui_driver(name: str, display: Optional[str] = None, **options: Any) -> GuiDriver:
+    """
+    Instancie le pilote GUI configuré
+
+    Args:
+        name: 'pyautogui', 'pynput', 'xdotool' ou 'fake'
+        display: Display X11 visé (xdotool ; les autres pilotes utilisent celui du processus)
+        options: Paramètres de FakeGuiDriver (ignorés par les pilotes réels)
+
+    Raises:
+        ValueError: si le pilote est inconnu, ou ne peut pas viser ce display
+    """
+    driver_class = GUI_DRIVERS.get(name.lower())
+    if driver_class is None:
+        raise ValueError(f"Pilote GUI inconnu: {name} (valeurs possibles: {', '.join(GUI_DRIVERS)})")
+
+    if driver_class is FakeGuiDriver:
+        driver = driver_class(**options)
+    elif driver_class is XdotoolDriver:
+        driver = driver_class(display)
+    else:
+        if display and display != os.environ.get('DISPLAY'):
+            raise ValueError(f"Le pilote {name} ne peut viser que le display du processus (utilisez xdotool pour {display})")
+        driver = driver_class()
+
+    logger.info(f"Pilote GUI: {driver.name}" + (f" (display {display})" if display else ''))
+    return driver
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Battement de cœur vers le superviseur (auto_restart.py)
+Le bot écrit périodiquement dans un pipe hérité du superviseur, uniquement si
+ses sondes sont saines : un bot bloqué (boucle asyncio figée, action GUI sans
+fin) cesse de battre et le superviseur le redémarre
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Descripteur du pipe transmis par le superviseur
+HEARTBEAT_FD_ENV = 'KILO_HEARTBEAT_FD'
+
+
+class HeartbeatEmitter:
+    """
+    Thread d'émission des battements
+
+    Chaque sonde est une fonction sans argument qui retourne True si le
+    composant surveillé progresse ; une seule sonde en échec suspend les
+    battements.
+    """
+
+    def __init__(self, fd: int, interval: float = 5.0):
+        """
+        Args:
+            fd: Descripteur d'écriture du pipe
+            interval: Intervalle entre deux battements (secondes)
+        """
+        self.fd = fd
+        self.interval = interval
+        self._checks: Dict[str, Callable[[], bool]] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._unhealthy: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, interval: float = 5.0) -> Optional["HeartbeatEmitter"]:
+        """Émetteur sur le pipe du superviseur, ou None si le bot n'est pas supervisé"""
+        fd = os.getenv(HEARTBEAT_FD_ENV)
+        if not fd:
+            return None
+        return cls(int(fd), interval)
+
+    def add_check(self, name: str, check: Callable[[], bool]) -> None:
+        """Ajoute une sonde"""
+        self._checks[name] = check
+
+    def add_event_loop(self, loop: asyncio.AbstractEventLoop, timeout: Optional[float] = None,
+                       name: str = 'bot_loop') -> None:
+        """
+        Sonde de la boucle asyncio : un rappel planifié à chaque cycle doit
+        s'être exécuté depuis moins de timeout secondes
+        """
+        timeout = timeout or 3 * self.interval
+        last_tick = [time.monotonic()]
+
+        def tick() -> None:
+            last_tick[0] = time.monotonic()
+
+        def check() -> bool:
+            healthy = time.monotonic() - last_tick[0] < timeout
+            loop.call_soon_threadsafe(tick)
+            return healthy
+
+        self.add_check(name, check)
+
+    def start(self) -> None:
+        """Démarre le thread d'émission"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(target=self._run, name='heartbeat', daemon=True)
+        self._thread.start()
+        logger.info(f"Battement de cœur vers le superviseur (toutes les {self.interval}s)")
+
+    def stop(self) -> None:
+        """Arrête les battements"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+
+    def _failing_check(self) -> Optional[str]:
+        """Nom de la première sonde en échec, ou None"""
+        for name, check in list(self._checks.items()):
+            try:
+                if not check():
+                    return name
+            except Exception as e:
+                logger.warning(f"Erreur de la sonde '{name}': {str(e)}")
+                return name
+        return None
+
+    def _run(self) -> None:
+        """Boucle du thread d'émission"""
+        while not self._stop_event.is_set():
+            failing = self._failing_check()
+
+            if failing != self._unhealthy:
+                if failing:
+                    logger.error(f"Sonde '{failing}' bloquée : battements suspendus")
+                else:
+                    logger.info("Sondes de nouveau saines : reprise des battements")
+                self._unhealthy = failing
+
+            if failing is None:
+                try:
+                    os.write(self.fd, b'.')
+                except OSError as e:
+                    # Superviseur arrêté : plus personne n'écoute
+                    logger.warning(f"Pipe du superviseur fermé, arrêt des battements: {str(e)}")
+                    return
+
+            self._stop_event.wait(self.interval)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File de travaux persistante (SQLite)
+Les prompts à injecter et les réponses à diffuser sont enregistrés avant
+traitement : après un redémarrage, les travaux inachevés sont repris, et la clé
+d'idempotence (update_id Telegram) empêche tout double traitement
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Types de travaux
+KIND_PROMPT = 'prompt'
+KIND_RESPONSE = 'response'
+
+# États : queued -> injecting (prompt) / sending (réponse) -> done | failed
+STATUS_QUEUED = 'queued'
+STATUS_INJECTING = 'injecting'
+STATUS_SENDING = 'sending'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    chat_id INTEGER,
+    target TEXT,
+    payload TEXT NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (kind, status, id);
+"""
+
+
+class StoredJob:
+    """Travail lu depuis la base"""
+
+    def __init__(self, row: sqlite3.Row):
+        self.id = row['id']
+        self.key = row['key']
+        self.kind = row['kind']
+        self.status = row['status']
+        self.chat_id = row['chat_id']
+        self.target = row['target']
+        self.payload: Dict[str, Any] = json.loads(row['payload'])
+        self.error = row['error']
+        self.created_at = row['created_at']
+
+    def __repr__(self) -> str:
+        return f"StoredJob({self.key!r}, {self.kind}, {self.status})"
+
+
+class JobStore:
+    """
+    Table des travaux, en mode WAL
+
+    Les écritures sont regroupées : elles sont validées ensemble au plus tard
+    commit_interval secondes après la première (rafales de messages). Les
+    transitions qui précèdent ou suivent une action GUI sont validées
+    immédiatement (durable=True).
+    """
+
+    def __init__(self, path: str = 'jobs.db', commit_interval: float = 0.05):
+        """
+        Args:
+            path: Fichier SQLite
+            commit_interval: Délai maximal avant validation des écritures regroupées
+        """
+        self.path = path
+        self.commit_interval = commit_interval
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level='DEFERRED')
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # WAL + NORMAL : une validation n'attend pas fsync (seuls les checkpoints synchronisent)
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM jobs WHERE key = ?', (key,)).fetchone() is not None
+
+    def add(self, key: str, kind: str, payload: Dict[str, Any], chat_id: Optional[int] = None,
+            target: Optional[str] = None, replace: bool = False) -> bool:
+        """
+        Enregistre un travail (état queued)
+
+        Args:
+            replace: Remplacer le travail de même clé (contenu et état remis à
+                zéro) au lieu de l'ignorer
+
+        Returns:
+            True si le travail est nouveau ou remplacé, False si la clé existe déjà
+        """
+        now = time.time()
+        conflict = (
+            'ON CONFLICT (key) DO UPDATE SET status = excluded.status, chat_id = excluded.chat_id, '
+            'target = excluded.target, payload = excluded.payload, error = NULL, updated_at = excluded.updated_at'
+            if replace else 'ON CONFLICT (key) DO NOTHING'
+        )
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO jobs (key, kind, status, chat_id, target, payload, created_at, updated_at) '
+                f'VALUES (?, ?, ?, ?, ?, ?, ?, ?) {conflict}',
+                (key, kind, STATUS_QUEUED, chat_id, target, json.dumps(payload), now, now)
+            )
+            self._schedule_commit()
+            return cursor.rowcount == 1
+
+    def merge(self, keys: List[str], payload: Dict[str, Any], target: Optional[str] = None) -> str:
+        """
+        Fusionne des travaux en attente dans le premier (messages regroupés)
+
+        Returns:
+            La clé du travail conservé
+        """
+        primary, merged = keys[0], keys[1:]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE jobs SET payload = ?, target = ?, updated_at = ? WHERE key = ?',
+                (json.dumps(payload), target, now, primary)
+            )
+            self._conn.executemany(
+                'UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE key = ?',
+                [(STATUS_DONE, f"fusionné dans {primary}", now, key) for key in merged]
+            )
+            self._schedule_commit()
+        return primary
+
+    def set_status(self, key: str, status: str, error: Optional[str] = None, durable: bool = False) -> None:
+        """Change l'état d'un travail (durable : validation immédiate)"""
+        with self._lock:
+            self._conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE key = ?',
+                (status, error, time.time(), key)
+            )
+            if durable:
+                self._commit()
+            else:
+                self._schedule_commit()
+
+    def jobs(self, kind: str, statuses: Iterable[str]) -> List[StoredJob]:
+        """Travaux d'un type dans les états donnés, dans l'ordre d'enregistrement"""
+        statuses = list(statuses)
+        placeholders = ', '.join('?' * len(statuses))
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT * FROM jobs WHERE kind = ? AND status IN ({placeholders}) ORDER BY id',
+                (kind, *statuses)
+            ).fetchall()
+        return [StoredJob(row) for row in rows]
+
+    def purge(self, older_than: float) -> int:
+        """Supprime les travaux terminés depuis plus de older_than secondes"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
+                (STATUS_DONE, STATUS_FAILED, time.time() - older_than)
+            )
+            self._commit()
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Nombre de travaux par état"""
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
+
+    def flush(self) -> None:
+        """Valide immédiatement les écritures en attente"""
+        with self._lock:
+            self._commit()
+
+    def close(self) -> None:
+        """Valide les écritures et ferme la base"""
+        with self._lock:
+            self._commit()
+            self._conn.close()
+
+    def _schedule_commit(self) -> None:
+        """Planifie la validation groupée (verrou détenu)"""
+        if self.commit_interval <= 0:
+            self._commit()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.commit_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _commit(self) -> None:
+        """Valide la transaction en cours (verrou détenu)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la validation de la file de travaux: {str(e)}")
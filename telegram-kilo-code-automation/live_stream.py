@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diffusion en direct d'une réponse IA en cours de génération
+Un message par chat est posté puis édité sur place au fur et à mesure des
+captures, au lieu d'envoyer un nouveau message à chaque différence
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from broadcast import TelegramBroadcaster
+from message_chunker import split_message
+
+logger = logging.getLogger(__name__)
+
+
+class LiveStreamError(Exception):
+    """Levée lorsqu'une page du message en direct n'a pas pu être livrée"""
+
+
+class LiveResponseStream:
+    """
+    Message Telegram édité en direct pour une réponse
+
+    Les éditions sont limitées à une toutes les min_edit_interval secondes
+    (les textes intermédiaires sont simplement remplacés par le suivant).
+    Au-delà de chunk_size caractères, un nouveau message est ouvert pour la
+    suite : le nombre de messages reste celui de la réponse finale.
+
+    Seules les pages effectivement livrées sont mémorisées, par chat : une
+    page en échec est renvoyée au rendu suivant, et update()/finalize()
+    lèvent LiveStreamError pour que l'appelant retente.
+
+    Les pages intermédiaires sont envoyées en texte brut (le Markdown d'une
+    réponse tronquée est souvent invalide) ; seule la version finale est
+    mise en forme.
+    """
+
+    def __init__(self, broadcaster: TelegramBroadcaster, chat_ids: Iterable[int],
+                 chunk_size: int = 4000, min_edit_interval: float = 1.5,
+                 mark: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            mark: Appliqué à chaque page (marqueur anti-boucle)
+        """
+        self.broadcaster = broadcaster
+        self.mark = mark or (lambda page: page)
+        self.chat_ids = list(chat_ids)
+        self.chunk_size = chunk_size
+        self.min_edit_interval = min_edit_interval
+        self.finalized = False
+        self._messages: Dict[int, List[Any]] = {chat_id: [] for chat_id in self.chat_ids}
+        self._rendered: Dict[int, List[str]] = {chat_id: [] for chat_id in self.chat_ids}
+        self._last_render = 0.0
+
+    async def update(self, text: str) -> None:
+        """
+        Affiche le texte courant (ignoré si la dernière édition est trop récente)
+
+        Raises:
+            LiveStreamError: si une page n'a pas pu être livrée à un chat
+        """
+        if time.monotonic() - self._last_render < self.min_edit_interval:
+            return
+        await self._render(text, final=False)
+
+    async def finalize(self, text: str) -> None:
+        """
+        Affiche le texte définitif, en Markdown
+
+        Raises:
+            LiveStreamError: si une page n'a pas pu être livrée à un chat
+        """
+        await self._render(text, final=True)
+        self.finalized = True
+
+    def _format_pages(self, text: str, final: bool) -> List[str]:
+        return [self.mark(page) for page in self._page_texts(text, final)]
+
+    def _page_texts(self, text: str, final: bool) -> List[str]:
+        chunks = split_message(text, self.chunk_size)
+
+        # ⚠️ IMPORTANT : TOUJOURS identifier comme réponse IA pour éviter la boucle
+        if final and len(chunks) == 1:
+            return [f"🤖 **Réponse de Kilo Code:**\n\n{chunks[0]}"]
+        if final:
+            return [
+                f"🤖 **Réponse de Kilo Code ({index}/{len(chunks)}):**\n\n{chunk}"
+                for index, chunk in enumerate(chunks, 1)
+            ]
+        return [
+            f"🤖 **Réponse de Kilo Code ({index}) ⏳:**\n\n{chunk}"
+            for index, chunk in enumerate(chunks, 1)
+        ]
+
+    async def _render(self, text: str, final: bool) -> None:
+        pages = self._format_pages(text, final)
+        parse_mode = 'Markdown' if final else None
+
+        delivered = await asyncio.gather(*(
+            self._render_chat(chat_id, pages, parse_mode) for chat_id in self.chat_ids
+        ))
+        self._last_render = time.monotonic()
+
+        failed = [chat_id for chat_id, ok in zip(self.chat_ids, delivered) if not ok]
+        if failed:
+            raise LiveStreamError(f"Message en direct non livré aux chats {failed}")
+
+    async def _render_chat(self, chat_id: int, pages: List[str], parse_mode) -> bool:
+        """Met à jour les pages modifiées d'un chat, dans l'ordre ; False au premier échec"""
+        rendered = self._rendered[chat_id]
+
+        for index, page in enumerate(pages):
+            if index < len(rendered) and rendered[index] == page:
+                continue
+            if not await self._render_page(chat_id, index, page, parse_mode):
+                return False
+            if index < len(rendered):
+                rendered[index] = page
+            else:
+                rendered.append(page)
+        return True
+
+    async def _render_page(self, chat_id: int, index: int, page: str, parse_mode) -> bool:
+        """Édite la page index pour un chat, ou l'envoie si elle n'existe pas encore"""
+        messages = self._messages[chat_id]
+        bot = self.broadcaster.bot
+
+        try:
+            if index < len(messages):
+                await self._call(chat_id, bot.edit_message_text, parse_mode,
+                                 message_id=messages[index].message_id, text=page)
+            else:
+                messages.append(await self._call(chat_id, bot.send_message, parse_mode, text=page))
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour du message en direct pour {chat_id}: {str(e)}")
+            return False
+
+    async def _call(self, chat_id: int, method, parse_mode, **kwargs) -> Any:
+        """Appel limité en débit, avec repli en texte brut si le Markdown est invalide"""
+        from telegram.error import BadRequest  # import différé : démarrage plus rapide
+
+        try:
+            return await self.broadcaster.call(chat_id, method, parse_mode=parse_mode, **kwargs)
+        except BadRequest as e:
+            if 'not modified' in str(e).lower():
+                return None
+            if parse_mode is None:
+                raise
+            return await self.broadcaster.call(chat_id, method, **kwargs)
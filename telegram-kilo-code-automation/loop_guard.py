@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protection anti-boucle par marqueur invisible
+Les réponses IA envoyées par le bot portent un suffixe en caractères de largeur
+nulle (nonce + HMAC) ; un message entrant qui le porte est reconnu en temps
+constant, sans faux positif sur le texte saisi par l'utilisateur
+"""
+
+import hashlib
+import hmac
+import re
+
+# Début du marqueur, puis bits 0/1 en caractères invisibles
+MARK_START = '\u2060'  # WORD JOINER
+BIT_ZERO = '\u200b'    # ZERO WIDTH SPACE
+BIT_ONE = '\u200c'     # ZERO WIDTH NON-JOINER
+
+# Repli (marqueur retiré par un client, ancien message) : en-tête des réponses IA,
+# en début de texte uniquement
+IA_RESPONSE_PATTERN = re.compile(r'^\s*🤖\s*\**\s*Réponse de Kilo Code\b')
+
+
+def _encode_bits(data: bytes) -> str:
+    return ''.join(BIT_ONE if byte >> shift & 1 else BIT_ZERO for byte in data for shift in range(7, -1, -1))
+
+
+def _decode_bits(marks: str) -> bytes:
+    values = bytearray()
+    for offset in range(0, len(marks), 8):
+        value = 0
+        for mark in marks[offset:offset + 8]:
+            value = value << 1 | (1 if mark == BIT_ONE else 0)
+        values.append(value)
+    return bytes(values)
+
+
+class LoopGuard:
+    """
+    Signe et reconnaît les messages du bot
+
+    Le nonce est dérivé du texte : un même texte donne le même marqueur (les
+    éditions identiques restent détectables comme « non modifiées »). Seul le
+    nonce est authentifié, car Telegram réécrit le texte (Markdown retiré).
+    """
+
+    def __init__(self, secret: bytes, nonce_size: int = 4, tag_size: int = 4):
+        self.secret = secret
+        self.nonce_size = nonce_size
+        self.tag_size = tag_size
+        self.mark_length = 1 + 8 * (nonce_size + tag_size)
+
+    def _tag(self, nonce: bytes) -> bytes:
+        return hmac.new(self.secret, nonce, hashlib.sha256).digest()[:self.tag_size]
+
+    def mark(self, text: str) -> str:
+        """Ajoute le marqueur invisible à un message sortant"""
+        nonce = hashlib.blake2b(text.encode('utf-8'), digest_size=self.nonce_size).digest()
+        return text + MARK_START + _encode_bits(nonce + self._tag(nonce))
+
+    def is_marked(self, text: str) -> bool:
+        """Vérifie la présence d'un marqueur valide en fin de texte (coût constant)"""
+        # Fenêtre de fin bornée : tolère quelques caractères ajoutés après le marqueur
+        window_start = max(0, len(text) - self.mark_length - 8)
+        start = text.rfind(MARK_START, window_start)
+        if start < 0:
+            return False
+
+        marks = text[start + 1:start + self.mark_length]
+        if len(marks) != self.mark_length - 1 or any(mark not in (BIT_ZERO, BIT_ONE) for mark in marks):
+            return False
+
+        payload = _decode_bits(marks)
+        nonce, tag = payload[:self.nonce_size], payload[self.nonce_size:]
+        return hmac.compare_digest(tag, self._tag(nonce))
+
+    def is_bot_message(self, text: str) -> bool:
+        """Marqueur valide, ou à défaut en-tête de réponse IA"""
+        return self.is_marked(text) or IA_RESPONSE_PATTERN.match(text) is not None
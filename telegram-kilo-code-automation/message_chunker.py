@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Découpage des longues réponses IA en plusieurs messages Telegram
+Coupe sur les paragraphes et les blocs de code, en gardant les blocs
+Markdown équilibrés d'un message à l'autre
+"""
+
+from typing import List
+
+FENCE = '```'
+
+
+def _parse_units(text: str) -> List[str]:
+    """
+    Découpe le texte en unités insécables : paragraphes et blocs de code complets
+
+    Un bloc de code non fermé (réponse encore en cours) est fermé artificiellement.
+    """
+    units: List[str] = []
+    paragraph: List[str] = []
+    code: List[str] = []
+    in_code = False
+
+    def flush_paragraph():
+        if paragraph:
+            units.append('\n'.join(paragraph))
+            paragraph.clear()
+
+    for line in text.split('\n'):
+        is_fence = line.lstrip().startswith(FENCE)
+
+        if in_code:
+            code.append(line)
+            if is_fence:
+                units.append('\n'.join(code))
+                code = []
+                in_code = False
+        elif is_fence:
+            flush_paragraph()
+            code = [line]
+            in_code = True
+        elif not line.strip():
+            flush_paragraph()
+        else:
+            paragraph.append(line)
+
+    flush_paragraph()
+    if in_code:
+        code.append(FENCE)
+        units.append('\n'.join(code))
+
+    return units
+
+
+def _hard_split(line: str, limit: int) -> List[str]:
+    """Coupe une ligne trop longue en morceaux de taille fixe"""
+    return [line[i:i + limit] for i in range(0, len(line), limit)] or ['']
+
+
+def _pack_lines(lines: List[str], limit: int) -> List[str]:
+    """Regroupe des lignes en morceaux d'au plus limit caractères"""
+    pieces: List[str] = []
+    current: List[str] = []
+    current_len = 0
+
+    for line in lines:
+        for part in _hard_split(line, limit):
+            added = len(part) + (1 if current else 0)
+            if current and current_len + added > limit:
+                pieces.append('\n'.join(current))
+                current, current_len = [], 0
+                added = len(part)
+            current.append(part)
+            current_len += added
+
+    if current:
+        pieces.append('\n'.join(current))
+    return pieces
+
+
+def _split_unit(unit: str, limit: int) -> List[str]:
+    """Découpe une unité plus longue que la limite"""
+    lines = unit.split('\n')
+
+    if lines[0].lstrip().startswith(FENCE):
+        # Bloc de code : chaque morceau est refermé puis rouvert avec le même langage
+        # (seule une clôture nue est retirée : une ligne qui porte du texte reste dans le corps)
+        opening, body = lines[0], lines[1:]
+        if body and body[-1].strip() == FENCE:
+            body = body[:-1]
+        overhead = len(opening) + len(FENCE) + 2
+        return [f"{opening}\n{piece}\n{FENCE}" for piece in _pack_lines(body, max(1, limit - overhead))]
+
+    return _pack_lines(lines, limit)
+
+
+def split_message(text: str, limit: int = 4000) -> List[str]:
+    """
+    Découpe un texte en morceaux d'au plus limit caractères
+
+    Returns:
+        La liste ordonnée des morceaux (un seul si le texte tient dans la limite)
+    """
+    if len(text) <= limit:
+        return [text]
+
+    chunks: List[str] = []
+    current = ''
+
+    for unit in _parse_units(text):
+        pieces = [unit] if len(unit) <= limit else _split_unit(unit, limit)
+
+        for piece in pieces:
+            candidate = f"{current}\n\n{piece}" if current else piece
+            if len(candidate) <= limit:
+                current = candidate
+            else:
+                chunks.append(current)
+                current = piece
+
+    if current:
+        chunks.append(current)
+    return chunks
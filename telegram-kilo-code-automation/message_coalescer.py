@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Regroupement des messages Telegram arrivant en rafale
+Telegram découpe les longs textes collés en plusieurs messages : ceux qui
+arrivent à moins de gap secondes d'intervalle sont fusionnés en un seul prompt
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FlushCallback = Callable[[int, str, List[Any]], Awaitable[None]]
+
+
+class _ChatBuffer:
+    """Messages en attente pour un chat"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.payloads: List[Any] = []
+        self.started_at = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+
+class MessageCoalescer:
+    """
+    Fenêtre de regroupement par chat
+
+    Chaque nouveau message relance l'attente de gap secondes ; à expiration
+    (ou après max_delay secondes depuis le premier message), les textes sont
+    fusionnés dans l'ordre d'arrivée et transmis à on_flush.
+    """
+
+    def __init__(self, on_flush: FlushCallback, gap: float = 1.5, max_delay: float = 10.0,
+                 separator: str = '\n'):
+        self.on_flush = on_flush
+        self.gap = gap
+        self.max_delay = max_delay
+        self.separator = separator
+        self._buffers: Dict[int, _ChatBuffer] = {}
+
+    async def add(self, chat_id: int, text: str, payload: Any = None) -> None:
+        """Ajoute un message au tampon du chat (payload : update d'origine, pour répondre)"""
+        if self.gap <= 0:
+            await self.on_flush(chat_id, text, [payload])
+            return
+
+        buffer = self._buffers.get(chat_id)
+        if buffer is None:
+            buffer = _ChatBuffer()
+            self._buffers[chat_id] = buffer
+
+        buffer.parts.append(text)
+        buffer.payloads.append(payload)
+
+        if buffer.task is not None:
+            buffer.task.cancel()
+
+        remaining = self.max_delay - (time.monotonic() - buffer.started_at)
+        delay = max(0.0, min(self.gap, remaining))
+        buffer.task = asyncio.ensure_future(self._flush_later(chat_id, buffer, delay))
+
+    def pending_count(self) -> int:
+        """Nombre de chats ayant des messages en attente"""
+        return len(self._buffers)
+
+    async def _flush_later(self, chat_id: int, buffer: _ChatBuffer, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+
+        if self._buffers.get(chat_id) is not buffer:
+            return
+        del self._buffers[chat_id]
+
+        if len(buffer.parts) > 1:
+            logger.info(f"{len(buffer.parts)} messages regroupés en un seul prompt (chat {chat_id})")
+
+        try:
+            await self.on_flush(chat_id, self.separator.join(buffer.parts), buffer.payloads)
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement du prompt regroupé: {str(e)}")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificateur adaptatif du monitoring
+Interroge rapidement juste après l'envoi d'un prompt ou tant que la réponse
+grandit, puis ralentit exponentiellement quand rien ne change
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePollScheduler:
+    """
+    Intervalle de monitoring adaptatif
+
+    notify_activity() ramène l'intervalle au minimum, notify_idle() le multiplie
+    par backoff_factor jusqu'au plafond. Seul wake() interrompt l'attente :
+    le monitoring, qui signale lui-même son activité, attend toujours au
+    moins min_interval entre deux captures.
+    """
+
+    def __init__(self, min_interval: float = 0.25, max_interval: float = 3.0, backoff_factor: float = 2.0):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff_factor = max(1.0, backoff_factor)
+        self._interval = self.max_interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._woken = False
+
+    @property
+    def current_interval(self) -> float:
+        """Intervalle courant en secondes"""
+        with self._lock:
+            return self._interval
+
+    def notify_activity(self) -> None:
+        """Activité détectée (prompt envoyé, réponse qui grandit) : interrogation rapide"""
+        with self._lock:
+            self._interval = self.min_interval
+
+    def wake(self) -> None:
+        """Changement externe (prompt envoyé, événement X11) : vérification immédiate, intervalle inchangé"""
+        with self._lock:
+            self._woken = True
+            self._wakeup.notify_all()
+
+    def notify_idle(self) -> None:
+        """Aucun changement : allongement de l'intervalle jusqu'au plafond"""
+        with self._lock:
+            self._interval = min(self.max_interval, self._interval * self.backoff_factor)
+
+    def wait(self) -> None:
+        """
+        Attend l'intervalle courant (interrompu par wake)
+
+        Un réveil signalé hors de l'attente (pendant une capture) n'est pas
+        perdu : l'attente suivante se termine immédiatement.
+        """
+        with self._lock:
+            self._wakeup.wait_for(lambda: self._woken, timeout=self._interval)
+            self._woken = False
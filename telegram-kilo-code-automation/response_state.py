@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+État de la dernière réponse IA
+Garde la dernière réponse en mémoire (empreinte + longueur) et la persiste
+sur disque de façon atomique et différée
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def text_digest(text: str) -> str:
+    """Empreinte d'un texte de réponse"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class LastResponseStore:
+    """
+    Dernière réponse connue, en mémoire
+
+    Le fichier n'est lu qu'une fois au démarrage (load). Les mises à jour
+    rapprochées sont regroupées en une seule écriture (debounce), faite dans
+    un fichier temporaire puis renommée avec os.replace.
+    """
+
+    def __init__(self, path: str, debounce_delay: float = 2.0):
+        self.path = path
+        self.debounce_delay = debounce_delay
+        self.text = ''
+        self.digest = text_digest('')
+        self.timestamp = 0.0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+
+    def load(self) -> str:
+        """Restaure l'état depuis le fichier (au démarrage uniquement)"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                with self._lock:
+                    self.text = data.get('last_response', '')
+                    self.digest = text_digest(self.text)
+                    self.timestamp = data.get('timestamp', 0.0)
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement de la dernière réponse: {str(e)}")
+        return self.text
+
+    def matches(self, text: str) -> bool:
+        """Compare un texte à la dernière réponse (longueur puis empreinte)"""
+        return len(text) == len(self.text) and text_digest(text) == self.digest
+
+    def update(self, text: str) -> None:
+        """Met à jour la dernière réponse et planifie la sauvegarde"""
+        with self._lock:
+            self.text = text
+            self.digest = text_digest(text)
+            self.timestamp = time.time()
+            self._dirty = True
+
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Écrit immédiatement l'état sur disque s'il a changé"""
+        with self._write_lock:
+            self._write()
+
+    def _write(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            payload = {'last_response': self.text, 'timestamp': self.timestamp}
+            self._dirty = False
+
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix='.last_response.', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.error(f"Erreur lors de la sauvegarde de la dernière réponse: {str(e)}")
+            with self._lock:
+                self._dirty = True
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suivi incrémental des réponses de l'IA
+Calcule le texte nouvellement ajouté entre deux captures du panneau Kilo Code
+pour ne transmettre que la différence sur Telegram
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """
+    Longueur du préfixe commun de deux chaînes
+
+    Recherche dichotomique sur des comparaisons de tranches : les comparaisons
+    sont faites en C, ce qui évite une boucle Python caractère par caractère.
+    """
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class IncrementalResponseTracker:
+    """
+    Mémorise la dernière capture et calcule le delta de la suivante
+
+    Trois stratégies, de la moins chère à la plus chère :
+    1. la capture précédente est un préfixe de la nouvelle (cas courant)
+    2. l'ancre (fin de la capture précédente) est retrouvée dans la nouvelle,
+       par exemple quand le haut de l'historique a disparu du panneau
+    3. préfixe commun : tout ce qui suit le point de divergence est nouveau
+    """
+
+    def __init__(self, initial_text: str = '', anchor_size: int = 64):
+        self.anchor_size = anchor_size
+        self.last_text = initial_text
+
+    def reset(self, text: str = '') -> None:
+        """Réinitialise la capture de référence"""
+        self.last_text = text
+
+    def compute_delta(self, current: str) -> str:
+        """
+        Calcule le texte nouveau par rapport à la dernière capture validée
+
+        Returns:
+            Le texte ajouté (chaîne vide si rien de nouveau)
+        """
+        previous = self.last_text
+
+        if not previous:
+            return current
+
+        # 1. Ajout en fin de panneau
+        if current.startswith(previous):
+            return current[len(previous):]
+
+        # 2. Recherche de l'ancre (fin de la capture précédente)
+        anchor = previous[-self.anchor_size:]
+        anchor_index = current.rfind(anchor)
+        if anchor_index >= 0:
+            return current[anchor_index + len(anchor):]
+
+        # 3. Point de divergence
+        prefix_length = common_prefix_length(previous, current)
+        if prefix_length == 0:
+            logger.info("Capture sans lien avec la précédente, nouvelle conversation")
+        return current[prefix_length:]
+
+    def commit(self, current: str) -> None:
+        """Valide la capture comme nouvelle référence (après envoi réussi)"""
+        self.last_text = current
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Détection de changement à l'écran par empreinte de pixels
+Permet au monitoring de ne lancer une capture presse-papiers (clic + copie)
+que lorsque la zone de réponse a visuellement changé
+"""
+
+import hashlib
+import logging
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]
+
+
+def region_around(x: int, y: int, width: int, height: int) -> Region:
+    """Région (left, top, width, height) centrée sur un point, bornée à l'écran"""
+    return (max(0, x - width // 2), max(0, y - height // 2), width, height)
+
+
+def _grab_with_pillow(region: Region):
+    """Capture d'écran d'une région avec Pillow"""
+    from PIL import ImageGrab
+
+    left, top, width, height = region
+    return ImageGrab.grab(bbox=(left, top, left + width, top + height))
+
+
+class RegionChangeDetector:
+    """
+    Empreinte rapide d'une région d'écran
+
+    L'image est convertie en niveaux de gris et réduite avant hachage : le
+    calcul coûte quelques millisecondes, contre environ une seconde pour une
+    capture presse-papiers.
+    """
+
+    def __init__(self, region: Region, downscale: int = 4,
+                 grab: Optional[Callable[[Region], object]] = None):
+        """
+        Args:
+            region: Zone surveillée (left, top, width, height)
+            downscale: Facteur de réduction avant hachage
+            grab: Fonction de capture (Pillow par défaut)
+        """
+        self.region = region
+        self.downscale = max(1, downscale)
+        self.grab = grab or _grab_with_pillow
+        self._last_digest: Optional[str] = None
+
+    def digest(self) -> Optional[str]:
+        """
+        Empreinte de la région
+
+        Returns:
+            L'empreinte hexadécimale, ou None si la capture d'écran a échoué
+        """
+        try:
+            image = self.grab(self.region).convert('L')
+            if self.downscale > 1:
+                image = image.reduce(self.downscale)
+            return hashlib.blake2b(image.tobytes(), digest_size=16).hexdigest()
+        except Exception as e:
+            logger.warning(f"Capture de la zone de réponse impossible: {str(e)}")
+            return None
+
+    def has_changed(self) -> bool:
+        """
+        Compare l'empreinte courante à la précédente
+
+        Returns:
+            True si la zone a changé (ou si l'empreinte est indisponible,
+            pour que le monitoring retombe sur la capture complète)
+        """
+        current = self.digest()
+        if current is None:
+            return True
+
+        changed = current != self._last_digest
+        self._last_digest = current
+        return changed
+
+    def invalidate(self) -> None:
+        """Force la prochaine vérification à signaler un changement"""
+        self._last_digest = None
+
+    def refresh(self) -> None:
+        """Recalcule l'empreinte de référence (après une capture qui modifie l'affichage)"""
+        self._last_digest = self.digest()
+
+    def settle(self, before: Optional[str]) -> None:
+        """
+        Prend pour référence l'empreinte relevée juste avant une capture
+
+        Si la zone a changé depuis (affichage pendant la capture) ou si
+        l'empreinte était indisponible, la référence est invalidée : la
+        prochaine vérification signalera un changement.
+        """
+        current = self.digest()
+        self._last_digest = current if before is not None and current == before else None
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registre des instances VSCode pilotées
+Chaque cible a ses coordonnées, son cache de fenêtre, sa file d'automatisation
+et son monitoring ; les chats sont routés vers une cible (/target)
+"""
+
+import json
+import logging
+from contextlib import nullcontext
+from functools import cached_property
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from auto_locator import AutoLocator
+from automation_worker import AutomationWorker
+from gui_driver import GuiDriver
+from poll_scheduler import AdaptivePollScheduler
+from response_state import LastResponseStore
+from window_cache import WindowTargetCache
+from x11_events import X11ChangeWatcher
+
+logger = logging.getLogger(__name__)
+
+Point = Tuple[int, int]
+
+
+class KiloTarget:
+    """
+    Une instance VSCode + Kilo Code
+
+    Les cibles d'un même display partagent pilote GUI et worker (une seule
+    souris, un seul clavier) ; des cibles sur des displays distincts
+    s'exécutent en parallèle.
+    """
+
+    def __init__(self, name: str, gui: GuiDriver, worker: AutomationWorker,
+                 window_titles: List[str], input_pos: Point, send_button_pos: Point,
+                 response_pos: Point, scheduler: AdaptivePollScheduler,
+                 store: LastResponseStore, display: Optional[str] = None,
+                 locator: Optional[AutoLocator] = None, stop_button_pos: Optional[Point] = None):
+        self.name = name
+        self.gui = gui
+        self.worker = worker
+        self.window_titles = window_titles
+        self.input_pos = input_pos
+        self.send_button_pos = send_button_pos
+        self.response_pos = response_pos
+        self.scheduler = scheduler
+        self.store = store
+        self.display = display
+        # Calibrage automatique : recale input_pos, send_button_pos et response_pos
+        self.locator = locator
+        # Bouton stop de Kilo Code, visible pendant la génération (indice de fin de réponse)
+        self.stop_button_pos = stop_button_pos
+        # Trace du dernier prompt injecté (rattachement des captures du monitoring)
+        self.last_prompt_trace_id: Optional[str] = None
+        # Dernière capture vide : la position de la zone de réponse sera revérifiée
+        self.capture_failed = False
+        # Réveil du monitoring par événements X11 (None : polling seul)
+        self.change_watcher: Optional[X11ChangeWatcher] = None
+
+    def mute_change_events(self) -> Any:
+        """Ignore les événements X11 provoqués par nos propres actions (capture)"""
+        return self.change_watcher.muted() if self.change_watcher else nullcontext()
+
+    @cached_property
+    def window_cache(self) -> Optional[WindowTargetCache]:
+        """Cache de fenêtre (None sans détection de fenêtre), créé au premier usage"""
+        if self.gui.window_backend is None:
+            return None
+        return WindowTargetCache(self.gui.window_backend, self.window_titles)
+
+    def __repr__(self) -> str:
+        return f"KiloTarget({self.name!r}, display={self.display!r})"
+
+
+class TargetRegistry:
+    """Cibles par nom et routage chat -> cible (première cible par défaut)"""
+
+    def __init__(self):
+        self._targets: Dict[str, KiloTarget] = {}
+        self._routes: Dict[int, str] = {}
+
+    def add(self, target: KiloTarget, chat_ids: Iterable[int] = ()) -> None:
+        if target.name in self._targets:
+            raise ValueError(f"Cible en double: {target.name}")
+        self._targets[target.name] = target
+        for chat_id in chat_ids:
+            self._routes[int(chat_id)] = target.name
+
+    @property
+    def default(self) -> Optional[KiloTarget]:
+        """Première cible (None si aucune cible n'a pu être créée)"""
+        return next(iter(self._targets.values()), None)
+
+    def get(self, name: str) -> Optional[KiloTarget]:
+        return self._targets.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._targets)
+
+    def __iter__(self) -> Iterator[KiloTarget]:
+        return iter(list(self._targets.values()))
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def route(self, chat_id: int, name: str) -> KiloTarget:
+        """
+        Associe un chat à une cible
+
+        Raises:
+            KeyError: si la cible n'existe pas
+        """
+        target = self._targets[name]
+        self._routes[chat_id] = name
+        logger.info(f"Chat {chat_id} routé vers la cible '{name}'")
+        return target
+
+    def target_for(self, chat_id: int) -> KiloTarget:
+        """Cible d'un chat (cible par défaut si aucun routage)"""
+        return self._targets.get(self._routes.get(chat_id, ''), self.default)
+
+    def chats_for(self, target: KiloTarget, chat_ids: Iterable[int]) -> List[int]:
+        """Chats, parmi chat_ids, routés vers cette cible"""
+        return [chat_id for chat_id in chat_ids if self.target_for(chat_id) is target]
+
+    def workers(self) -> List[AutomationWorker]:
+        """Workers distincts (un par pilote GUI)"""
+        unique: Dict[int, AutomationWorker] = {}
+        for target in self._targets.values():
+            unique.setdefault(id(target.worker), target.worker)
+        return list(unique.values())
+
+    def drivers(self) -> List[GuiDriver]:
+        """Pilotes GUI distincts"""
+        unique: Dict[int, GuiDriver] = {}
+        for target in self._targets.values():
+            unique.setdefault(id(target.gui), target.gui)
+        return list(unique.values())
+
+
+def load_target_specs(path: str) -> List[Dict[str, Any]]:
+    """
+    Lit la description des cibles (liste JSON)
+
+    Exemple :
+        [{"name": "api", "window_title": "api - Visual Studio Code",
+          "input": [500, 800], "send_button": [850, 800], "response": [600, 700],
+          "display": ":1", "chats": [123456789]}]
+
+    Raises:
+        ValueError: si le fichier est invalide
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        specs = json.load(f)
+
+    if not isinstance(specs, list) or not specs:
+        raise ValueError(f"{path}: liste de cibles attendue")
+
+    names = set()
+    for spec in specs:
+        name = spec.get('name') if isinstance(spec, dict) else None
+        if not name:
+            raise ValueError(f"{path}: chaque cible doit avoir un nom")
+        if name in names:
+            raise ValueError(f"{path}: cible en double: {name}")
+        names.add(name)
+
+    return specs
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serveur local imitant l'API Bot Telegram
+Sert getUpdates (long polling), sendMessage, editMessageText et sendDocument
+pour faire tourner le bot sans réseau, via TELEGRAM_API_BASE_URL ; chaque appel
+sortant est horodaté pour les mesures de latence
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Kilo Bench', 'username': 'kilo_bench_bot'}
+
+
+class ApiCall:
+    """Appel reçu par le serveur (méthode, paramètres, horodatage)"""
+
+    def __init__(self, method: str, params: Dict[str, Any], received_at: float):
+        self.method = method
+        self.params = params
+        self.received_at = received_at
+
+    @property
+    def chat_id(self) -> Optional[int]:
+        try:
+            return int(self.params.get('chat_id'))
+        except (TypeError, ValueError):
+            return None
+
+    @property
+    def text(self) -> str:
+        return str(self.params.get('text') or self.params.get('caption') or '')
+
+    @property
+    def content(self) -> str:
+        """Tout le contenu envoyé : texte, légende et corps multipart (fichier joint compris)"""
+        parts = (self.params.get(key) for key in ('text', 'caption', '_raw'))
+        return '\n'.join(str(part) for part in parts if part)
+
+
+class TelegramApiStub:
+    """
+    Faux serveur de l'API Bot
+
+    push_message() met un update en file ; le bot le reçoit au prochain
+    getUpdates. Les appels sortants sont conservés dans calls.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.host = host
+        self.port = port
+        self.calls: List[ApiCall] = []
+        self._updates: List[Dict[str, Any]] = []
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._condition = threading.Condition()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        """Valeur de TELEGRAM_API_BASE_URL (le token est ajouté par le bot)"""
+        return f"http://{self.host}:{self.port}/bot"
+
+    def start(self) -> None:
+        stub = self
+
+        class ApiHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                stub._handle(self)
+
+            def do_GET(self):
+                stub._handle(self)
+
+            def log_message(self, format, *args):
+                logger.debug(f"API stub: {format % args}")
+
+        self._server = ThreadingHTTPServer((self.host, self.port), ApiHandler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name='telegram-api-stub', daemon=True).start()
+        logger.info(f"API Telegram simulée sur {self.base_url}")
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._condition:
+            self._condition.notify_all()
+
+    def push_message(self, user_id: int, text: str) -> int:
+        """
+        Ajoute un message utilisateur dans la file des updates
+
+        Returns:
+            L'update_id attribué
+        """
+        with self._condition:
+            update_id = self._next_update_id
+            self._next_update_id += 1
+            self._updates.append({
+                'update_id': update_id,
+                'message': {
+                    'message_id': self._new_message_id(),
+                    'date': int(time.time()),
+                    'chat': {'id': user_id, 'type': 'private', 'first_name': 'Bench'},
+                    'from': {'id': user_id, 'is_bot': False, 'first_name': 'Bench', 'username': f'bench_{user_id}'},
+                    'text': text,
+                },
+            })
+            self._condition.notify_all()
+        return update_id
+
+    def calls_for(self, *methods: str) -> List[ApiCall]:
+        with self._condition:
+            return [call for call in self.calls if call.method in methods]
+
+    def count_calls(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self._condition:
+            for call in self.calls:
+                counts[call.method] = counts.get(call.method, 0) + 1
+        return counts
+
+    def wait_for_polling(self, timeout: float = 30.0) -> bool:
+        """Attend le premier getUpdates (bot démarré)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.calls_for('getUpdates'):
+                return True
+            time.sleep(0.1)
+        return False
+
+    def _new_message_id(self) -> int:
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        return message_id
+
+    def _handle(self, request: BaseHTTPRequestHandler) -> None:
+        match = re.match(r'^/bot[^/]+/(\w+)', request.path)
+        if not match:
+            request.send_error(404)
+            return
+
+        method = match.group(1)
+        length = int(request.headers.get('Content-Length') or 0)
+        body = request.rfile.read(length) if length else b''
+        params = self._parse_params(request.headers.get('Content-Type', ''), body)
+
+        with self._condition:
+            self.calls.append(ApiCall(method, params, time.time()))
+
+        result = self._dispatch(method, params)
+        payload = json.dumps({'ok': True, 'result': result}).encode('utf-8')
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    @staticmethod
+    def _parse_params(content_type: str, body: bytes) -> Dict[str, Any]:
+        """Paramètres JSON, formulaire, ou multipart (contenu brut conservé)"""
+        if not body:
+            return {}
+        if 'application/json' in content_type:
+            return json.loads(body.decode('utf-8'))
+        if 'multipart/form-data' in content_type:
+            raw = body.decode('utf-8', errors='replace')
+            params: Dict[str, Any] = {'_raw': raw}
+            for name, value in re.findall(r'name="(\w+)"\r\n(?:[^\r\n]+\r\n)*\r\n([^\r]*)\r\n', raw):
+                params.setdefault(name, value)
+            return params
+        return {key: values[0] for key, values in parse_qs(body.decode('utf-8'), keep_blank_values=True).items()}
+
+    def _dispatch(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'getUpdates':
+            return self._get_updates(params)
+        if method in ('sendMessage', 'editMessageText', 'sendDocument'):
+            chat_id = int(params.get('chat_id') or 0)
+            message_id = int(params['message_id']) if method == 'editMessageText' else None
+            with self._condition:
+                message_id = message_id or self._new_message_id()
+            message = {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': BOT_USER,
+            }
+            if 'text' in params:
+                message['text'] = params['text']
+            return message
+        # deleteWebhook, setWebhook, setMyCommands, ...
+        return True
+
+    def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Long polling : rend les updates >= offset, ou [] après timeout"""
+        offset = int(params.get('offset') or 0)
+        timeout = float(params.get('timeout') or 0)
+        deadline = time.monotonic() + timeout
+
+        with self._condition:
+            # Les updates confirmés (offset) sont oubliés, comme côté Telegram
+            self._updates = [update for update in self._updates if update['update_id'] >= offset]
+            while not self._updates and self._server is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return list(self._updates)
@@ -5,28 +5,48 @@ Script d'automatisation Telegram -> Kilo Code VSCode
 Permet d'envoyer des commandes depuis Telegram vers l'extension Kilo Code
 """
 
+from __future__ import annotations
+
 import os
+import re
 import sys
+import asyncio
+import hashlib
 import time
 import logging
 import platform
 import threading
-import json
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-import pyautogui
-import pyperclip
-from pynput.keyboard import Key, Controller
-from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-
-# Import pour la détection de fenêtre (Windows/Linux/Mac)
-try:
-    import pygetwindow as gw
-    WINDOW_DETECTION_AVAILABLE = True
-except ImportError:
-    WINDOW_DETECTION_AVAILABLE = False
-    logger.warning("pygetwindow non disponible. La détection de fenêtre sera limitée.")
+from automation_worker import AutomationWorker, QueueFullError
+from response_tracker import IncrementalResponseTracker
+from screen_probe import RegionChangeDetector, region_around
+from poll_scheduler import AdaptivePollScheduler
+from response_state import LastResponseStore, text_digest
+from broadcast import TelegramBroadcaster
+from message_chunker import split_message
+from live_stream import LiveResponseStream
+from message_coalescer import MessageCoalescer
+from metrics import MetricsRegistry, start_metrics_server
+from tracing import Tracer, current_trace_id
+from gui_driver import GuiDriver, create_gui_driver
+from auto_locator import ELEMENTS, AutoLocator
+from completion_detector import GenerationCue, ResponseCompletionDetector
+from heartbeat import HeartbeatEmitter
+from x11_events import X11ChangeWatcher
+from job_store import (
+    JobStore, StoredJob, KIND_PROMPT, KIND_RESPONSE, STATUS_DONE, STATUS_FAILED,
+    STATUS_INJECTING, STATUS_QUEUED, STATUS_SENDING
+)
+from targets import KiloTarget, TargetRegistry, load_target_specs
+from dedup_cache import DedupCache, content_fingerprint
+from loop_guard import LoopGuard
+
+# python-telegram-bot n'est importé qu'au lancement du bot (main) : l'import de
+# ce module reste rapide et possible sans le paquet (tests, calibrage)
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import Application, ContextTypes
 
 # Configuration du logging
 logging.basicConfig(
@@ -40,6 +60,7 @@ load_dotenv()
 
 # Configuration
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+TELEGRAM_API_BASE_URL = os.getenv('TELEGRAM_API_BASE_URL', '')  # ex: http://127.0.0.1:8081/bot (serveur de test)
 ALLOWED_USER_IDS = [int(uid.strip()) for uid in os.getenv('TELEGRAM_ALLOWED_USER_IDS', '').split(',') if uid.strip()]
 KILO_CODE_INPUT_X = int(os.getenv('KILO_CODE_INPUT_X', 500))
 KILO_CODE_INPUT_Y = int(os.getenv('KILO_CODE_INPUT_Y', 800))
@@ -49,16 +70,257 @@ KILO_CODE_SEND_SHORTCUT = os.getenv('KILO_CODE_SEND_SHORTCUT', 'ctrl+enter')
 SECURITY_MODE = os.getenv('SECURITY_MODE', 'true').lower() == 'true'
 ACTION_DELAY = float(os.getenv('ACTION_DELAY', 0.5))
 
+# Stratégie d'injection du texte : paste (presse-papiers), type (frappe) ou auto
+INJECTION_MODE = os.getenv('INJECTION_MODE', 'auto').lower()
+PASTE_THRESHOLD = int(os.getenv('PASTE_THRESHOLD', 200))  # caractères au-delà desquels auto colle
+PASTE_SHORTCUT = os.getenv('PASTE_SHORTCUT', 'command+v' if platform.system().lower() == 'darwin' else 'ctrl+v')
+
 # Configuration pour surveiller les réponses de l'IA
 MONITORING_ENABLED = os.getenv('MONITORING_ENABLED', 'true').lower() == 'true'
 MONITORING_INTERVAL = int(os.getenv('MONITORING_INTERVAL', 3))  # secondes entre chaque vérification
+MONITORING_MIN_INTERVAL = float(os.getenv('MONITORING_MIN_INTERVAL', 0.25))  # intervalle juste après un prompt
+MONITORING_MAX_INTERVAL = float(os.getenv('MONITORING_MAX_INTERVAL', MONITORING_INTERVAL))  # plafond au repos
+MONITORING_BACKOFF_FACTOR = float(os.getenv('MONITORING_BACKOFF_FACTOR', 2.0))
 KILO_CODE_RESPONSE_X = int(os.getenv('KILO_CODE_RESPONSE_X', 600))
 KILO_CODE_RESPONSE_Y = int(os.getenv('KILO_CODE_RESPONSE_Y', 700))
 KILO_CODE_COPY_SHORTCUT = os.getenv('KILO_CODE_COPY_SHORTCUT', 'ctrl+a,ctrl+c')
 LAST_RESPONSE_FILE = 'last_response.json'
+LAST_RESPONSE_SAVE_DELAY = float(os.getenv('LAST_RESPONSE_SAVE_DELAY', 2.0))  # regroupement des écritures
+
+# Pré-vérification par empreinte de pixels autour de la zone de réponse
+RESPONSE_ROI_ENABLED = os.getenv('RESPONSE_ROI_ENABLED', 'true').lower() == 'true'
+RESPONSE_ROI_WIDTH = int(os.getenv('RESPONSE_ROI_WIDTH', 600))
+RESPONSE_ROI_HEIGHT = int(os.getenv('RESPONSE_ROI_HEIGHT', 400))
+
+# Détection de fin de réponse : une réponse n'est transmise qu'une fois stable
+# (captures identiques consécutives ou délai sans changement) ; hors STREAMING_ENABLED
+COMPLETION_DETECTION_ENABLED = os.getenv('COMPLETION_DETECTION_ENABLED', 'true').lower() == 'true'
+COMPLETION_STABLE_SAMPLES = int(os.getenv('COMPLETION_STABLE_SAMPLES', 3))
+COMPLETION_QUIET_PERIOD = float(os.getenv('COMPLETION_QUIET_PERIOD', 4))  # secondes sans changement
+COMPLETION_MAX_WAIT = float(os.getenv('COMPLETION_MAX_WAIT', 120))  # rétention max si le bouton stop reste visible
+# Indice visuel optionnel : bouton stop de Kilo Code (modèle stop_button.png du répertoire des modèles)
+KILO_CODE_STOP_BUTTON_X = os.getenv('KILO_CODE_STOP_BUTTON_X', '')
+KILO_CODE_STOP_BUTTON_Y = os.getenv('KILO_CODE_STOP_BUTTON_Y', '')
+COMPLETION_CUE_WIDTH = int(os.getenv('COMPLETION_CUE_WIDTH', 120))
+COMPLETION_CUE_HEIGHT = int(os.getenv('COMPLETION_CUE_HEIGHT', 60))
+
+# Réveil du monitoring par événements X11 (Linux, python-xlib optionnel) : changement
+# du presse-papiers, zone de réponse redessinée, titre de la fenêtre VSCode
+X11_EVENTS_ENABLED = os.getenv('X11_EVENTS_ENABLED', 'true').lower() == 'true'
+X11_EVENTS_MAX_INTERVAL = float(os.getenv('X11_EVENTS_MAX_INTERVAL', 30))  # polling de secours si les événements sont actifs
+
+# Réception des updates : polling (long polling) ou webhook (serveur HTTP local)
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # URL publique transmise à Telegram (setWebhook)
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN', '')
+
+# Seuls les messages (texte et commandes) sont traités
+ALLOWED_UPDATES = ['message']  # Update.MESSAGE
+
+# Limites de débit Telegram (messages/seconde)
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', 3))
+
+# Découpage des longues réponses IA
+RESPONSE_CHUNK_SIZE = int(os.getenv('RESPONSE_CHUNK_SIZE', 4000))  # caractères par message
+RESPONSE_DOCUMENT_THRESHOLD = int(os.getenv('RESPONSE_DOCUMENT_THRESHOLD', 16000))  # au-delà : fichier .md
+
+# Diffusion en direct : un message par réponse, édité au fil de la génération
+STREAMING_ENABLED = os.getenv('STREAMING_ENABLED', 'false').lower() == 'true'
+STREAM_EDIT_INTERVAL = float(os.getenv('STREAM_EDIT_INTERVAL', 1.5))  # secondes min entre deux éditions
+STREAM_FINALIZE_AFTER = float(os.getenv('STREAM_FINALIZE_AFTER', 6))  # secondes sans changement avant finalisation
+
+# Regroupement des messages reçus en rafale (Telegram découpe les longs textes)
+COALESCE_WINDOW = float(os.getenv('COALESCE_WINDOW', 1.5))  # secondes max entre deux fragments
+COALESCE_MAX_DELAY = float(os.getenv('COALESCE_MAX_DELAY', 10))  # attente max depuis le premier fragment
+
+# Configuration du worker d'automatisation GUI
+AUTOMATION_QUEUE_SIZE = int(os.getenv('AUTOMATION_QUEUE_SIZE', 20))  # jobs en attente max
+AUTOMATION_STALL_TIMEOUT = float(os.getenv('AUTOMATION_STALL_TIMEOUT', 120))  # action GUI bloquée au-delà
+
+# File de travaux persistante (prompts et réponses repris après redémarrage)
+JOB_STORE_FILE = os.getenv('JOB_STORE_FILE', 'jobs.db')
+JOB_COMMIT_INTERVAL = float(os.getenv('JOB_COMMIT_INTERVAL', 0.05))  # regroupement des écritures
+JOB_RETENTION = float(os.getenv('JOB_RETENTION', 86400))  # conservation des travaux terminés (idempotence)
+
+# Battement de cœur vers auto_restart.py (uniquement sous supervision)
+HEARTBEAT_INTERVAL = float(os.getenv('HEARTBEAT_INTERVAL', 5))
+
+# Endpoint de métriques Prometheus (local)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9464))
+
+# Pilote GUI : pyautogui (défaut), pynput, ou fake (bureau simulé, sans écran)
+GUI_DRIVER = os.getenv('GUI_DRIVER', 'pyautogui').lower()
+FAKE_GUI_ACTION_LATENCY = float(os.getenv('FAKE_GUI_ACTION_LATENCY', 0.0))  # secondes par clic/raccourci
+FAKE_GUI_TYPE_LATENCY = float(os.getenv('FAKE_GUI_TYPE_LATENCY', 0.0))  # secondes par caractère
+FAKE_GUI_RESPONSE_DELAY = float(os.getenv('FAKE_GUI_RESPONSE_DELAY', 1.0))  # délai avant la réponse simulée
+FAKE_GUI_RESPONSE_CHARS = int(os.getenv('FAKE_GUI_RESPONSE_CHARS', 0))  # taille min de la réponse simulée
+
+# Traçage par requête (spans JSON lines, fichier rotatif)
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+TRACE_MAX_BYTES = int(os.getenv('TRACE_MAX_BYTES', 5_000_000))
+TRACE_BACKUP_COUNT = int(os.getenv('TRACE_BACKUP_COUNT', 3))
+
+# Calibrage automatique par reconnaissance d'image (actif si des modèles existent)
+AUTO_CALIBRATION_TEMPLATES_DIR = os.getenv('AUTO_CALIBRATION_TEMPLATES_DIR', 'templates')
+AUTO_CALIBRATION_CACHE_FILE = os.getenv('AUTO_CALIBRATION_CACHE_FILE', 'calibration_cache.json')
+AUTO_CALIBRATION_THRESHOLD = float(os.getenv('AUTO_CALIBRATION_THRESHOLD', 0.9))
+AUTO_CALIBRATION_SEARCH_INTERVAL = float(os.getenv('AUTO_CALIBRATION_SEARCH_INTERVAL', 30))
+
+# Plusieurs instances VSCode (liste JSON de cibles) ; vide : une seule cible configurée par .env
+KILO_TARGETS_FILE = os.getenv('KILO_TARGETS_FILE', '')
+
+# Métriques : latence de chaque étape du pipeline
+# (réception → file → activation → injection → envoi, capture → diff → diffusion)
+metrics_registry = MetricsRegistry()
+stage_latency = metrics_registry.histogram(
+    'kilo_stage_duration_seconds', "Durée de chaque étape du pipeline", ('stage',)
+)
+stage_errors = metrics_registry.counter(
+    'kilo_stage_errors_total', "Nombre d'échecs par étape du pipeline", ('stage',)
+)
+messages_received_total = metrics_registry.counter(
+    'kilo_telegram_messages_received_total', "Messages Telegram reçus et autorisés"
+)
+prompts_total = metrics_registry.counter(
+    'kilo_prompts_total', "Prompts injectés dans Kilo Code, par résultat", ('result',)
+)
+responses_forwarded_total = metrics_registry.counter(
+    'kilo_responses_forwarded_total', "Réponses IA transmises sur Telegram"
+)
 
-# Contrôleur clavier
-keyboard = Controller()
+
+# Spans par requête, corrélés par l'update_id Telegram d'origine
+tracer = Tracer(TRACE_FILE, enabled=TRACING_ENABLED, max_bytes=TRACE_MAX_BYTES, backup_count=TRACE_BACKUP_COUNT)
+
+
+def observe_automation_job(job_name: str, wait_time: float, duration: float, failed: bool) -> None:
+    """Enregistre l'attente en file de chaque job GUI"""
+    stage_latency.observe(wait_time, stage='queue_wait')
+    if failed:
+        stage_errors.inc(stage=job_name)
+
+
+# Titres de fenêtre VSCode recherchés selon le système
+VSCODE_WINDOW_TITLES = ["Visual Studio Code", "Code"]
+if platform.system().lower() not in ("windows", "darwin"):  # Linux
+    VSCODE_WINDOW_TITLES.append("vscode")
+
+
+def build_targets() -> TargetRegistry:
+    """
+    Construit les cibles VSCode (KILO_TARGETS_FILE, ou cible unique issue de .env)
+
+    Un pilote GUI et un worker par display : les cibles d'un même écran sont
+    sérialisées, celles d'écrans distincts s'exécutent en parallèle.
+    """
+    global TARGETS_ERROR
+
+    # Erreurs signalées par validate_configuration, qui bloque le démarrage
+    errors: List[str] = []
+    specs = [{'name': 'default'}]
+    if KILO_TARGETS_FILE:
+        try:
+            specs = load_target_specs(KILO_TARGETS_FILE)
+        except (OSError, ValueError) as e:
+            errors.append(f"KILO_TARGETS_FILE: {str(e)}")
+
+    registry = TargetRegistry()
+    drivers: Dict[str, Tuple[GuiDriver, AutomationWorker]] = {}
+
+    for index, spec in enumerate(specs):
+        name = spec['name']
+        display = spec.get('display')
+        input_pos = tuple(spec.get('input', (KILO_CODE_INPUT_X, KILO_CODE_INPUT_Y)))
+        send_button_pos = tuple(spec.get('send_button', (KILO_CODE_SEND_BUTTON_X, KILO_CODE_SEND_BUTTON_Y)))
+        response_pos = tuple(spec.get('response', (KILO_CODE_RESPONSE_X, KILO_CODE_RESPONSE_Y)))
+        stop_button_pos = spec.get('stop_button')
+        if stop_button_pos is None and KILO_CODE_STOP_BUTTON_X and KILO_CODE_STOP_BUTTON_Y:
+            stop_button_pos = (int(KILO_CODE_STOP_BUTTON_X), int(KILO_CODE_STOP_BUTTON_Y))
+
+        # Le bureau simulé est propre à chaque cible ; sinon un pilote par display
+        driver_key = name if GUI_DRIVER == 'fake' else (display or '')
+        if driver_key not in drivers:
+            try:
+                driver = create_gui_driver(
+                    GUI_DRIVER,
+                    display=display,
+                    input_pos=input_pos,
+                    send_button_pos=send_button_pos,
+                    response_pos=response_pos,
+                    send_shortcut=KILO_CODE_SEND_SHORTCUT,
+                    action_latency=FAKE_GUI_ACTION_LATENCY,
+                    type_latency=FAKE_GUI_TYPE_LATENCY,
+                    response_delay=FAKE_GUI_RESPONSE_DELAY,
+                    response_chars=FAKE_GUI_RESPONSE_CHARS
+                )
+            except (ValueError, RuntimeError) as e:
+                # Pilote inconnu, display non pris en charge, outil absent
+                errors.append(f"cible '{name}': {str(e)}")
+                continue
+            worker = AutomationWorker(
+                max_queue_size=AUTOMATION_QUEUE_SIZE,
+                name=f"automation-{driver_key or 'main'}",
+                observer=observe_automation_job
+            )
+            drivers[driver_key] = (driver, worker)
+        driver, worker = drivers[driver_key]
+
+        window_title = spec.get('window_title')
+        if isinstance(window_title, str):
+            window_titles = [window_title]
+        else:
+            window_titles = list(window_title or VSCODE_WINDOW_TITLES)
+
+        registry.add(KiloTarget(
+            name, driver, worker, window_titles, input_pos, send_button_pos, response_pos,
+            # Intervalle de monitoring adaptatif
+            scheduler=AdaptivePollScheduler(
+                min_interval=MONITORING_MIN_INTERVAL,
+                max_interval=MONITORING_MAX_INTERVAL,
+                backoff_factor=MONITORING_BACKOFF_FACTOR
+            ),
+            # Dernière réponse IA en mémoire, persistée de façon atomique et différée
+            store=LastResponseStore(
+                LAST_RESPONSE_FILE if index == 0 else f"last_response_{name}.json",
+                debounce_delay=LAST_RESPONSE_SAVE_DELAY
+            ),
+            display=display,
+            locator=AutoLocator(
+                spec.get('templates', AUTO_CALIBRATION_TEMPLATES_DIR),
+                AUTO_CALIBRATION_CACHE_FILE if index == 0 else f"calibration_cache_{name}.json",
+                screen_size=driver.screen_size,
+                grab=driver.grab,
+                threshold=AUTO_CALIBRATION_THRESHOLD,
+                search_interval=AUTO_CALIBRATION_SEARCH_INTERVAL
+            ),
+            stop_button_pos=tuple(stop_button_pos) if stop_button_pos else None
+        ), chat_ids=spec.get('chats', ()))
+
+    TARGETS_ERROR = '; '.join(errors) or None
+    return registry
+
+
+# Instances VSCode pilotées (la première est la cible par défaut)
+TARGETS_ERROR: Optional[str] = None
+targets = build_targets()
+
+# Jauges lues à chaque export
+metrics_registry.gauge(
+    'kilo_automation_queue_depth', "Jobs GUI en attente (toutes cibles)",
+    callback=lambda: sum(worker.queue_depth() for worker in targets.workers())
+)
+metrics_registry.gauge(
+    'kilo_monitor_interval_seconds', "Intervalle courant du monitoring (cible la plus active)",
+    callback=lambda: min((target.scheduler.current_interval for target in targets), default=0.0)
+)
 
 # Statistiques
 stats = {
@@ -67,10 +329,31 @@ stats = {
     'errors': 0
 }
 
-# Cache pour éviter de traiter les mêmes messages en boucle
-processed_messages = set()
-last_message_time = 0
+# Boucle asyncio du bot et diffuseur, initialisés au démarrage (post_init)
+bot_loop: Optional[asyncio.AbstractEventLoop] = None
+broadcaster: Optional[TelegramBroadcaster] = None
+message_coalescer: Optional[MessageCoalescer] = None
+heartbeat: Optional[HeartbeatEmitter] = None
+
+# Caches de déduplication bornés : updates déjà traités, contenus récents par chat
 MESSAGE_COOLDOWN = 2  # secondes entre deux messages identiques
+DEDUP_MAX_ENTRIES = int(os.getenv('DEDUP_MAX_ENTRIES', 10000))
+DEDUP_UPDATE_TTL = float(os.getenv('DEDUP_UPDATE_TTL', 3600))  # secondes
+seen_updates = DedupCache(max_size=DEDUP_MAX_ENTRIES, ttl=DEDUP_UPDATE_TTL)
+recent_contents = DedupCache(max_size=DEDUP_MAX_ENTRIES, ttl=MESSAGE_COOLDOWN)
+
+# Travaux en cours, persistés : la clé tg-<update_id> survit aux redémarrages
+# (base ouverte au lancement du bot, main : un simple import ne crée aucun fichier)
+job_store: Optional[JobStore] = None
+# Attente des prompts repris au démarrage (annulée à l'arrêt, post_stop)
+replay_task: Optional[asyncio.Task] = None
+
+# Marqueur invisible des réponses IA (clé dérivée du token si non configurée)
+LOOP_GUARD_SECRET = os.getenv('LOOP_GUARD_SECRET', '')
+loop_guard = LoopGuard(
+    LOOP_GUARD_SECRET.encode('utf-8') if LOOP_GUARD_SECRET
+    else hashlib.sha256(f"loop-guard:{TELEGRAM_BOT_TOKEN}".encode('utf-8')).digest()
+)
 
 
 def is_user_authorized(user_id: int) -> bool:
@@ -80,34 +363,31 @@ def is_user_authorized(user_id: int) -> bool:
     return user_id in ALLOWED_USER_IDS
 
 
-def find_vscode_window() -> Optional[Tuple[int, int, int, int]]:
+def find_vscode_window(target: Optional[KiloTarget] = None) -> Optional[Tuple[int, int, int, int]]:
     """
-    Recherche la fenêtre VSCode/Code ouverte
+    Recherche la fenêtre VSCode/Code ouverte (via le cache de fenêtre)
+
+    Args:
+        target: Cible VSCode (cible par défaut si None)
 
     Returns:
         Tuple (x, y, width, height) de la fenêtre VSCode, ou None si non trouvée
     """
-    if not WINDOW_DETECTION_AVAILABLE:
+    target = target or targets.default
+    window_cache = target.window_cache
+
+    if window_cache is None:
         logger.warning("Détection de fenêtre non disponible, utilisation des coordonnées par défaut")
         return None
 
     try:
-        system = platform.system().lower()
-
-        # Recherche par titre de fenêtre selon le système
-        if system == "windows":
-            windows = gw.getWindowsWithTitle("Visual Studio Code")
-            windows.extend(gw.getWindowsWithTitle("Code"))
-        elif system == "darwin":  # macOS
-            windows = gw.getWindowsWithTitle("Visual Studio Code")
-            windows.extend(gw.getWindowsWithTitle("Code"))
-        else:  # Linux
-            windows = gw.getWindowsWithTitle("Visual Studio Code")
-            windows.extend(gw.getWindowsWithTitle("Code"))
-            windows.extend(gw.getWindowsWithTitle("vscode"))
-
-        if windows:
-            window = windows[0]  # Prendre la première fenêtre trouvée
+        window = window_cache.get_window()
+
+        if window:
+            # Fenêtre déjà au premier plan : ni activation ni attente
+            if window_cache.is_foreground(window):
+                return window_cache.geometry
+
             if window.isMinimized:
                 logger.info("Fenêtre VSCode minimisée, restauration...")
                 window.restore()
@@ -115,34 +395,38 @@ def find_vscode_window() -> Optional[Tuple[int, int, int, int]]:
             window.activate()
             time.sleep(0.5)  # Attendre l'activation
 
-            x, y, width, height = window.left, window.top, window.width, window.height
+            # La restauration peut modifier la géométrie
+            window_cache.invalidate()
+            if window_cache.get_window() is None:
+                return None
+
+            x, y, width, height = window_cache.geometry
             logger.info(f"Fenêtre VSCode trouvée: {x},{y} ({width}x{height})")
             return (x, y, width, height)
 
     except Exception as e:
         logger.error(f"Erreur lors de la recherche de la fenêtre VSCode: {str(e)}")
+        window_cache.invalidate()
 
-    logger.warning("Fenêtre VSCode non trouvée")
+    logger.warning(f"Fenêtre VSCode non trouvée (cible '{target.name}')")
     return None
 
 
-def is_vscode_active() -> bool:
+def is_vscode_active(target: Optional[KiloTarget] = None) -> bool:
     """
     Vérifie si VSCode est la fenêtre active
 
     Returns:
         True si VSCode est actif, False sinon
     """
-    if not WINDOW_DETECTION_AVAILABLE:
+    target = target or targets.default
+    if target.window_cache is None:
         return True  # Supposer que c'est actif si on ne peut pas vérifier
 
     try:
-        system = platform.system().lower()
-        active_window = gw.getActiveWindow()
-
-        if active_window:
-            title = active_window.title.lower()
-            return "visual studio code" in title or "code" in title
+        window = target.window_cache.get_window()
+        if window:
+            return target.window_cache.is_foreground(window)
 
     except Exception as e:
         logger.error(f"Erreur lors de la vérification de la fenêtre active: {str(e)}")
@@ -150,29 +434,28 @@ def is_vscode_active() -> bool:
     return False
 
 
-def ensure_vscode_active() -> bool:
+def ensure_vscode_active(target: Optional[KiloTarget] = None) -> bool:
     """
     S'assure que VSCode est actif et visible
 
     Returns:
         True si VSCode est prêt, False sinon
     """
-    logger.info("Vérification de la présence de VSCode...")
+    target = target or targets.default
 
-    # Recherche de la fenêtre VSCode
-    window_info = find_vscode_window()
+    # Recherche de la fenêtre VSCode (cache + activation si nécessaire)
+    window_info = find_vscode_window(target)
 
     if window_info:
         # Vérifier si VSCode est actif
-        if not is_vscode_active():
+        if not is_vscode_active(target):
             logger.info("Activation de la fenêtre VSCode...")
-            if window_info:
-                x, y, width, height = window_info
-                # Cliquer au centre de la fenêtre pour l'activer
-                center_x = x + (width // 2)
-                center_y = y + (height // 2)
-                pyautogui.click(center_x, center_y)
-                time.sleep(1.0)
+            x, y, width, height = window_info
+            # Cliquer au centre de la fenêtre pour l'activer
+            center_x = x + (width // 2)
+            center_y = y + (height // 2)
+            target.gui.click(center_x, center_y)
+            time.sleep(1.0)
 
         return True
 
@@ -180,77 +463,219 @@ def ensure_vscode_active() -> bool:
     return False
 
 
-def load_last_response() -> str:
-    """Charge la dernière réponse connue depuis le fichier"""
-    try:
-        if os.path.exists(LAST_RESPONSE_FILE):
-            with open(LAST_RESPONSE_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('last_response', '')
-    except Exception as e:
-        logger.error(f"Erreur lors du chargement de la dernière réponse: {str(e)}")
-    return ''
+def locate_elements(target: KiloTarget, *elements: str, verify: bool = True) -> None:
+    """
+    Recale les coordonnées de la cible par reconnaissance d'image
 
+    Sans modèle, ou si l'élément n'est pas retrouvé, les coordonnées actuelles
+    (.env, targets.json ou dernier calibrage) sont conservées. VSCode doit être
+    actif : la géométrie de sa fenêtre sert de référence.
 
-def save_last_response(response: str) -> None:
-    """Sauvegarde la dernière réponse dans un fichier"""
-    try:
-        with open(LAST_RESPONSE_FILE, 'w', encoding='utf-8') as f:
-            json.dump({'last_response': response, 'timestamp': time.time()}, f)
-    except Exception as e:
-        logger.error(f"Erreur lors de la sauvegarde de la dernière réponse: {str(e)}")
+    Args:
+        target: Cible VSCode
+        elements: 'input', 'send_button' et/ou 'response'
+        verify: Vérifier les positions en cache avant de les utiliser
+    """
+    locator = target.locator
+    if locator is None or not locator.enabled:
+        return
+
+    window_rect = target.window_cache.geometry if target.window_cache is not None else None
+    for element in elements:
+        with tracer.span('locate', element=element):
+            point = locator.locate(element, window_rect, verify=verify)
+        attribute = f"{element}_pos"
+        if point is not None and point != getattr(target, attribute):
+            logger.info(f"Coordonnées '{element}' recalées: {getattr(target, attribute)} -> {point}")
+            setattr(target, attribute, point)
 
 
-def get_kilo_code_response() -> Optional[str]:
+def get_kilo_code_response(target: Optional[KiloTarget] = None,
+                           region_detector: Optional[RegionChangeDetector] = None) -> Optional[str]:
     """
     Extrait la réponse de l'IA depuis l'interface Kilo Code
 
+    Args:
+        target: Cible (cible par défaut si None)
+        region_detector: Empreinte de la zone de réponse, relevée juste avant
+            la copie : ce qui s'affiche ensuite sera vu au cycle suivant
+
     Returns:
         Le texte de la réponse ou None si aucune nouvelle réponse
     """
+    target = target or targets.default
+    gui = target.gui
+
     try:
         # S'assurer que VSCode est actif
-        if not ensure_vscode_active():
+        if not ensure_vscode_active(target):
             logger.error("VSCode non actif")
             return None
 
-        logger.info(f"Clic sur la zone de réponse ({KILO_CODE_RESPONSE_X}, {KILO_CODE_RESPONSE_Y})")
+        # Position revérifiée seulement si la capture précédente a échoué
+        locate_elements(target, 'response', verify=target.capture_failed)
+
+        response_x, response_y = target.response_pos
+        logger.info(f"Clic sur la zone de réponse ({response_x}, {response_y})")
         # Cliquer sur la zone de réponse pour la sélectionner
-        pyautogui.click(KILO_CODE_RESPONSE_X, KILO_CODE_RESPONSE_Y)
+        gui.click(response_x, response_y)
         time.sleep(ACTION_DELAY * 0.5)
 
         # Copier le texte (sélectionner tout + copier)
         logger.info(f"Utilisation du raccourci: {KILO_CODE_COPY_SHORTCUT}")
-        keys = KILO_CODE_COPY_SHORTCUT.split(',')
-        for key_combo in keys:
-            key_combo = key_combo.strip()
+        keys = [key_combo.strip() for key_combo in KILO_CODE_COPY_SHORTCUT.split(',')]
+        before_copy = None
+        for index, key_combo in enumerate(keys):
+            if region_detector and index == len(keys) - 1:
+                # Empreinte juste avant la copie (sélection faite), dans la zone éventuellement recalée
+                region_detector.region = region_around(*target.response_pos, RESPONSE_ROI_WIDTH, RESPONSE_ROI_HEIGHT)
+                before_copy = region_detector.digest()
             if '+' in key_combo:
-                pyautogui.hotkey(*key_combo.split('+'))
+                gui.hotkey(*key_combo.split('+'))
             else:
-                pyautogui.press(key_combo)
+                gui.press(key_combo)
             time.sleep(0.1)
 
         # Récupérer le texte depuis le presse-papiers
-        response_text = pyperclip.paste().strip()
+        response_text = gui.get_clipboard().strip()
+
+        # Ce qui s'est affiché pendant la copie n'est pas dans le texte copié :
+        # la référence est alors invalidée pour que le cycle suivant le capture
+        if region_detector:
+            region_detector.settle(before_copy)
 
         logger.info(f"Texte extrait ({len(response_text) if response_text else 0} caractères): {response_text[:100] if response_text else 'Aucun'}...")
 
         if response_text and len(response_text) > 10:  # Filtrer les réponses trop courtes
+            target.capture_failed = False
             return response_text
 
+        target.capture_failed = True
+
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction de la réponse: {str(e)}")
 
     return None
 
 
-def force_send_response(context: ContextTypes.DEFAULT_TYPE, text: str) -> bool:
+def start_change_watchers() -> None:
+    """
+    Démarre l'écoute des événements X11 de chaque cible
+
+    Une cible écoutée n'est plus interrogée qu'au plus toutes les
+    X11_EVENTS_MAX_INTERVAL secondes au repos (polling de secours) ; les autres
+    gardent le polling adaptatif.
+    """
+    if not X11_EVENTS_ENABLED or GUI_DRIVER == 'fake' or not sys.platform.startswith('linux'):
+        return
+
+    for target in targets:
+        watcher = X11ChangeWatcher.create(
+            target.display, target.window_titles,
+            lambda source, target=target: target.scheduler.wake(),
+            region=lambda target=target: region_around(*target.response_pos, RESPONSE_ROI_WIDTH, RESPONSE_ROI_HEIGHT),
+            min_wake_interval=MONITORING_MIN_INTERVAL,
+            name=f"x11-events-{target.name}"
+        )
+        if watcher is None:
+            continue
+
+        target.change_watcher = watcher
+        target.scheduler.max_interval = max(target.scheduler.max_interval, X11_EVENTS_MAX_INTERVAL)
+        watcher.start()
+
+
+def run_on_bot_loop(coro, timeout: Optional[float] = None):
+    """
+    Exécute une coroutine sur la boucle du bot depuis un thread (monitoring)
+
+    Returns:
+        Le résultat de la coroutine
+    """
+    if bot_loop is None:
+        coro.close()
+        raise RuntimeError("Boucle du bot non démarrée")
+    return asyncio.run_coroutine_threadsafe(coro, bot_loop).result(timeout)
+
+
+def format_ia_response(text: str) -> List[str]:
     """
-    Force l'envoi d'une réponse sur Telegram (même courte)
+    Formate une réponse IA pour Telegram, découpée en messages d'au plus RESPONSE_CHUNK_SIZE caractères
+
+    Returns:
+        La liste ordonnée des messages à envoyer
+    """
+    # Place réservée au marqueur anti-boucle (limite Telegram : 4096 caractères)
+    chunks = split_message(text, RESPONSE_CHUNK_SIZE - loop_guard.mark_length)
+
+    # ⚠️ IMPORTANT : TOUJOURS marquer comme réponse IA pour éviter la boucle
+    if len(chunks) == 1:
+        return [loop_guard.mark(f"🤖 **Réponse de Kilo Code:**\n\n{text}")]
+
+    logger.info(f"Réponse découpée en {len(chunks)} messages")
+    return [
+        loop_guard.mark(f"🤖 **Réponse de Kilo Code ({index}/{len(chunks)}):**\n\n{chunk}")
+        for index, chunk in enumerate(chunks, 1)
+    ]
+
+
+async def broadcast_ia_response(text: str, chat_ids: Optional[List[int]] = None) -> bool:
+    """
+    Diffuse une réponse IA à tous les utilisateurs autorisés, en parallèle
+
+    Les longues réponses sont envoyées en plusieurs messages ordonnés ; au-delà de
+    RESPONSE_DOCUMENT_THRESHOLD, la réponse complète part en pièce jointe .md.
+
+    Args:
+        text: La réponse IA
+        chat_ids: Destinataires (tous les utilisateurs autorisés si None)
+
+    Returns:
+        True si au moins un utilisateur l'a reçue, False sinon
+    """
+    chat_ids = ALLOWED_USER_IDS if chat_ids is None else chat_ids
+    if not chat_ids:
+        logger.info("Aucun destinataire pour cette réponse")
+        return True
+
+    if len(text) > RESPONSE_DOCUMENT_THRESHOLD:
+        logger.info(f"Réponse de {len(text)} caractères envoyée en document, à {len(chat_ids)} utilisateur(s)")
+        result = await broadcaster.broadcast(
+            chat_ids,
+            method=broadcaster.bot.send_document,
+            document=text.encode('utf-8'),
+            filename='reponse_kilo_code.md',
+            caption=loop_guard.mark(f"🤖 **Réponse de Kilo Code:** {len(text)} caractères"),
+            parse_mode='Markdown'
+        )
+    else:
+        messages = format_ia_response(text)
+        logger.info(f"Message formaté, envoi à {len(chat_ids)} utilisateur(s)")
+        result = await broadcaster.broadcast_batch(
+            chat_ids,
+            [{'text': message, 'parse_mode': 'Markdown'} for message in messages]
+        )
+
+    for user_id, error in result.errors.items():
+        logger.error(f"Erreur lors de l'envoi à l'utilisateur {user_id}: {str(error)}")
+
+    if result.success_count > 0:
+        logger.info(f"✓ Réponse IA envoyée sur Telegram à {result.success_count} utilisateur(s)")
+        return True
+
+    logger.error("Aucun message n'a pu être envoyé sur Telegram")
+    return False
+
+
+def force_send_response(context: ContextTypes.DEFAULT_TYPE, text: str,
+                        chat_ids: Optional[List[int]] = None) -> bool:
+    """
+    Force l'envoi d'une réponse sur Telegram (même courte), depuis un thread
 
     Args:
         context: Le contexte Telegram
         text: Le texte à envoyer (peut être court)
+        chat_ids: Destinataires (tous les utilisateurs autorisés si None)
 
     Returns:
         True si l'envoi a réussi, False sinon
@@ -261,39 +686,7 @@ def force_send_response(context: ContextTypes.DEFAULT_TYPE, text: str) -> bool:
             return False
 
         logger.info(f"Préparation de l'envoi Telegram: {len(text)} caractères")
-
-        # Tronquer le texte s'il est trop long (limite Telegram)
-        if len(text) > 4000:
-            text = text[:3997] + "..."
-            logger.info("Texte tronqué à 4000 caractères")
-
-        # ⚠️ IMPORTANT : TOUJOURS identifier comme réponse IA pour éviter la boucle
-        ia_response = f"🤖 **Réponse de Kilo Code:**\n\n{text}"
-
-        logger.info(f"Message formaté, envoi à {len(ALLOWED_USER_IDS)} utilisateur(s)")
-
-        # Envoyer à tous les utilisateurs autorisés
-        success_count = 0
-        for user_id in ALLOWED_USER_IDS:
-            try:
-                logger.info(f"Envoi à l'utilisateur {user_id}...")
-                context.bot.send_message(
-                    chat_id=user_id,
-                    text=ia_response,
-                    parse_mode='Markdown'
-                )
-                success_count += 1
-                logger.info(f"✓ Message envoyé avec succès à {user_id}")
-                time.sleep(0.5)  # Éviter le rate limiting
-            except Exception as e:
-                logger.error(f"Erreur lors de l'envoi à l'utilisateur {user_id}: {str(e)}")
-
-        if success_count > 0:
-            logger.info(f"✓ Réponse forcée envoyée sur Telegram à {success_count} utilisateur(s)")
-            return True
-        else:
-            logger.error("Aucun message n'a pu être envoyé sur Telegram")
-            return False
+        return run_on_bot_loop(broadcast_ia_response(text, chat_ids))
 
     except Exception as e:
         logger.error(f"Erreur générale lors de l'envoi Telegram: {str(e)}")
@@ -302,7 +695,7 @@ def force_send_response(context: ContextTypes.DEFAULT_TYPE, text: str) -> bool:
 
 def send_to_telegram(context: ContextTypes.DEFAULT_TYPE, text: str) -> bool:
     """
-    Envoie un message sur Telegram (TOUJOURS depuis l'IA)
+    Envoie un message sur Telegram (TOUJOURS depuis l'IA), depuis un thread
 
     Args:
         context: Le contexte Telegram
@@ -311,145 +704,327 @@ def send_to_telegram(context: ContextTypes.DEFAULT_TYPE, text: str) -> bool:
     Returns:
         True si l'envoi a réussi, False sinon
     """
-    try:
-        if not text or len(text) < 2:
-            return False
-
-        # Tronquer le texte s'il est trop long (limite Telegram)
-        if len(text) > 4000:
-            text = text[:3997] + "..."
-
-        # ⚠️ IMPORTANT : TOUJOURS identifier comme réponse IA pour éviter la boucle
-        ia_response = f"🤖 **Réponse de Kilo Code:**\n\n{text}"
-
-        # Envoyer à tous les utilisateurs autorisés
-        success_count = 0
-        for user_id in ALLOWED_USER_IDS:
-            try:
-                context.bot.send_message(
-                    chat_id=user_id,
-                    text=ia_response,
-                    parse_mode='Markdown'
-                )
-                success_count += 1
-                time.sleep(0.5)  # Éviter le rate limiting
-            except Exception as e:
-                logger.error(f"Erreur lors de l'envoi à l'utilisateur {user_id}: {str(e)}")
-
-        if success_count > 0:
-            logger.info(f"✓ Réponse IA envoyée sur Telegram à {success_count} utilisateur(s)")
-            return True
-        else:
-            logger.error("Aucun message n'a pu être envoyé sur Telegram")
-            return False
-
-    except Exception as e:
-        logger.error(f"Erreur générale lors de l'envoi Telegram: {str(e)}")
+    if not text or len(text) < 2:
         return False
 
+    return force_send_response(context, text)
 
-def monitor_kilo_code_responses(context: ContextTypes.DEFAULT_TYPE) -> None:
+
+def monitor_kilo_code_responses(context: ContextTypes.DEFAULT_TYPE, target: Optional[KiloTarget] = None) -> None:
     """
     Surveille les réponses de l'IA dans Kilo Code et les envoie sur Telegram
+
+    Args:
+        context: Le contexte Telegram
+        target: Cible surveillée (cible par défaut si None) ; les réponses vont
+            aux chats routés vers elle
     """
-    logger.info("Démarrage du monitoring IA...")
+    target = target or targets.default
+    monitor_scheduler = target.scheduler
+    last_response_store = target.store
+    logger.info(f"Démarrage du monitoring IA (cible '{target.name}')...")
+
+    # Référence en mémoire : seule la partie nouvelle des captures est transmise
+    # (le fichier n'est lu qu'ici, au démarrage)
+    tracker = IncrementalResponseTracker(initial_text=last_response_store.load())
+    logger.info(f"Dernière réponse connue: {len(tracker.last_text)} caractères")
+
+    # Empreinte de la zone de réponse : pas de capture presse-papiers si rien n'a bougé
+    region_detector = None
+    if RESPONSE_ROI_ENABLED:
+        region_detector = RegionChangeDetector(
+            region_around(*target.response_pos, RESPONSE_ROI_WIDTH, RESPONSE_ROI_HEIGHT),
+            grab=target.gui.grab
+        )
+
+    # Réponse partielle retenue en mémoire jusqu'à la fin de la génération
+    # (la diffusion en direct transmet au contraire chaque étape)
+    completion = None
+    if COMPLETION_DETECTION_ENABLED and not STREAMING_ENABLED:
+        cue = None
+        if target.stop_button_pos and target.locator:
+            cue = GenerationCue.load(
+                os.path.join(target.locator.templates_dir, 'stop_button.png'),
+                region_around(*target.stop_button_pos, COMPLETION_CUE_WIDTH, COMPLETION_CUE_HEIGHT),
+                grab=target.gui.grab,
+                threshold=AUTO_CALIBRATION_THRESHOLD
+            )
+        completion = ResponseCompletionDetector(
+            stable_samples=COMPLETION_STABLE_SAMPLES,
+            quiet_period=COMPLETION_QUIET_PERIOD,
+            max_wait=COMPLETION_MAX_WAIT,
+            cue=cue,
+            sample_interval=MONITORING_MIN_INTERVAL
+        )
+        logger.info(f"Détection de fin de réponse (indice visuel: {'oui' if cue else 'non'})")
+
+    # Message en direct de la réponse en cours (STREAMING_ENABLED)
+    live_stream = None
+    stream_text = ''
+    stream_updated_at = 0.0
 
     while True:
         try:
             if not MONITORING_ENABLED:
                 logger.info("Monitoring désactivé, pause...")
-                time.sleep(MONITORING_INTERVAL)
+                time.sleep(MONITORING_MAX_INTERVAL)
+                continue
+
+            # Plus de changement depuis STREAM_FINALIZE_AFTER : réponse terminée
+            if live_stream and time.monotonic() - stream_updated_at >= STREAM_FINALIZE_AFTER:
+                logger.info(f"Finalisation du message en direct ({len(stream_text)} caractères)")
+                run_on_bot_loop(live_stream.finalize(stream_text.strip()))
+                live_stream = None
+
+            # Zone de réponse inchangée : rien à capturer
+            if region_detector:
+                with stage_latency.time(stage='monitor_probe'):
+                    region_changed = region_detector.has_changed()
+            pending_unchanged = bool(region_detector and not region_changed and completion and completion.pending)
+            if region_detector and not region_changed and not pending_unchanged:
+                logger.debug("Zone de réponse inchangée, capture ignorée")
+                monitor_scheduler.notify_idle()
+                monitor_scheduler.wait()
                 continue
 
-            logger.info(f"Cycle de monitoring (intervalle: {MONITORING_INTERVAL}s)")
+            logger.info(f"Cycle de monitoring (intervalle: {monitor_scheduler.current_interval:.2f}s)")
+            retry_capture = False
 
-            # Charger la dernière réponse connue
-            last_response = load_last_response()
-            logger.info(f"Dernière réponse connue: {len(last_response) if last_response else 0} caractères")
+            # Les spans du cycle sont rattachés au dernier prompt injecté
+            tracer.start_trace(target.last_prompt_trace_id)
 
-            # Extraire la réponse actuelle depuis Kilo Code
-            current_response = get_kilo_code_response()
+            if pending_unchanged:
+                # Zone inchangée depuis la capture retenue : même texte, sans nouvelle capture
+                current_response = completion.pending
+            else:
+                # Extraire la réponse actuelle depuis Kilo Code (via le worker GUI)
+                try:
+                    with target.mute_change_events(), tracer.span('capture'), \
+                            stage_latency.time(stage='monitor_capture'):
+                        current_response = target.worker.submit(
+                            get_kilo_code_response, target, region_detector,
+                            name=f'capture_reponse_{target.name}'
+                        ).result()
+                except QueueFullError:
+                    logger.info("File d'automatisation pleine, capture reportée")
+                    current_response = None
+                    retry_capture = True
 
             if current_response:
                 logger.info(f"Réponse actuelle extraite: {len(current_response)} caractères")
 
-                # Vérifier si c'est une nouvelle réponse
-                if current_response != last_response:
-                    logger.info("NOUVELLE réponse détectée!")
-
-                    # Utiliser force_send_response pour envoyer même les réponses courtes
-                    logger.info("Envoi de la réponse sur Telegram...")
-                    success = force_send_response(context, current_response)
+                # Calculer uniquement le texte ajouté depuis la dernière capture
+                with stage_latency.time(stage='monitor_diff'):
+                    if last_response_store.matches(current_response):
+                        new_text = ''
+                    else:
+                        new_text = tracker.compute_delta(current_response)
+
+                if new_text.strip() and completion and not completion.observe(current_response):
+                    # Génération en cours : réponse retenue jusqu'à ce qu'elle soit stable
+                    logger.info(f"Réponse en cours ({len(new_text)} caractères nouveaux, "
+                                f"{completion.stable_count} capture(s) identique(s)), envoi différé")
+                    # Intervalle inchangé pendant la génération (un réveil immédiat
+                    # compterait une capture identique sans délai), allongé ensuite
+                    if completion.stable_count > 1:
+                        monitor_scheduler.notify_idle()
+                elif new_text.strip():
+                    logger.info(f"NOUVEAU texte détecté: {len(new_text)} caractères")
+                    # La réponse grandit encore : garder un intervalle court
+                    monitor_scheduler.notify_activity()
+
+                    if STREAMING_ENABLED:
+                        # Mise à jour du message en direct (créé au premier texte)
+                        if live_stream is None:
+                            live_stream = LiveResponseStream(
+                                broadcaster, targets.chats_for(target, ALLOWED_USER_IDS),
+                                chunk_size=RESPONSE_CHUNK_SIZE - loop_guard.mark_length,
+                                min_edit_interval=STREAM_EDIT_INTERVAL,
+                                mark=loop_guard.mark
+                            )
+                            stream_text = ''
+                        stream_updated_at = time.monotonic()
+                        try:
+                            with tracer.span('broadcast', streaming=True, chars=len(new_text)), \
+                                    stage_latency.time(stage='monitor_broadcast'):
+                                run_on_bot_loop(live_stream.update((stream_text + new_text).strip()))
+                            # Texte cumulé seulement après livraison : en cas d'échec,
+                            # la capture suivante renvoie le même delta
+                            stream_text += new_text
+                            success = True
+                        except Exception as e:
+                            logger.error(f"Erreur lors de la mise à jour du message en direct: {str(e)}")
+                            success = False
+                    else:
+                        # Réponse enregistrée avant l'envoi : rediffusée si le bot redémarre entre-temps
+                        # (une capture déjà vue remplace l'ancien travail et son texte)
+                        job_key = f"resp-{target.name}-{text_digest(current_response)}"
+                        job_store.add(job_key, KIND_RESPONSE,
+                                      {'text': new_text.strip(), 'capture': current_response},
+                                      target=target.name, replace=True)
+                        job_store.set_status(job_key, STATUS_SENDING, durable=True)
+
+                        # Utiliser force_send_response pour envoyer même les réponses courtes
+                        logger.info("Envoi de la réponse sur Telegram...")
+                        with tracer.span('broadcast', streaming=False, chars=len(new_text)), \
+                                stage_latency.time(stage='monitor_broadcast'):
+                            success = force_send_response(
+                                context, new_text.strip(), targets.chats_for(target, ALLOWED_USER_IDS)
+                            )
+                        job_store.set_status(job_key, STATUS_DONE if success else STATUS_FAILED, durable=True)
 
                     if success:
+                        responses_forwarded_total.inc()
                         logger.info("Réponse envoyée avec succès, sauvegarde...")
-                        # Sauvegarder cette réponse comme dernière connue
-                        save_last_response(current_response)
+                        # Sauvegarder cette capture comme dernière connue
+                        tracker.commit(current_response)
+                        last_response_store.update(current_response)
                     else:
                         logger.error("Échec de l'envoi sur Telegram")
+                        stage_errors.inc(stage='monitor_broadcast')
+                        retry_capture = True
                 else:
-                    logger.info("Réponse identique à la précédente, ignorée")
+                    logger.info("Aucun texte nouveau depuis la dernière capture, ignorée")
+                    if completion:
+                        completion.reset()
+                    if not last_response_store.matches(current_response):
+                        tracker.commit(current_response)
+                        last_response_store.update(current_response)
+                    monitor_scheduler.notify_idle()
             else:
                 logger.info("Aucune réponse extraite")
+                monitor_scheduler.notify_idle()
+
+            # La référence de la zone est reprise par la capture elle-même ; en
+            # cas d'échec, elle est invalidée pour retenter au prochain cycle
+            if region_detector and retry_capture:
+                region_detector.invalidate()
 
             # Attendre avant la prochaine vérification
-            logger.info(f"Attente de {MONITORING_INTERVAL} secondes...")
-            time.sleep(MONITORING_INTERVAL)
+            logger.info(f"Attente de {monitor_scheduler.current_interval:.2f} secondes...")
+            monitor_scheduler.wait()
 
         except Exception as e:
             logger.error(f"Erreur dans le monitoring: {str(e)}")
-            time.sleep(MONITORING_INTERVAL)
+            monitor_scheduler.notify_idle()
+            monitor_scheduler.wait()
 
 
-def send_to_kilo_code(text: str) -> bool:
+def resolve_injection_mode(text: str) -> str:
+    """
+    Détermine la stratégie d'injection à utiliser pour un texte
+
+    Returns:
+        'paste' ou 'type'
+    """
+    if INJECTION_MODE in ('paste', 'type'):
+        return INJECTION_MODE
+
+    # Mode auto : la frappe ne gère ni les longs textes ni les caractères non ASCII
+    if len(text) > PASTE_THRESHOLD or not text.isascii():
+        return 'paste'
+    return 'type'
+
+
+def paste_text(text: str, gui: GuiDriver) -> None:
+    """Colle le texte en un seul raccourci puis restaure le presse-papiers"""
+    try:
+        previous_clipboard = gui.get_clipboard()
+    except Exception as e:
+        logger.warning(f"Lecture du presse-papiers impossible: {str(e)}")
+        previous_clipboard = None
+
+    gui.set_clipboard(text)
+    gui.hotkey(*[key.strip() for key in PASTE_SHORTCUT.split('+')])
+    time.sleep(0.1)  # Laisser VSCode lire le presse-papiers avant de le restaurer
+
+    if previous_clipboard is not None:
+        try:
+            gui.set_clipboard(previous_clipboard)
+        except Exception as e:
+            logger.warning(f"Restauration du presse-papiers impossible: {str(e)}")
+
+
+def inject_text(text: str, gui: GuiDriver) -> None:
+    """Insère le texte dans le champ actif selon INJECTION_MODE"""
+    mode = resolve_injection_mode(text)
+    logger.info(f"Saisie du texte (mode: {mode}, {len(text)} caractères)...")
+
+    if mode == 'paste':
+        paste_text(text, gui)
+    else:
+        gui.write(text, interval=0.005)
+
+
+def send_to_kilo_code(text: str, target: Optional[KiloTarget] = None) -> bool:
     """
     Envoie le texte à l'extension Kilo Code de VSCode
 
     Args:
         text: Le texte à envoyer
+        target: Cible VSCode (cible par défaut si None)
 
     Returns:
         True si l'envoi a réussi, False sinon
     """
+    target = target or targets.default
+    gui = target.gui
+
     try:
-        logger.info(f"Envoi du texte vers Kilo Code: {text[:50]}...")
+        logger.info(f"Envoi du texte vers Kilo Code ({target.name}): {text[:50]}...")
 
         # Étape 1: Vérifier et activer VSCode (une seule fois)
-        if not ensure_vscode_active():
+        with tracer.span('ensure_vscode_active', target=target.name), stage_latency.time(stage='window_activation'):
+            vscode_ready = ensure_vscode_active(target)
+        if not vscode_ready:
             logger.error("Impossible d'activer VSCode")
+            stage_errors.inc(stage='window_activation')
             return False
 
-        # Étape 2: Cliquer sur le champ de texte de Kilo Code
-        logger.info(f"Clic sur le champ texte ({KILO_CODE_INPUT_X}, {KILO_CODE_INPUT_Y})")
-        pyautogui.click(KILO_CODE_INPUT_X, KILO_CODE_INPUT_Y)
-        time.sleep(ACTION_DELAY)
-
-        # Étape 3: Sélectionner tout le texte existant et le supprimer (optimisé)
-        pyautogui.hotkey('ctrl', 'a')
-        time.sleep(0.1)  # Réduit de 0.2 à 0.1
-        pyautogui.press('delete')
-        time.sleep(0.1)  # Réduit de 0.2 à 0.1
-
-        # Étape 4: Taper le nouveau texte (vitesse optimisée)
-        logger.info("Saisie du texte...")
-        pyautogui.write(text, interval=0.005)  # Augmenté la vitesse de 0.01 à 0.005
+        # Étape 2: Cliquer sur le champ de texte de Kilo Code (position vérifiée si calibrage automatique)
+        locate_elements(target, 'input')
+        input_x, input_y = target.input_pos
+        logger.info(f"Clic sur le champ texte ({input_x}, {input_y})")
+        with tracer.span('click'):
+            gui.click(input_x, input_y)
+            time.sleep(ACTION_DELAY)
+
+            # Étape 3: Sélectionner tout le texte existant et le supprimer (optimisé)
+            gui.hotkey('ctrl', 'a')
+            time.sleep(0.1)  # Réduit de 0.2 à 0.1
+            gui.press('delete')
+            time.sleep(0.1)  # Réduit de 0.2 à 0.1
+
+        # Étape 4: Insérer le nouveau texte (collage ou frappe)
+        with tracer.span('type', mode=resolve_injection_mode(text), chars=len(text)), \
+                stage_latency.time(stage='injection'):
+            inject_text(text, gui)
         time.sleep(ACTION_DELAY)
 
         # Étape 5: Envoyer le message (logique optimisée)
         logger.info("Envoi du message...")
-        if KILO_CODE_SEND_SHORTCUT and KILO_CODE_SEND_SHORTCUT.lower() != 'none':
-            # Utiliser le raccourci clavier
-            keys = KILO_CODE_SEND_SHORTCUT.split('+')
-            if len(keys) == 2:
-                pyautogui.hotkey(keys[0].strip(), keys[1].strip())
+        with tracer.span('send'), stage_latency.time(stage='send'):
+            if KILO_CODE_SEND_SHORTCUT and KILO_CODE_SEND_SHORTCUT.lower() != 'none':
+                # Utiliser le raccourci clavier
+                keys = KILO_CODE_SEND_SHORTCUT.split('+')
+                if len(keys) == 2:
+                    gui.hotkey(keys[0].strip(), keys[1].strip())
+                else:
+                    gui.press(keys[0].strip())
             else:
-                pyautogui.press(keys[0].strip())
-        else:
-            # Cliquer sur le bouton Envoyer
-            pyautogui.click(KILO_CODE_SEND_BUTTON_X, KILO_CODE_SEND_BUTTON_Y)
+                # Cliquer sur le bouton Envoyer
+                locate_elements(target, 'send_button')
+                gui.click(*target.send_button_pos)
 
         time.sleep(ACTION_DELAY * 0.5)  # Réduit le délai final
         logger.info("✓ Message envoyé avec succès")
+
+        # Les captures suivantes sont rattachées à ce prompt
+        target.last_prompt_trace_id = current_trace_id.get()
+
+        # Une réponse est attendue : le monitoring passe en interrogation rapide
+        target.scheduler.notify_activity()
+        target.scheduler.wake()
         return True
 
     except Exception as e:
@@ -457,6 +1032,14 @@ def send_to_kilo_code(text: str) -> bool:
         return False
 
 
+def run_prompt_job(job_key: str, text: str, target: KiloTarget) -> bool:
+    """Injecte un prompt enregistré (queued -> injecting -> done/failed), dans le worker GUI"""
+    job_store.set_status(job_key, STATUS_INJECTING, durable=True)
+    success = send_to_kilo_code(text, target)
+    job_store.set_status(job_key, STATUS_DONE if success else STATUS_FAILED, durable=True)
+    return success
+
+
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Commande /start"""
     user_id = update.effective_user.id
@@ -483,6 +1066,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 **Nouvelles commandes (Monitoring IA):**
 /monitor_status - État du monitoring IA
 /monitor_toggle - Activer/désactiver le monitoring
+/target - Lister ou choisir l'instance VSCode pilotée
 
 **Utilisation:**
 • Envoyez votre texte → automatiquement inséré dans Kilo Code
@@ -502,6 +1086,9 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_text("❌ Accès refusé.")
         return
     
+    target = targets.target_for(update.effective_chat.id)
+    worker_stats = target.worker.get_stats()
+    job_counts = job_store.counts()
     status_message = f"""
 📊 **Statistiques du Bot**
 
@@ -512,7 +1099,12 @@ Erreurs: {stats['errors']}
 🔒 Mode sécurité: {'Activé' if SECURITY_MODE else 'Désactivé'}
 👥 Utilisateurs autorisés: {len(ALLOWED_USER_IDS)}
 🤖 Monitoring IA: {'Activé' if MONITORING_ENABLED else 'Désactivé'}
-⏱️ Intervalle monitoring: {MONITORING_INTERVAL}s
+🎯 Cible: {target.name} ({len(targets)} au total)
+⏱️ Intervalle monitoring: {target.scheduler.current_interval:.2f}s
+📥 File d'automatisation: {worker_stats['queue_depth']}/{worker_stats['queue_max_size']}
+⌛ Attente en file: {worker_stats['last_wait']:.2f}s (moy. {worker_stats['avg_wait']:.2f}s, max {worker_stats['max_wait']:.2f}s)
+♻️ Doublons ignorés: {seen_updates.duplicates + recent_contents.duplicates}
+🗃️ Travaux persistés: {job_counts.get(STATUS_QUEUED, 0)} en file, {job_counts.get(STATUS_FAILED, 0)} en échec
     """
     
     await update.message.reply_text(status_message, parse_mode='Markdown')
@@ -550,6 +1142,10 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 - /monitor_toggle - Activer/désactiver le monitoring
 - /test_monitoring - Tester l'envoi des réponses IA
 
+**Plusieurs instances VSCode:**
+- /target - Lister les cibles (KILO_TARGETS_FILE)
+- /target <nom> - Router ce chat vers une cible
+
 **Conseils:**
 - Utilisez /test pour vérifier la configuration
 - Utilisez /test_monitoring pour tester le monitoring IA
@@ -576,7 +1172,12 @@ async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     await update.message.reply_text("🧪 Test en cours...")
 
     test_text = "Test automatique depuis Telegram"
-    success = send_to_kilo_code(test_text)
+    target = targets.target_for(update.effective_chat.id)
+    try:
+        success = await target.worker.submit_async(send_to_kilo_code, test_text, target)
+    except QueueFullError:
+        await update.message.reply_text("⏳ File d'automatisation pleine, réessayez plus tard.")
+        return
 
     if success:
         await update.message.reply_text("✅ Test réussi! Le message a été envoyé à Kilo Code.")
@@ -597,15 +1198,12 @@ async def test_monitoring_command(update: Update, context: ContextTypes.DEFAULT_
     # Test de la fonction d'extraction de réponse
     test_response = "Ceci est un test de réponse IA pour vérifier le monitoring"
 
-    # Sauvegarder temporairement la dernière réponse
-    original_last = load_last_response()
-
-    # Tester l'envoi direct
-    success = force_send_response(context, test_response)
-
-    # Restaurer la dernière réponse originale
-    if original_last:
-        save_last_response(original_last)
+    # Tester l'envoi direct (la dernière réponse connue n'est pas modifiée)
+    try:
+        success = await broadcast_ia_response(test_response, [update.effective_chat.id])
+    except Exception as e:
+        logger.error(f"Erreur générale lors de l'envoi Telegram: {str(e)}")
+        success = False
 
     if success:
         await update.message.reply_text("✅ Test du monitoring réussi! La réponse de test a été envoyée.")
@@ -621,26 +1219,33 @@ async def monitor_status_command(update: Update, context: ContextTypes.DEFAULT_T
         await update.message.reply_text("❌ Accès refusé.")
         return
 
-    # Vérifier si le fichier de dernière réponse existe
+    target = targets.target_for(update.effective_chat.id)
+    last_response_store = target.store
+
+    # Dernière réponse connue (état en mémoire)
     last_response_info = "Aucune réponse sauvegardée"
-    if os.path.exists(LAST_RESPONSE_FILE):
-        try:
-            with open(LAST_RESPONSE_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                timestamp = data.get('timestamp', 0)
-                if timestamp:
-                    from datetime import datetime
-                    dt = datetime.fromtimestamp(timestamp)
-                    last_response_info = f"Dernière réponse: {dt.strftime('%H:%M:%S')}"
-        except:
-            last_response_info = "Erreur lors de la lecture du fichier"
+    if last_response_store.timestamp:
+        from datetime import datetime
+        dt = datetime.fromtimestamp(last_response_store.timestamp)
+        last_response_info = f"Dernière réponse: {dt.strftime('%H:%M:%S')} ({len(last_response_store.text)} caractères)"
+
+    # Réveils par événements X11 (sinon polling seul)
+    watcher = target.change_watcher
+    if watcher is None:
+        events_info = "inactifs (polling)"
+    elif not watcher.attached:
+        events_info = "en attente de la fenêtre VSCode"
+    else:
+        events_info = ', '.join(f"{source}: {count}" for source, count in watcher.wakes.items()) or "aucun réveil"
 
     status_message = f"""
 🤖 **État du Monitoring IA**
 
 🔄 Monitoring: {'🟢 Activé' if MONITORING_ENABLED else '🔴 Désactivé'}
-⏱️ Intervalle: {MONITORING_INTERVAL} secondes
-📍 Zone surveillée: ({KILO_CODE_RESPONSE_X}, {KILO_CODE_RESPONSE_Y})
+🎯 Cible: {target.name}
+⏱️ Intervalle courant: {target.scheduler.current_interval:.2f}s (min {MONITORING_MIN_INTERVAL}s, max {target.scheduler.max_interval}s, x{MONITORING_BACKOFF_FACTOR})
+⚡ Événements X11: {events_info}
+📍 Zone surveillée: {target.response_pos}
 📋 Raccourci copie: {KILO_CODE_COPY_SHORTCUT}
 💾 {last_response_info}
 
@@ -672,15 +1277,91 @@ async def monitor_toggle_command(update: Update, context: ContextTypes.DEFAULT_T
     logger.info(f"Monitoring IA {'activé' if MONITORING_ENABLED else 'désactivé'} par l'utilisateur {user_id}")
 
 
+async def target_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Commande /target [nom] - Liste les cibles VSCode ou y route ce chat"""
+    user_id = update.effective_user.id
+
+    if not is_user_authorized(user_id):
+        await update.message.reply_text("❌ Accès refusé.")
+        return
+
+    chat_id = update.effective_chat.id
+
+    if context.args:
+        name = context.args[0]
+        try:
+            targets.route(chat_id, name)
+        except KeyError:
+            await update.message.reply_text(f"❌ Cible inconnue: {name} ({', '.join(targets.names())})")
+            return
+        await update.message.reply_text(f"🎯 Ce chat pilote désormais la cible '{name}'.")
+        return
+
+    current = targets.target_for(chat_id)
+    lines = ["🎯 Cibles VSCode:"]
+    for target in targets:
+        marker = "👉" if target is current else "•"
+        display = f", display {target.display}" if target.display else ""
+        lines.append(f"{marker} {target.name} (file: {target.worker.queue_depth()}{display})")
+    lines.append("\nUtilisez /target <nom> pour changer de cible.")
+    await update.message.reply_text("\n".join(lines))
+
+
+def run_auto_calibration(target: KiloTarget, save_templates: bool = False) -> Tuple[bool, str]:
+    """
+    Calibrage automatique d'une cible (exécuté par son worker GUI)
+
+    Args:
+        target: Cible VSCode
+        save_templates: Capturer d'abord les modèles autour des coordonnées actuelles
+
+    Returns:
+        (réussite, compte rendu à envoyer à l'utilisateur)
+    """
+    if not ensure_vscode_active(target):
+        return False, "❌ VSCode non trouvé ou non accessible."
+
+    window_rect = target.window_cache.geometry if target.window_cache is not None else None
+
+    if save_templates:
+        target.locator.capture_templates({
+            'input': target.input_pos,
+            'send_button': target.send_button_pos,
+            'response': target.response_pos,
+        }, window_rect=window_rect)
+    elif not target.locator.enabled:
+        return False, (f"ℹ️ Aucun modèle dans {target.locator.templates_dir}. Calibrez manuellement "
+                       f"puis utilisez /calibrate save.")
+
+    locate_elements(target, *ELEMENTS)
+    return True, (f"🎯 Calibrage de '{target.name}':\n"
+                  f"- Champ texte: {target.input_pos}\n"
+                  f"- Bouton envoyer: {target.send_button_pos}\n"
+                  f"- Zone de réponse: {target.response_pos}\n"
+                  f"Modèles: {', '.join(target.locator.templates) or 'aucun'}")
+
+
 async def calibrate_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Commande /calibrate - Aide au calibrage des coordonnées"""
+    """Commande /calibrate [auto|save] - Calibrage des coordonnées"""
     user_id = update.effective_user.id
 
     if not is_user_authorized(user_id):
         await update.message.reply_text("❌ Accès refusé.")
         return
 
-    calibrate_message = """
+    target = targets.target_for(update.effective_chat.id)
+    action = context.args[0].lower() if context.args else ''
+
+    if action in ('auto', 'save'):
+        try:
+            _, report = await target.worker.submit_async(run_auto_calibration, target, action == 'save')
+        except QueueFullError:
+            await update.message.reply_text("⏳ File d'automatisation pleine, réessayez plus tard.")
+            return
+        await update.message.reply_text(report)
+        return
+
+    calibrate_message = f"""
 🔧 **Guide de calibrage des coordonnées**
 
 **Étape 1:** Ouvrez VSCode avec l'extension Kilo Code active
@@ -698,14 +1379,19 @@ KILO_CODE_INPUT_X=votre_x
 KILO_CODE_INPUT_Y=votre_y
 ```
 
+**Calibrage automatique:**
+- /calibrate save - Capturer des modèles autour des coordonnées actuelles (une fois calibrées)
+- /calibrate auto - Retrouver les éléments dans la fenêtre VSCode
+Ensuite, les positions sont vérifiées avant chaque envoi et recalées si la fenêtre a changé.
+
 **Conseils:**
 - Utilisez la commande /test pour vérifier après calibrage
 - Les coordonnées peuvent varier selon la résolution d'écran
 - Assurez-vous que VSCode est en plein écran pour plus de stabilité
 
 ⚠️ **Important:** Les coordonnées actuelles sont:
-- Champ texte: ({KILO_CODE_INPUT_X}, {KILO_CODE_INPUT_Y})
-- Bouton envoyer: ({KILO_CODE_SEND_BUTTON_X}, {KILO_CODE_SEND_BUTTON_Y})
+- Champ texte: {target.input_pos}
+- Bouton envoyer: {target.send_button_pos}
     """
 
     await update.message.reply_text(calibrate_message, parse_mode='Markdown')
@@ -713,40 +1399,21 @@ KILO_CODE_INPUT_Y=votre_y
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Gère les messages texte reçus"""
-    global last_message_time
-
     user_id = update.effective_user.id
     user_name = update.effective_user.username or update.effective_user.first_name
     message_text = update.message.text.strip()
-    current_time = time.time()
-
-    # Créer une clé unique pour ce message
-    message_key = f"{user_id}:{message_text}:{current_time}"
-
-    # 🚫 FILTRAGE ANTI-BOUCLE : Ignorer les messages qui viennent des réponses IA
-    ia_signatures = [
-        "🤖 **Réponse de Kilo Code:**",
-        "🤖 Réponse de Kilo Code :",
-        "Réponse de Kilo Code",
-        "✅ Tâche terminée",
-        "✅ Code corrigé",
-        "✅ Page créée",
-        "📋 Explication"
-    ]
 
-    # Vérifier si le message contient une signature de réponse IA
-    is_ia_response = any(signature in message_text for signature in ia_signatures)
+    # Update déjà traité (redistribution après reconnexion, nouvel essai du webhook)
+    if not seen_updates.add(update.update_id) or f"tg-{update.update_id}" in job_store:
+        logger.info(f"Update {update.update_id} déjà traité, ignoré")
+        return
 
-    if is_ia_response:
+    # 🚫 FILTRAGE ANTI-BOUCLE : ignorer les réponses IA du bot renvoyées au bot
+    # (marqueur invisible, ou à défaut en-tête de réponse en début de message)
+    if loop_guard.is_bot_message(message_text):
         logger.info("Message de réponse IA ignoré (anti-boucle)")
         return
 
-    # Vérification anti-boucle : même message dans les 2 secondes
-    if message_text == getattr(context.bot_data, 'last_message_text', None):
-        if current_time - getattr(context.bot_data, 'last_message_time', 0) < MESSAGE_COOLDOWN:
-            logger.info("Message dupliqué ignoré (anti-boucle)")
-            return
-
     # Vérification de l'autorisation
     if not is_user_authorized(user_id):
         await update.message.reply_text("❌ Accès refusé. Vous n'êtes pas autorisé.")
@@ -754,31 +1421,76 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         stats['errors'] += 1
         return
 
-    # Anti-spam : limiter les messages trop fréquents
-    if current_time - last_message_time < 1.0:  # Minimum 1 seconde entre messages
-        logger.info("Message ignoré (anti-spam)")
+    # Vérification anti-boucle : même message dans le même chat dans les 2 secondes
+    if not recent_contents.add(content_fingerprint(update.effective_chat.id, message_text)):
+        logger.info("Message dupliqué ignoré (anti-boucle)")
         return
 
     stats['messages_received'] += 1
-    last_message_time = current_time
+    messages_received_total.inc()
 
-    # Stocker le dernier message pour éviter les duplications
-    context.bot_data['last_message_text'] = message_text
-    context.bot_data['last_message_time'] = current_time
+    # Délai entre l'envoi du message par l'utilisateur et sa réception par le bot
+    if update.message.date:
+        receive_delay = max(0.0, time.time() - update.message.date.timestamp())
+        stage_latency.observe(receive_delay, stage='telegram_receive')
+        tracer.event('telegram_receive', receive_delay, trace_id=f"tg-{update.update_id}",
+                     update_id=update.update_id, chat_id=update.effective_chat.id)
 
     logger.info(f"Message reçu de {user_name} (ID: {user_id}): {message_text[:50]}...")
 
+    # Enregistré avant tout traitement : repris au redémarrage s'il n'a pas été injecté
+    job_store.add(f"tg-{update.update_id}", KIND_PROMPT, {'text': message_text}, chat_id=update.effective_chat.id)
+
+    # Les messages arrivant en rafale sont fusionnés en un seul prompt
+    await message_coalescer.add(update.effective_chat.id, message_text, update)
+
+
+async def process_prompt(chat_id: int, prompt: str, updates: List[Update]) -> None:
+    """
+    Injecte un prompt (éventuellement issu de plusieurs messages) dans Kilo Code
+
+    Args:
+        chat_id: Chat d'origine
+        prompt: Texte fusionné des messages
+        updates: Updates d'origine, dans l'ordre (réponses au dernier)
+    """
+    update = updates[-1]
+    target = targets.target_for(chat_id)
+
+    # Les messages regroupés ne forment plus qu'un travail (clé du premier update)
+    job_key = job_store.merge([f"tg-{u.update_id}" for u in updates], {'text': prompt}, target=target.name)
+
     # Vérification basique du message
-    if not message_text or len(message_text) < 2:
+    if not prompt or len(prompt) < 2:
+        job_store.set_status(job_key, STATUS_DONE, error="message trop court")
         await update.message.reply_text("📝 Message trop court, ignoré.")
         return
 
-    # Confirmation de réception (éviter le spam de confirmations)
-    if stats['messages_received'] % 5 == 1:  # Tous les 5 messages
-        await update.message.reply_text("📨 Message reçu, traitement en cours...")
+    # Identifiant de corrélation : premier update_id du prompt (propagé au worker GUI)
+    trace_token = tracer.start_trace(f"tg-{updates[0].update_id}")
+    try:
+        with tracer.span('prompt', update_ids=[u.update_id for u in updates], chars=len(prompt),
+                         target=target.name):
+            # Mise en file vers Kilo Code (avant tout await pour conserver l'ordre)
+            try:
+                pending = target.worker.submit_async(run_prompt_job, job_key, prompt, target)
+            except QueueFullError:
+                job_store.set_status(job_key, STATUS_FAILED, error="file d'automatisation pleine")
+                stats['errors'] += 1
+                prompts_total.inc(result='rejected')
+                await update.message.reply_text("⏳ File d'automatisation pleine, message non traité.")
+                return
+
+            # Confirmation de réception (éviter le spam de confirmations)
+            if stats['messages_received'] % 5 == 1:  # Tous les 5 messages
+                await update.message.reply_text("📨 Message reçu, traitement en cours...")
+
+            # Attente du résultat sans bloquer la boucle asyncio
+            success = await pending
+    finally:
+        tracer.end_trace(trace_token)
 
-    # Envoi vers Kilo Code avec gestion d'erreur améliorée
-    success = send_to_kilo_code(message_text)
+    prompts_total.inc(result='success' if success else 'failure')
 
     if success:
         stats['messages_sent'] += 1
@@ -800,6 +1512,136 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     stats['errors'] += 1
 
 
+async def replay_pending_responses() -> None:
+    """
+    Rediffuse les réponses enregistrées mais non envoyées (avant le monitoring)
+
+    La capture associée devient la dernière réponse connue : le monitoring ne
+    la renverra pas une seconde fois.
+    """
+    for job in job_store.jobs(KIND_RESPONSE, (STATUS_QUEUED, STATUS_SENDING)):
+        target = targets.get(job.target) or targets.default
+        logger.info(f"Reprise de la réponse {job.key} ({len(job.payload['text'])} caractères)")
+        job_store.set_status(job.key, STATUS_SENDING, durable=True)
+        success = await broadcast_ia_response(job.payload['text'], targets.chats_for(target, ALLOWED_USER_IDS))
+        job_store.set_status(job.key, STATUS_DONE if success else STATUS_FAILED, durable=True)
+        if success:
+            target.store.update(job.payload['capture'])
+            target.store.flush()
+
+
+async def notify_chat(bot, chat_id: int, text: str) -> None:
+    """Message d'information à un chat (erreurs journalisées, jamais propagées)"""
+    try:
+        await bot.send_message(chat_id, text)
+    except Exception as e:
+        logger.error(f"Impossible de prévenir le chat {chat_id}: {str(e)}")
+
+
+def submit_pending_prompts() -> Tuple[List[StoredJob], List[Tuple[StoredJob, "asyncio.Future"]]]:
+    """
+    Reprend les prompts enregistrés avant un redémarrage
+
+    Les prompts encore en file sont soumis aux workers dans l'ordre
+    d'enregistrement, avant le démarrage des handlers : les nouveaux messages
+    passent après eux. Ceux interrompus pendant l'injection ne sont pas rejoués
+    (ils ont pu atteindre Kilo Code) et sont marqués en échec.
+
+    Returns:
+        Les prompts interrompus, et les prompts repris avec l'attente de leur injection
+    """
+    interrupted = job_store.jobs(KIND_PROMPT, (STATUS_INJECTING,))
+    for job in interrupted:
+        job_store.set_status(job.key, STATUS_FAILED, error="interrompu par un redémarrage", durable=True)
+        logger.warning(f"Prompt {job.key} interrompu pendant l'injection, non rejoué")
+
+    replayed = []
+    for job in job_store.jobs(KIND_PROMPT, (STATUS_QUEUED,)):
+        target = targets.get(job.target) or targets.target_for(job.chat_id)
+        logger.info(f"Reprise du prompt {job.key} vers '{target.name}'")
+        try:
+            replayed.append((job, target.worker.submit_async(run_prompt_job, job.key, job.payload['text'], target)))
+        except QueueFullError:
+            job_store.set_status(job.key, STATUS_FAILED, error="file d'automatisation pleine")
+    return interrupted, replayed
+
+
+async def report_replayed_prompts(bot, interrupted: List[StoredJob],
+                                  replayed: List[Tuple[StoredJob, "asyncio.Future"]]) -> None:
+    """Prévient les utilisateurs des prompts interrompus, puis du résultat des prompts repris"""
+    for job in interrupted:
+        await notify_chat(
+            bot, job.chat_id,
+            f"⚠️ Le bot a redémarré pendant l'envoi de « {job.payload['text'][:50]} ». "
+            f"Vérifiez dans Kilo Code s'il a été reçu."
+        )
+
+    for job, pending in replayed:
+        success = await pending
+        prompts_total.inc(result='success' if success else 'failure')
+        status = "✅ repris et envoyé" if success else "❌ repris mais non envoyé"
+        await notify_chat(bot, job.chat_id, f"🔁 Message « {job.payload['text'][:50]} » {status} après redémarrage.")
+
+
+async def post_init(application: Application) -> None:
+    """Initialisation dans la boucle du bot : diffuseur et monitoring"""
+    global bot_loop, broadcaster, message_coalescer, heartbeat, replay_task
+
+    bot_loop = asyncio.get_running_loop()
+    broadcaster = TelegramBroadcaster(
+        application.bot,
+        global_rate=TELEGRAM_GLOBAL_RATE,
+        chat_rate=TELEGRAM_CHAT_RATE,
+        max_retries=TELEGRAM_MAX_RETRIES
+    )
+    message_coalescer = MessageCoalescer(process_prompt, gap=COALESCE_WINDOW, max_delay=COALESCE_MAX_DELAY)
+
+    # Travaux laissés par l'exécution précédente
+    purged = job_store.purge(JOB_RETENTION)
+    if purged:
+        logger.info(f"{purged} travaux terminés purgés de la file persistante")
+    try:
+        await replay_pending_responses()
+    except Exception as e:
+        logger.error(f"Erreur lors de la reprise des réponses: {str(e)}")
+    interrupted, replayed = submit_pending_prompts()
+    if interrupted or replayed:
+        replay_task = bot_loop.create_task(report_replayed_prompts(application.bot, interrupted, replayed))
+
+    # Lancé par auto_restart.py : battements tant que la boucle et les workers GUI progressent
+    heartbeat = HeartbeatEmitter.from_env(interval=HEARTBEAT_INTERVAL)
+    if heartbeat:
+        heartbeat.add_event_loop(bot_loop)
+        for worker in targets.workers():
+            heartbeat.add_check(worker.name, lambda worker=worker: worker.busy_for() < AUTOMATION_STALL_TIMEOUT)
+        heartbeat.start()
+
+    # Démarrer le monitoring en arrière-plan si activé
+    # (un thread par cible VSCode)
+    if MONITORING_ENABLED:
+        logger.info("Démarrage du monitoring des réponses IA...")
+        start_change_watchers()
+        for target in targets:
+            monitor_thread = threading.Thread(
+                target=monitor_kilo_code_responses,
+                args=(application, target),
+                name=f"monitor-{target.name}",
+                daemon=True
+            )
+            monitor_thread.start()
+        logger.info(f"✓ Monitoring démarré en arrière-plan ({len(targets)} cible(s))")
+
+
+async def post_stop(application: Application) -> None:
+    """Arrêt du bot : abandon de l'attente des prompts repris (ils restent en file s'ils n'ont pas démarré)"""
+    if replay_task and not replay_task.done():
+        replay_task.cancel()
+        try:
+            await replay_task
+        except asyncio.CancelledError:
+            pass
+
+
 def validate_configuration() -> bool:
     """Valide la configuration avant le démarrage"""
     errors = []
@@ -810,6 +1652,21 @@ def validate_configuration() -> bool:
     if SECURITY_MODE and not ALLOWED_USER_IDS:
         errors.append("❌ TELEGRAM_ALLOWED_USER_IDS manquant (mode sécurité activé)")
     
+    if TARGETS_ERROR:
+        errors.append(f"❌ Cibles VSCode invalides: {TARGETS_ERROR}")
+
+    if INJECTION_MODE not in ('auto', 'paste', 'type'):
+        errors.append(f"❌ INJECTION_MODE invalide: {INJECTION_MODE} (auto, paste ou type)")
+
+    if BOT_MODE not in ('polling', 'webhook'):
+        errors.append(f"❌ BOT_MODE invalide: {BOT_MODE} (polling ou webhook)")
+
+    if BOT_MODE == 'webhook':
+        if not WEBHOOK_URL:
+            errors.append("❌ WEBHOOK_URL manquant (mode webhook)")
+        if not re.fullmatch(r'[A-Za-z0-9_-]{1,256}', WEBHOOK_SECRET_TOKEN):
+            errors.append("❌ WEBHOOK_SECRET_TOKEN manquant ou invalide (1-256 caractères A-Z, a-z, 0-9, _ et -)")
+
     if errors:
         for error in errors:
             logger.error(error)
@@ -821,6 +1678,8 @@ def validate_configuration() -> bool:
 
 def main():
     """Point d'entrée principal"""
+    from telegram.ext import Application, CommandHandler, MessageHandler, filters
+
     print("""
 +================================================+
 |   Bot Telegram <-> Kilo Code VSCode Automation |
@@ -828,52 +1687,72 @@ def main():
 +================================================+
     """)
 
+    global job_store
+
     # Validation de la configuration
     if not validate_configuration():
         logger.error("Configuration invalide. Arrêt du bot.")
         sys.exit(1)
 
-    # Configuration de PyAutoGUI
-    pyautogui.FAILSAFE = True  # Déplacer la souris dans le coin pour arrêter
-    pyautogui.PAUSE = 0.1
+    job_store = JobStore(JOB_STORE_FILE, commit_interval=JOB_COMMIT_INTERVAL)
+
+    # Réglages des pilotes GUI (failsafe PyAutoGUI, etc.)
+    for driver in targets.drivers():
+        driver.configure()
 
     logger.info("Démarrage du bot...")
     logger.info(f"Mode sécurité: {'Activé' if SECURITY_MODE else 'Désactivé'}")
     logger.info(f"Utilisateurs autorisés: {len(ALLOWED_USER_IDS)}")
     logger.info(f"Monitoring IA: {'Activé' if MONITORING_ENABLED else 'Désactivé'}")
+    logger.info(f"Cibles VSCode: {', '.join(targets.names())}")
 
     # Création de l'application
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    builder = Application.builder().token(TELEGRAM_BOT_TOKEN).post_init(post_init).post_stop(post_stop)
+    if TELEGRAM_API_BASE_URL:
+        logger.info(f"API Telegram: {TELEGRAM_API_BASE_URL}")
+        builder = builder.base_url(TELEGRAM_API_BASE_URL)
+    application = builder.build()
 
     # Ajout des handlers
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("status", status_command))
     application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("test", test_command))
+    application.add_handler(CommandHandler("test", test_command, block=False))
     application.add_handler(CommandHandler("test_monitoring", test_monitoring_command))
     application.add_handler(CommandHandler("calibrate", calibrate_command))
     application.add_handler(CommandHandler("monitor_status", monitor_status_command))
     application.add_handler(CommandHandler("monitor_toggle", monitor_toggle_command))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    application.add_handler(CommandHandler("target", target_command))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message, block=False))
     application.add_error_handler(error_handler)
 
-    # Démarrer le monitoring en arrière-plan si activé
-    if MONITORING_ENABLED:
-        logger.info("Démarrage du monitoring des réponses IA...")
-        monitor_thread = threading.Thread(
-            target=monitor_kilo_code_responses,
-            args=(application,),
-            daemon=True
-        )
-        monitor_thread.start()
-        logger.info("✓ Monitoring démarré en arrière-plan")
+    # Endpoint de métriques local
+    if METRICS_ENABLED:
+        start_metrics_server(metrics_registry, METRICS_HOST, METRICS_PORT)
+
+    # Démarrer les workers GUI avant tout handler ou monitoring
+    # (le monitoring est démarré par post_init, dans la boucle du bot)
+    for worker in targets.workers():
+        worker.start()
 
     # Démarrage du bot
     logger.info("✓ Bot démarré et en attente de messages...")
     logger.info("Appuyez sur Ctrl+C pour arrêter")
 
     try:
-        application.run_polling(allowed_updates=Update.ALL_TYPES)
+        if BOT_MODE == 'webhook':
+            # Les updates sont poussés par Telegram ; l'en-tête secret est vérifié par le serveur
+            logger.info(f"Mode webhook: écoute sur {WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH}")
+            application.run_webhook(
+                listen=WEBHOOK_LISTEN,
+                port=WEBHOOK_PORT,
+                url_path=WEBHOOK_PATH,
+                webhook_url=WEBHOOK_URL,
+                secret_token=WEBHOOK_SECRET_TOKEN,
+                allowed_updates=ALLOWED_UPDATES
+            )
+        else:
+            application.run_polling(allowed_updates=ALLOWED_UPDATES)
     except KeyboardInterrupt:
         logger.info("\nArrêt du bot...")
         logger.info(f"Statistiques finales: {stats}")
@@ -882,7 +1761,19 @@ def main():
         sys.exit(1)
     finally:
         # Nettoyage final
-        processed_messages.clear()
+        if heartbeat:
+            heartbeat.stop()
+        for target in targets:
+            if target.change_watcher:
+                target.change_watcher.stop()
+        for worker in targets.workers():
+            worker.stop()
+        for target in targets:
+            target.store.flush()
+        if job_store:
+            job_store.close()
+        seen_updates.clear()
+        recent_contents.clear()
         logger.info("Nettoyage effectué")
 
 
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la recherche de modèle sans OpenCV (auto_locator)
+"""
+
+import random
+
+import pytest
+
+from auto_locator import _match_with_pillow, match_template
+
+Image = pytest.importorskip('PIL.Image')
+ImageDraw = pytest.importorskip('PIL.ImageDraw')
+
+
+def _screen(seed=1, size=(480, 270)):
+    """Capture simulée : rectangles et textes sur fond uniforme"""
+    rng = random.Random(seed)
+    image = Image.new('L', size, 30)
+    draw = ImageDraw.Draw(image)
+    for _ in range(80):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.rectangle((x, y, x + rng.randrange(5, 60), y + rng.randrange(3, 20)), fill=rng.randrange(256))
+    for index in range(20):
+        draw.text((rng.randrange(size[0] - 60), rng.randrange(size[1] - 12)), f"Send {index}", fill=255)
+    return image
+
+
+@pytest.mark.parametrize('left, top', [(0, 0), (201, 117), (383, 237)])
+def test_modele_retrouve_en_pleine_resolution(left, top):
+    image = _screen()
+    template = image.crop((left, top, left + 96, top + 32))
+
+    assert _match_with_pillow(image, template) == (left, top, 1.0)
+
+
+def test_modele_plus_grand_que_l_image():
+    image = _screen(size=(64, 64))
+
+    assert match_template(image, Image.new('L', (96, 32))) is None
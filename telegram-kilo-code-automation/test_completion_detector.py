@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la détection de fin de réponse (completion_detector)
+"""
+
+import pytest
+
+import completion_detector
+from completion_detector import ResponseCompletionDetector
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCue:
+    """Indice visuel dont l'état est fixé par le test"""
+
+    def __init__(self, generating):
+        self.generating = generating
+
+    def is_generating(self):
+        return self.generating
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(completion_detector.time, 'monotonic', clock)
+    return clock
+
+
+def test_reponse_stable_sur_n_captures(clock):
+    detector = ResponseCompletionDetector(stable_samples=3, quiet_period=0)
+
+    assert not detector.observe("abc")
+    assert not detector.observe("abc")
+    assert detector.observe("abc")
+    assert detector.pending is None
+
+
+def test_changement_remet_le_compteur_a_zero(clock):
+    detector = ResponseCompletionDetector(stable_samples=2, quiet_period=0)
+
+    assert not detector.observe("a")
+    assert not detector.observe("ab")
+    assert detector.stable_count == 1
+    assert detector.pending == "ab"
+    assert detector.observe("ab")
+
+
+def test_delai_sans_changement(clock):
+    detector = ResponseCompletionDetector(stable_samples=0, quiet_period=4.0)
+
+    assert not detector.observe("abc")
+    clock.now += 3.9
+    assert not detector.observe("abc")
+    clock.now += 0.2
+    assert detector.observe("abc")
+
+
+def test_criteres_desactives_transmission_immediate(clock):
+    detector = ResponseCompletionDetector(stable_samples=0, quiet_period=0)
+
+    assert detector.observe("abc")
+
+
+def test_indice_visible_retient_la_reponse(clock):
+    cue = FakeCue(generating=True)
+    detector = ResponseCompletionDetector(stable_samples=1, quiet_period=0, max_wait=120, cue=cue)
+
+    # Stable mais le bouton stop est visible : retenue
+    assert not detector.observe("abc")
+    assert not detector.observe("abc")
+
+    # Le bouton disparaît : transmise aussitôt
+    cue.generating = False
+    assert detector.observe("abcd")
+
+
+def test_indice_visible_trop_longtemps(clock):
+    detector = ResponseCompletionDetector(stable_samples=1, quiet_period=0, max_wait=10,
+                                          cue=FakeCue(generating=True))
+
+    assert not detector.observe("abc")
+    clock.now += 10
+    assert detector.observe("abcd")
+
+
+def test_indice_jamais_vu_criteres_de_stabilite(clock):
+    # Bouton jamais reconnu (modèle ou région incorrects) : la stabilité décide
+    detector = ResponseCompletionDetector(stable_samples=2, quiet_period=0, cue=FakeCue(generating=False))
+
+    assert not detector.observe("abc")
+    assert detector.observe("abc")
+
+
+def test_capture_de_l_indice_en_echec(clock):
+    detector = ResponseCompletionDetector(stable_samples=2, quiet_period=0, cue=FakeCue(generating=None))
+
+    assert not detector.observe("abc")
+    assert detector.observe("abc")
+
+
+def test_reset_abandonne_la_reponse(clock):
+    detector = ResponseCompletionDetector(stable_samples=2, quiet_period=0)
+
+    detector.observe("abc")
+    detector.reset()
+    assert detector.pending is None
+    assert not detector.observe("abc")
+
+
+def test_captures_rapprochees_comptees_une_fois(clock):
+    detector = ResponseCompletionDetector(stable_samples=3, quiet_period=0, sample_interval=0.25)
+
+    # Réveils successifs dans la même milliseconde : une seule capture comptée
+    assert not detector.observe("abc")
+    assert not detector.observe("abc")
+    assert not detector.observe("abc")
+    assert detector.stable_count == 1
+
+    clock.now += 0.25
+    assert not detector.observe("abc")
+    clock.now += 0.1
+    assert not detector.observe("abc")
+    clock.now += 0.15
+    assert detector.observe("abc")
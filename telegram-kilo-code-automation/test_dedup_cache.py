@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du cache de déduplication (dedup_cache)
+"""
+
+from dedup_cache import DedupCache, content_fingerprint
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_doublon_dans_le_ttl():
+    cache = DedupCache(ttl=10, clock=FakeClock())
+
+    assert cache.add('a')
+    assert not cache.add('a')
+    assert cache.duplicates == 1
+    assert 'a' in cache
+
+
+def test_expiration_apres_le_ttl():
+    clock = FakeClock()
+    cache = DedupCache(ttl=10, clock=clock)
+    cache.add('a')
+
+    clock.now = 10
+    assert 'a' not in cache
+    assert len(cache) == 0
+    assert cache.add('a')
+
+
+def test_doublon_ne_prolonge_pas_la_fenetre():
+    clock = FakeClock()
+    cache = DedupCache(ttl=10, clock=clock)
+    cache.add('a')
+
+    clock.now = 9
+    assert not cache.add('a')
+    clock.now = 10
+    assert cache.add('a')
+
+
+def test_eviction_fifo_au_dela_de_max_size():
+    cache = DedupCache(max_size=2, ttl=100, clock=FakeClock())
+    cache.add('a')
+    cache.add('b')
+
+    # Revoir 'a' ne le rafraîchit pas : il reste le plus ancien
+    assert not cache.add('a')
+    cache.add('c')
+
+    assert 'a' not in cache
+    assert 'b' in cache and 'c' in cache
+    assert len(cache) == 2
+
+
+def test_empreinte_normalisee_par_chat():
+    assert content_fingerprint(1, "Bonjour  Kilo") == content_fingerprint(1, "bonjour kilo")
+    assert content_fingerprint(1, "Bonjour") != content_fingerprint(2, "Bonjour")
+    assert content_fingerprint(1, "Bonjour") != content_fingerprint(1, "Bonsoir")
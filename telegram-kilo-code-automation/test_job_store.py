@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la file de travaux persistante (job_store)
+"""
+
+import pytest
+
+from job_store import (KIND_PROMPT, KIND_RESPONSE, STATUS_DONE, STATUS_FAILED, STATUS_INJECTING,
+                       STATUS_QUEUED, JobStore)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'), commit_interval=0)
+    yield store
+    store.close()
+
+
+def test_cle_d_idempotence(store):
+    assert store.add('update:1', KIND_PROMPT, {'text': 'a'}, chat_id=42)
+    assert not store.add('update:1', KIND_PROMPT, {'text': 'b'}, chat_id=42)
+    assert 'update:1' in store
+
+    [job] = store.jobs(KIND_PROMPT, [STATUS_QUEUED])
+    assert job.payload == {'text': 'a'}
+    assert job.chat_id == 42
+
+
+def test_remplacement_remet_le_travail_en_attente(store):
+    store.add('response:1', KIND_RESPONSE, {'text': 'v1'})
+    store.set_status('response:1', STATUS_FAILED, error='réseau')
+
+    assert store.add('response:1', KIND_RESPONSE, {'text': 'v2'}, replace=True)
+
+    [job] = store.jobs(KIND_RESPONSE, [STATUS_QUEUED])
+    assert job.payload == {'text': 'v2'}
+    assert job.error is None
+
+
+def test_transitions_d_etat(store):
+    store.add('update:1', KIND_PROMPT, {'text': 'a'})
+    store.set_status('update:1', STATUS_INJECTING, durable=True)
+    assert store.jobs(KIND_PROMPT, [STATUS_QUEUED]) == []
+
+    store.set_status('update:1', STATUS_DONE, durable=True)
+    assert store.counts() == {STATUS_DONE: 1}
+
+
+def test_fusion_dans_le_premier_travail(store):
+    for index in range(3):
+        store.add(f'update:{index}', KIND_PROMPT, {'text': str(index)})
+
+    assert store.merge(['update:0', 'update:1', 'update:2'], {'text': '0\n1\n2'}) == 'update:0'
+
+    [job] = store.jobs(KIND_PROMPT, [STATUS_QUEUED])
+    assert job.key == 'update:0'
+    assert job.payload == {'text': '0\n1\n2'}
+    assert store.counts() == {STATUS_QUEUED: 1, STATUS_DONE: 2}
+
+
+def test_reprise_apres_redemarrage_dans_l_ordre(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    store = JobStore(path, commit_interval=60)
+    for index in (3, 1, 2):
+        store.add(f'update:{index}', KIND_PROMPT, {'text': str(index)})
+    store.set_status('update:3', STATUS_INJECTING, durable=True)
+    # Écritures regroupées encore en attente : validées par close()
+    store.close()
+
+    reopened = JobStore(path)
+    try:
+        assert [job.key for job in reopened.jobs(KIND_PROMPT, [STATUS_QUEUED])] == ['update:1', 'update:2']
+        assert [job.key for job in reopened.jobs(KIND_PROMPT, [STATUS_INJECTING])] == ['update:3']
+    finally:
+        reopened.close()
+
+
+def test_purge_des_travaux_termines(store):
+    store.add('update:1', KIND_PROMPT, {'text': 'a'})
+    store.add('update:2', KIND_PROMPT, {'text': 'b'})
+    store.set_status('update:1', STATUS_DONE)
+
+    assert store.purge(older_than=-1) == 1
+    assert 'update:1' not in store
+    assert 'update:2' in store
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la protection anti-boucle (loop_guard)
+"""
+
+from loop_guard import LoopGuard
+
+
+def test_message_marque_reconnu():
+    guard = LoopGuard(b'secret')
+    marked = guard.mark("🤖 **Réponse de Kilo Code:**\n\nBonjour")
+
+    assert marked.startswith("🤖 **Réponse de Kilo Code:**\n\nBonjour")
+    assert guard.is_marked(marked)
+
+
+def test_marqueur_stable_pour_un_meme_texte():
+    guard = LoopGuard(b'secret')
+
+    assert guard.mark("abc") == guard.mark("abc")
+    assert guard.mark("abc") != guard.mark("abd")
+
+
+def test_texte_reecrit_par_telegram():
+    # Markdown retiré par Telegram : seul le nonce est authentifié
+    guard = LoopGuard(b'secret')
+    marker = guard.mark("**gras**")[len("**gras**"):]
+
+    assert guard.is_marked("gras" + marker)
+    # Quelques caractères ajoutés après le marqueur sont tolérés
+    assert guard.is_marked("gras" + marker + " ")
+
+
+def test_autre_secret_rejete():
+    marked = LoopGuard(b'secret').mark("Bonjour")
+
+    assert not LoopGuard(b'autre').is_marked(marked)
+
+
+def test_marqueur_tronque_rejete():
+    guard = LoopGuard(b'secret')
+
+    assert not guard.is_marked(guard.mark("Bonjour")[:-1])
+    assert not guard.is_marked("Bonjour")
+
+
+def test_repli_sur_l_en_tete_de_reponse():
+    guard = LoopGuard(b'secret')
+
+    assert guard.is_bot_message("🤖 **Réponse de Kilo Code (1/2):**\n\n...")
+    assert guard.is_bot_message(guard.mark("texte quelconque"))
+    # En-tête cité au milieu d'un message utilisateur : pas un message du bot
+    assert not guard.is_bot_message("Peux-tu expliquer « 🤖 Réponse de Kilo Code » ?")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du découpage des longues réponses (message_chunker)
+"""
+
+from message_chunker import FENCE, split_message
+
+
+def _code_block(lines, language='python', closing=FENCE):
+    return '\n'.join([f"{FENCE}{language}", *lines, closing])
+
+
+def test_texte_court_inchange():
+    assert split_message("Bonjour", 100) == ["Bonjour"]
+
+
+def test_coupe_sur_les_paragraphes():
+    text = '\n\n'.join(f"Paragraphe {i} " + 'x' * 30 for i in range(10))
+    chunks = split_message(text, 100)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert '\n\n'.join(chunks) == text
+
+
+def test_bloc_de_code_referme_et_rouvert():
+    lines = [f"x = {i}" for i in range(60)]
+    chunks = split_message(_code_block(lines), 120)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk) <= 120
+        assert chunk.startswith(f"{FENCE}python\n")
+        assert chunk.endswith(f"\n{FENCE}")
+    body = [line for chunk in chunks for line in chunk.split('\n')[1:-1]]
+    assert body == lines
+
+
+def test_cloture_portant_du_texte_conservee():
+    lines = [f"x = {i}" for i in range(60)]
+    chunks = split_message(_code_block(lines, closing=f"{FENCE}zzz"), 120)
+
+    body = [line for chunk in chunks for line in chunk.split('\n')[1:-1]]
+    assert body == lines + [f"{FENCE}zzz"]
+
+
+def test_bloc_non_ferme_referme():
+    text = '\n'.join([f"{FENCE}js", *[f"let a{i} = {i};" for i in range(40)]])
+    chunks = split_message(text, 100)
+
+    assert all(chunk.endswith(FENCE) for chunk in chunks)
+    assert all(chunk.count(FENCE) == 2 for chunk in chunks)
+
+
+def test_ligne_trop_longue_coupee():
+    chunks = split_message('y' * 250, 100)
+
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
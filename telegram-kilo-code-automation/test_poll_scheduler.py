@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du planificateur adaptatif du monitoring (poll_scheduler)
+"""
+
+import threading
+import time
+
+from poll_scheduler import AdaptivePollScheduler
+
+
+def test_ralentissement_exponentiel_plafonne():
+    scheduler = AdaptivePollScheduler(min_interval=0.25, max_interval=1.0, backoff_factor=2.0)
+    scheduler.notify_activity()
+    assert scheduler.current_interval == 0.25
+
+    intervals = []
+    for _ in range(4):
+        scheduler.notify_idle()
+        intervals.append(scheduler.current_interval)
+    assert intervals == [0.5, 1.0, 1.0, 1.0]
+
+
+def test_attente_de_l_intervalle():
+    scheduler = AdaptivePollScheduler(min_interval=0.05, max_interval=0.05)
+
+    start = time.monotonic()
+    scheduler.wait()
+    assert time.monotonic() - start >= 0.04
+
+
+def test_reveil_pendant_l_attente():
+    scheduler = AdaptivePollScheduler(min_interval=0.05, max_interval=10)
+    threading.Timer(0.05, scheduler.wake).start()
+
+    start = time.monotonic()
+    scheduler.wait()
+    assert time.monotonic() - start < 5
+    # Le réveil ne change pas l'intervalle
+    assert scheduler.current_interval == 10
+
+
+def test_reveil_hors_attente_non_perdu():
+    # Signalé pendant une capture (aucune attente en cours) : l'attente suivante ne dort pas
+    scheduler = AdaptivePollScheduler(min_interval=5, max_interval=10)
+    scheduler.wake()
+
+    start = time.monotonic()
+    scheduler.wait()
+    assert time.monotonic() - start < 1
+
+    # Consommé : l'attente d'après dure l'intervalle
+    scheduler.min_interval = scheduler.max_interval = 0.05
+    scheduler.notify_idle()
+    start = time.monotonic()
+    scheduler.wait()
+    assert time.monotonic() - start >= 0.04
+
+
+def test_activite_accelere_sans_reveiller():
+    # Signalée par le monitoring lui-même : l'attente suivante dure au moins min_interval
+    scheduler = AdaptivePollScheduler(min_interval=0.1, max_interval=10)
+    scheduler.notify_activity()
+    assert scheduler.current_interval == 0.1
+
+    start = time.monotonic()
+    scheduler.wait()
+    assert time.monotonic() - start >= 0.09
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la capture de la zone de réponse avec le pilote GUI simulé
+(get_kilo_code_response et RegionChangeDetector)
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip('dotenv')
+
+# Configuration lue à l'import du module principal
+os.environ.setdefault('GUI_DRIVER', 'fake')
+os.environ.setdefault('ACTION_DELAY', '0')
+
+import telegram_kilo_automation as bot
+from screen_probe import RegionChangeDetector, region_around
+
+if bot.GUI_DRIVER != 'fake':
+    pytest.skip("GUI_DRIVER=fake requis", allow_module_level=True)
+
+
+@pytest.fixture
+def target():
+    target = bot.targets.default
+    target.gui.response_panel = "Première réponse de Kilo Code"
+    target.gui.clipboard = ''
+    return target
+
+
+@pytest.fixture
+def detector(target):
+    region = region_around(*target.response_pos, bot.RESPONSE_ROI_WIDTH, bot.RESPONSE_ROI_HEIGHT)
+    return RegionChangeDetector(region, grab=target.gui.grab)
+
+
+def test_zone_inchangee_apres_capture(target, detector):
+    assert bot.get_kilo_code_response(target, detector) == "Première réponse de Kilo Code"
+    assert not detector.has_changed()
+
+
+def test_reponse_affichee_pendant_la_capture(target, detector, monkeypatch):
+    gui = target.gui
+    copy = gui.get_clipboard
+
+    def copy_then_deliver():
+        # La réponse arrive après ctrl+c, pendant la lecture du presse-papiers
+        text = copy()
+        gui._deliver("Deuxième réponse de Kilo Code")
+        return text
+
+    monkeypatch.setattr(gui, 'get_clipboard', copy_then_deliver)
+    assert bot.get_kilo_code_response(target, detector) == "Première réponse de Kilo Code"
+    monkeypatch.undo()
+
+    # Absente du texte copié : la zone doit être signalée comme modifiée
+    assert detector.has_changed()
+    assert "Deuxième réponse" in bot.get_kilo_code_response(target, detector)
+    assert not detector.has_changed()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du calcul du texte nouveau entre deux captures (response_tracker)
+"""
+
+from response_tracker import IncrementalResponseTracker, common_prefix_length
+
+
+def test_prefixe_commun():
+    assert common_prefix_length("abcdef", "abcxyz") == 3
+    assert common_prefix_length("abc", "abc") == 3
+    assert common_prefix_length("", "abc") == 0
+    assert common_prefix_length("xbc", "abc") == 0
+
+
+def test_premiere_capture_entierement_nouvelle():
+    assert IncrementalResponseTracker().compute_delta("Bonjour") == "Bonjour"
+
+
+def test_ajout_en_fin_de_panneau():
+    tracker = IncrementalResponseTracker("Question\nRéponse 1")
+
+    assert tracker.compute_delta("Question\nRéponse 1\nRéponse 2") == "\nRéponse 2"
+    assert tracker.compute_delta("Question\nRéponse 1") == ""
+
+
+def test_ancre_retrouvee_apres_defilement():
+    # Le haut de l'historique a disparu du panneau : seule la fin précédente est retrouvée
+    previous = "ancien début " * 20 + "fin de la réponse précédente"
+    tracker = IncrementalResponseTracker(previous, anchor_size=16)
+
+    current = "...dente" + previous[-40:] + "\nNouvelle réponse"
+    assert tracker.compute_delta(current) == "\nNouvelle réponse"
+
+
+def test_divergence_sans_ancre():
+    tracker = IncrementalResponseTracker("Question\nRéponse en cours", anchor_size=8)
+
+    assert tracker.compute_delta("Question\nRéponse corrigée") == "corrigée"
+
+
+def test_capture_sans_lien_transmise_entierement():
+    tracker = IncrementalResponseTracker("Ancienne conversation")
+
+    assert tracker.compute_delta("Nouvelle conversation") == "Nouvelle conversation"
+
+
+def test_reference_changee_seulement_par_commit():
+    tracker = IncrementalResponseTracker("A")
+
+    assert tracker.compute_delta("AB") == "B"
+    # Envoi échoué : pas de commit, le même delta est recalculé
+    assert tracker.compute_delta("AB") == "B"
+
+    tracker.commit("AB")
+    assert tracker.compute_delta("ABC") == "C"
+
+    tracker.reset()
+    assert tracker.compute_delta("ABC") == "ABC"
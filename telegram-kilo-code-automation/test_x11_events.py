@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du réveil par événements X11 (x11_events)
+Les tests avec serveur X lancent un Xvfb dédié ; ils sont ignorés sans Xvfb
+ou sans python-xlib
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from x11_events import X11ChangeWatcher, _overlaps
+
+
+def test_recouvrement_des_regions():
+    assert _overlaps((0, 0, 10, 10), (5, 5, 10, 10))
+    assert not _overlaps((0, 0, 10, 10), (10, 0, 10, 10))
+    assert not _overlaps((0, 0, 10, 10), (0, 20, 10, 10))
+
+
+@pytest.fixture
+def xvfb_display():
+    """Nom d'un display Xvfb privé (ex: ':5')"""
+    pytest.importorskip('Xlib')
+    if not shutil.which('Xvfb'):
+        pytest.skip("Xvfb absent")
+
+    read_fd, write_fd = os.pipe()
+    server = subprocess.Popen(
+        ['Xvfb', '-displayfd', str(write_fd), '-screen', '0', '640x480x24', '-nolisten', 'tcp'],
+        pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    os.close(write_fd)
+    try:
+        with os.fdopen(read_fd) as f:
+            number = f.readline().strip()
+        if not number:
+            pytest.skip("Xvfb n'a pas démarré")
+        yield f":{number}"
+    finally:
+        server.terminate()
+        server.wait(timeout=5)
+
+
+def test_evenement_deja_en_file_traite_sans_attendre(xvfb_display):
+    """Un événement lu par un aller-retour (file Xlib) n'attend pas le prochain select()"""
+    from Xlib import X, display as xdisplay
+
+    woken = threading.Event()
+    # Aucune fenêtre VSCode : sans la vérification de la file, select() attendrait discovery_interval
+    watcher = X11ChangeWatcher.create(xvfb_display, ['Visual Studio Code'],
+                                      lambda source: woken.set(),
+                                      min_wake_interval=0, discovery_interval=60)
+    assert watcher is not None
+
+    client = xdisplay.Display(xvfb_display)
+    try:
+        owner = client.screen().root.create_window(0, 0, 1, 1, 0, X.CopyFromParent)
+        owner.set_selection_owner(client.intern_atom('CLIPBOARD'), X.CurrentTime)
+        client.sync()
+        # L'aller-retour range l'événement XFixes dans la file de Xlib, socket vidée
+        watcher.display.sync()
+
+        watcher.start()
+        assert woken.wait(timeout=5)
+        assert watcher.wakes == {'presse-papiers': 1}
+    finally:
+        watcher.stop()
+        client.close()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Traçage léger par requête
+Chaque message Telegram reçoit un identifiant de corrélation ; les étapes
+(activation, clic, saisie, envoi, capture, diffusion) sont enregistrées sous
+forme de spans chronométrés, en lignes JSON dans un fichier rotatif
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Trace courante (propagée aux tâches asyncio et aux jobs du worker GUI)
+current_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('current_trace_id', default=None)
+
+
+class Tracer:
+    """
+    Émetteur de spans au format JSON lines
+
+    Désactivé, span() ne fait rien : le coût est négligeable sur le chemin critique.
+    """
+
+    def __init__(self, path: str = 'traces.jsonl', enabled: bool = True,
+                 max_bytes: int = 5_000_000, backup_count: int = 3):
+        self.enabled = enabled
+        self._trace_logger = logging.getLogger('kilo.traces')
+        self._trace_logger.propagate = False
+
+        if enabled:
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._trace_logger.addHandler(handler)
+            self._trace_logger.setLevel(logging.INFO)
+            logger.info(f"Traçage activé: {path}")
+
+    @staticmethod
+    def new_trace_id(prefix: str = 'tr') -> str:
+        """Génère un identifiant de corrélation"""
+        return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+    def start_trace(self, trace_id: str) -> contextvars.Token:
+        """Définit la trace courante (à restaurer avec end_trace)"""
+        return current_trace_id.set(trace_id)
+
+    def end_trace(self, token: contextvars.Token) -> None:
+        current_trace_id.reset(token)
+
+    def event(self, name: str, duration: float = 0.0, start: Optional[float] = None,
+              trace_id: Optional[str] = None, **attributes: Any) -> None:
+        """Enregistre un span déjà mesuré (durée en secondes, trace courante par défaut)"""
+        if not self.enabled:
+            return
+
+        record = {
+            'ts': start if start is not None else time.time() - duration,
+            'trace_id': trace_id or current_trace_id.get(),
+            'span': name,
+            'duration_ms': round(duration * 1000, 3),
+        }
+        record.update(attributes)
+
+        try:
+            self._trace_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+        except Exception as e:
+            logger.warning(f"Écriture de la trace impossible: {str(e)}")
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[None]:
+        """Chronomètre le bloc et l'enregistre comme span de la trace courante"""
+        if not self.enabled:
+            yield
+            return
+
+        start_wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.event(name, time.perf_counter() - start, start=start_wall,
+                       status='error', error=str(e), **attributes)
+            raise
+        else:
+            self.event(name, time.perf_counter() - start, start=start_wall, status='ok', **attributes)
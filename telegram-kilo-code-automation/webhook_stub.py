@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Client de test du mode webhook
+Envoie des updates Telegram (JSON) au serveur webhook local du bot, avec
+l'en-tête secret, comme le ferait Telegram
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import urllib.request
+import urllib.error
+from dotenv import load_dotenv
+
+# Charger la configuration
+load_dotenv()
+
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN', '')
+ALLOWED_USER_IDS = [int(uid.strip()) for uid in os.getenv('TELEGRAM_ALLOWED_USER_IDS', '').split(',') if uid.strip()]
+
+
+def build_update(update_id: int, user_id: int, text: str) -> dict:
+    """Construit un update Telegram minimal contenant un message texte"""
+    message = {
+        'message_id': update_id,
+        'date': int(time.time()),
+        'chat': {'id': user_id, 'type': 'private', 'first_name': 'Stub'},
+        'from': {'id': user_id, 'is_bot': False, 'first_name': 'Stub', 'username': 'webhook_stub'},
+        'text': text,
+    }
+
+    if text.startswith('/'):
+        command_length = len(text.split()[0])
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': command_length}]
+
+    return {'update_id': update_id, 'message': message}
+
+
+def post_update(url: str, update: dict, secret_token: str) -> int:
+    """
+    POST un update vers le webhook
+
+    Returns:
+        Le code HTTP de la réponse
+    """
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(update).encode('utf-8'),
+        headers={
+            'Content-Type': 'application/json',
+            'X-Telegram-Bot-Api-Secret-Token': secret_token,
+        },
+        method='POST'
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Envoie des updates de test au webhook local du bot")
+    parser.add_argument('text', nargs='?', default='/status', help="Texte du message (défaut: /status)")
+    parser.add_argument('--url', default=f"http://{WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH}")
+    parser.add_argument('--secret', default=WEBHOOK_SECRET_TOKEN)
+    parser.add_argument('--user-id', type=int, default=ALLOWED_USER_IDS[0] if ALLOWED_USER_IDS else 1)
+    parser.add_argument('--count', type=int, default=1, help="Nombre d'updates à envoyer")
+    parser.add_argument('--first-update-id', type=int, default=int(time.time()))
+    args = parser.parse_args()
+
+    print(f"Envoi de {args.count} update(s) vers {args.url}")
+    failures = 0
+
+    for i in range(args.count):
+        update = build_update(args.first_update_id + i, args.user_id, args.text)
+        start = time.perf_counter()
+        status = post_update(args.url, update, args.secret)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        print(f"Update {update['update_id']}: HTTP {status} ({elapsed:.1f} ms)")
+        if status != 200:
+            failures += 1
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
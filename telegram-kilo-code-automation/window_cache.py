@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de la fenêtre VSCode cible
+Conserve le handle et la géométrie de la fenêtre résolue pour éviter de
+ré-énumérer toutes les fenêtres à chaque action
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Geometry = Tuple[int, int, int, int]
+
+
+class WindowTargetCache:
+    """
+    Cache du handle de fenêtre VSCode
+
+    La fenêtre en cache est revalidée à moindre coût (handle encore vivant,
+    géométrie inchangée) ; l'énumération complète n'a lieu qu'en cas d'échec.
+    """
+
+    def __init__(self, window_backend: Any, title_patterns: List[str]):
+        """
+        Args:
+            window_backend: Module de type pygetwindow (getWindowsWithTitle, getActiveWindow)
+            title_patterns: Titres recherchés, par ordre de priorité
+        """
+        self.window_backend = window_backend
+        self.title_patterns = title_patterns
+        self._window = None
+        self._geometry: Optional[Geometry] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def geometry(self) -> Optional[Geometry]:
+        """Géométrie (x, y, width, height) de la fenêtre en cache"""
+        return self._geometry
+
+    def invalidate(self) -> None:
+        """Oublie la fenêtre en cache (prochain accès = énumération)"""
+        self._window = None
+        self._geometry = None
+
+    def get_window(self) -> Optional[Any]:
+        """
+        Retourne la fenêtre VSCode, depuis le cache si elle est toujours valide
+
+        Returns:
+            L'objet fenêtre, ou None si aucune fenêtre VSCode n'est trouvée
+        """
+        if self._window is not None:
+            geometry = self._read_geometry(self._window)
+            if geometry is not None and geometry == self._geometry:
+                self.hits += 1
+                return self._window
+
+            logger.info("Fenêtre VSCode en cache invalide (fermée ou déplacée), nouvelle recherche...")
+            self.invalidate()
+
+        self.misses += 1
+        window = self._enumerate()
+        if window is None:
+            return None
+
+        self._window = window
+        self._geometry = self._read_geometry(window)
+        if self._geometry is None:
+            self.invalidate()
+            return None
+
+        logger.info(f"Fenêtre VSCode mise en cache: {self._geometry}")
+        return window
+
+    def is_foreground(self, window: Any) -> bool:
+        """Vérifie si la fenêtre est déjà au premier plan"""
+        try:
+            if hasattr(window, 'isActive'):
+                return bool(window.isActive)
+
+            active_window = self.window_backend.getActiveWindow()
+            return active_window is not None and active_window == window
+        except Exception as e:
+            logger.error(f"Erreur lors de la vérification de la fenêtre active: {str(e)}")
+            return False
+
+    def get_stats(self) -> Dict[str, int]:
+        """Compteurs de succès/échecs du cache"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _enumerate(self) -> Optional[Any]:
+        """Énumère les fenêtres et retourne la première correspondant aux titres"""
+        for pattern in self.title_patterns:
+            windows = self.window_backend.getWindowsWithTitle(pattern)
+            if windows:
+                return windows[0]
+        return None
+
+    @staticmethod
+    def _read_geometry(window: Any) -> Optional[Geometry]:
+        """
+        Lit la géométrie ; None si le handle n'est plus valide
+
+        box (pygetwindow, XdotoolWindow) lit les quatre valeurs en une seule
+        requête, au lieu d'une par attribut.
+        """
+        try:
+            if hasattr(type(window), 'box'):
+                left, top, width, height = window.box
+                return (left, top, width, height)
+            return (window.left, window.top, window.width, window.height)
+        except Exception:
+            return None
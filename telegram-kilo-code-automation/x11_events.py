@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Réveil du monitoring par événements X11 (optionnel, python-xlib)
+Au lieu d'attendre l'intervalle de polling, le monitoring est réveillé quand
+le presse-papiers change de propriétaire (XFixes), quand la zone de réponse de
+la fenêtre VSCode est redessinée (Damage) ou quand son titre change. Sans
+python-xlib, sans serveur X ou sans ces extensions, le polling seul s'applique.
+
+Test manuel (par exemple sous Xvfb) :
+
+    python x11_events.py "Visual Studio Code"
+"""
+
+import logging
+import os
+import select
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]
+
+
+def _overlaps(a: Region, b: Region) -> bool:
+    """Deux rectangles (left, top, width, height) se recouvrent"""
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+class X11ChangeWatcher:
+    """
+    Thread d'écoute des événements X11 d'une fenêtre VSCode
+
+    Le thread a sa propre connexion au serveur X et attend dans select() : au
+    repos, il ne consomme rien. Les réveils sont limités à un par
+    min_wake_interval (le dernier événement d'une rafale est toujours
+    transmis), et les événements provoqués par nos propres captures sont
+    ignorés (muted).
+    """
+
+    def __init__(self, display: Any, window_titles: List[str], on_change: Callable[[str], None],
+                 region: Optional[Callable[[], Optional[Region]]] = None,
+                 min_wake_interval: float = 0.25, mute_grace: float = 0.5,
+                 discovery_interval: float = 5.0, name: str = 'x11-events'):
+        """
+        Args:
+            display: Connexion Xlib.display.Display (utilisée par le seul thread d'écoute)
+            window_titles: Titres recherchés, par ordre de priorité
+            on_change: Rappel de réveil, appelé avec la source ('presse-papiers', 'damage', 'titre')
+            region: Zone de réponse (coordonnées écran) ; les dommages hors zone sont ignorés
+            min_wake_interval: Délai minimal entre deux réveils
+            mute_grace: Délai après muted() pendant lequel les événements restent ignorés
+            discovery_interval: Délai entre deux recherches de la fenêtre absente
+        """
+        from Xlib import X
+        from Xlib.ext import damage, xfixes
+
+        self.display = display
+        self.window_titles = window_titles
+        self.on_change = on_change
+        self.region = region
+        self.min_wake_interval = min_wake_interval
+        self.mute_grace = mute_grace
+        self.discovery_interval = discovery_interval
+        self.name = name
+        self.wakes: Dict[str, int] = {}
+
+        self._X = X
+        self._damage_level = damage.DamageReportBoundingBox
+        self._root = display.screen().root
+        self._atoms = {
+            atom: display.intern_atom(atom)
+            for atom in ('CLIPBOARD', '_NET_CLIENT_LIST', '_NET_WM_NAME', 'UTF8_STRING')
+        }
+        self._damage_event = display.extension_event.DamageNotify
+        self._selection_event = display.extension_event.SetSelectionOwnerNotify
+
+        self._window: Any = None
+        self._window_origin = (0, 0)
+        self._damage: Optional[int] = None
+        self._next_discovery = 0.0
+
+        self._lock = threading.Lock()
+        self._muted = 0
+        self._muted_until = 0.0
+        self._last_wake = float('-inf')
+        self._pending_source: Optional[str] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_r, self._stop_w = os.pipe()
+
+        # Erreurs asynchrones (fenêtre détruite entre deux requêtes) : journalisées seulement
+        display.set_error_handler(lambda error, request=None: logger.debug(f"Erreur X11 ignorée: {error}"))
+
+        # Propriétaire du presse-papiers, et liste des fenêtres (apparition de VSCode)
+        display.xfixes_select_selection_input(
+            self._root, self._atoms['CLIPBOARD'], xfixes.XFixesSetSelectionOwnerNotifyMask
+        )
+        self._root.change_attributes(event_mask=X.PropertyChangeMask)
+        display.flush()
+
+    @classmethod
+    def create(cls, display_name: Optional[str], window_titles: List[str],
+               on_change: Callable[[str], None], **options: Any) -> Optional["X11ChangeWatcher"]:
+        """
+        Écouteur sur un display, ou None si les événements X11 sont indisponibles
+
+        Args:
+            display_name: Display X (ex: ':1') ; $DISPLAY si None
+        """
+        if not (display_name or os.getenv('DISPLAY')):
+            return None
+
+        try:
+            from Xlib import display as xdisplay
+        except ImportError:
+            logger.info("python-xlib absent : monitoring par polling seul")
+            return None
+
+        try:
+            connection = xdisplay.Display(display_name)
+        except Exception as e:
+            logger.warning(f"Connexion au display X {display_name or os.getenv('DISPLAY')} impossible: {str(e)}")
+            return None
+
+        missing = [ext for ext in ('XFIXES', 'DAMAGE') if not connection.has_extension(ext)]
+        if missing:
+            logger.warning(f"Extensions X11 absentes ({', '.join(missing)}) : monitoring par polling seul")
+            connection.close()
+            return None
+
+        try:
+            # Négociation de version requise avant toute requête XFixes/Damage
+            connection.xfixes_query_version()
+            connection.damage_query_version()
+            return cls(connection, window_titles, on_change, **options)
+        except Exception as e:
+            logger.warning(f"Abonnement aux événements X11 impossible: {str(e)}")
+            connection.close()
+            return None
+
+    @property
+    def attached(self) -> bool:
+        """La fenêtre VSCode est trouvée et surveillée"""
+        return self._window is not None
+
+    def start(self) -> None:
+        """Démarre le thread d'écoute"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Événements X11 : écoute démarrée ({self.name})")
+
+    def stop(self) -> None:
+        """Arrête le thread et ferme la connexion"""
+        os.write(self._stop_w, b'.')
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        try:
+            self.display.close()
+        except Exception:
+            pass
+        for fd in (self._stop_r, self._stop_w):
+            os.close(fd)
+
+    @contextmanager
+    def muted(self) -> Iterator[None]:
+        """Ignore les événements pendant le bloc (nos clics et copies) et mute_grace après"""
+        with self._lock:
+            self._muted += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._muted -= 1
+                self._muted_until = time.monotonic() + self.mute_grace
+
+    def _run(self) -> None:
+        """Boucle du thread : select() sur la connexion X et le pipe d'arrêt"""
+        fileno = self.display.fileno()
+
+        while True:
+            now = time.monotonic()
+            if self._window is None and now >= self._next_discovery:
+                self._attach()
+
+            timeout = None if self._window is not None else self.discovery_interval
+            with self._lock:
+                if self._pending_source is not None:
+                    delay = max(0.0, self._last_wake + self.min_wake_interval - now)
+                    timeout = delay if timeout is None else min(timeout, delay)
+
+            # Les allers-retours de _attach(), _find_window() et _update_origin() ont pu
+            # lire des événements dans la file de Xlib : select() ne les verrait pas
+            if self._has_queued_events():
+                timeout = 0
+
+            try:
+                readable, _, _ = select.select([fileno, self._stop_r], [], [], timeout)
+            except InterruptedError:
+                continue
+
+            if self._stop_r in readable:
+                return
+
+            try:
+                while self.display.pending_events():
+                    self._handle(self.display.next_event())
+                # Requêtes émises pendant le traitement (DamageSubtract)
+                self.display.flush()
+            except Exception as e:
+                logger.error(f"Événements X11 : connexion perdue, polling seul: {str(e)}")
+                return
+
+            self._flush_pending()
+
+    def _has_queued_events(self) -> bool:
+        """Des événements attendent déjà dans la file de Xlib (True en cas d'erreur : traitée ensuite)"""
+        try:
+            return bool(self.display.pending_events())
+        except Exception:
+            return True
+
+    def _handle(self, event: Any) -> None:
+        """Traite un événement"""
+        X = self._X
+        event_type = event.type & 0x7f
+
+        if event_type == self._damage_event:
+            if self._damage is None:
+                return
+            self.display.damage_subtract(self._damage)
+            if self._in_region(event.area):
+                self._wake('damage')
+        elif (event_type, getattr(event, 'sub_code', None)) == self._selection_event:
+            self._wake('presse-papiers')
+        elif event_type == X.PropertyNotify:
+            if self._window is not None and event.window == self._window:
+                if event.atom == self._atoms['_NET_WM_NAME']:
+                    self._wake('titre')
+            elif event.atom == self._atoms['_NET_CLIENT_LIST'] and self._window is None:
+                # Nouvelle fenêtre : recherche immédiate
+                self._next_discovery = 0.0
+        elif event_type == X.ConfigureNotify and event.window == self._window:
+            self._update_origin()
+        elif event_type == X.DestroyNotify and event.window == self._window:
+            logger.info("Événements X11 : fenêtre VSCode fermée")
+            self._detach()
+
+    def _in_region(self, area: Any) -> bool:
+        """Le dommage (relatif à la fenêtre) touche la zone de réponse"""
+        region = self.region() if self.region else None
+        if region is None:
+            return True
+        left, top = self._window_origin
+        return _overlaps((left + area.x, top + area.y, area.width, area.height), region)
+
+    def _wake(self, source: str) -> None:
+        """Réveille le monitoring, au plus une fois par min_wake_interval"""
+        now = time.monotonic()
+        with self._lock:
+            if self._muted or now < self._muted_until:
+                return
+            if now - self._last_wake < self.min_wake_interval:
+                # Rafale : réveil différé à la fin de l'intervalle
+                self._pending_source = source
+                return
+            self._last_wake = now
+            self._pending_source = None
+
+        self._notify(source)
+
+    def _flush_pending(self) -> None:
+        """Transmet le réveil différé dont l'intervalle est écoulé"""
+        now = time.monotonic()
+        with self._lock:
+            source = self._pending_source
+            if source is None or now - self._last_wake < self.min_wake_interval:
+                return
+            self._pending_source = None
+            if self._muted or now < self._muted_until:
+                return
+            self._last_wake = now
+
+        self._notify(source)
+
+    def _notify(self, source: str) -> None:
+        self.wakes[source] = self.wakes.get(source, 0) + 1
+        logger.debug(f"Événements X11 : réveil ({source})")
+        try:
+            self.on_change(source)
+        except Exception as e:
+            logger.error(f"Erreur du rappel de réveil X11: {str(e)}")
+
+    def _attach(self) -> None:
+        """Recherche la fenêtre VSCode et s'abonne à ses événements"""
+        self._next_discovery = time.monotonic() + self.discovery_interval
+        window = self._find_window()
+        if window is None:
+            return
+
+        X = self._X
+        try:
+            window.change_attributes(event_mask=X.PropertyChangeMask | X.StructureNotifyMask)
+            self._damage = window.damage_create(self._damage_level)
+            self._window = window
+            self._update_origin()
+        except Exception as e:
+            logger.warning(f"Événements X11 : abonnement à la fenêtre impossible: {str(e)}")
+            self._detach()
+            return
+
+        logger.info(f"Événements X11 : fenêtre VSCode surveillée (0x{window.id:x})")
+
+    def _detach(self) -> None:
+        """Abandonne la fenêtre courante (fermée) ; elle sera recherchée à nouveau"""
+        if self._damage is not None:
+            try:
+                self.display.damage_destroy(self._damage)
+            except Exception:
+                pass
+        self._window = None
+        self._damage = None
+        self._next_discovery = 0.0
+
+    def _update_origin(self) -> None:
+        """Position de la fenêtre à l'écran (conversion des dommages en coordonnées écran)"""
+        try:
+            origin = self._root.translate_coords(self._window, 0, 0)
+            self._window_origin = (origin.x, origin.y)
+        except Exception as e:
+            logger.debug(f"Position de la fenêtre X11 illisible: {str(e)}")
+
+    def _find_window(self) -> Optional[Any]:
+        """Première fenêtre de _NET_CLIENT_LIST dont le titre correspond"""
+        try:
+            clients = self._root.get_full_property(self._atoms['_NET_CLIENT_LIST'], self._X.AnyPropertyType)
+        except Exception as e:
+            logger.debug(f"_NET_CLIENT_LIST illisible: {str(e)}")
+            return None
+        if clients is None:
+            return None
+
+        titles = []
+        for window_id in clients.value:
+            window = self.display.create_resource_object('window', window_id)
+            title = self._window_title(window)
+            if title:
+                titles.append((title.lower(), window))
+
+        for pattern in self.window_titles:
+            for title, window in titles:
+                if pattern.lower() in title:
+                    return window
+        return None
+
+    def _window_title(self, window: Any) -> Optional[str]:
+        """Titre _NET_WM_NAME (UTF-8), ou WM_NAME"""
+        try:
+            name = window.get_full_property(self._atoms['_NET_WM_NAME'], self._atoms['UTF8_STRING'])
+            if name is not None:
+                value = name.value
+                return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+            return window.get_wm_name()
+        except Exception:
+            # Fenêtre détruite pendant l'énumération
+            return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Affiche les réveils pour les fenêtres dont le titre contient les arguments"""
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
+    titles = (argv if argv is not None else sys.argv[1:]) or ['Visual Studio Code']
+
+    watcher = X11ChangeWatcher.create(None, titles, lambda source: print(f"réveil: {source}", flush=True))
+    if watcher is None:
+        print("Événements X11 indisponibles (python-xlib, DISPLAY, XFIXES/DAMAGE)", file=sys.stderr)
+        return 1
+
+    watcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+        print(f"Réveils: {watcher.wakes}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())